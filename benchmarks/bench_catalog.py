@@ -0,0 +1,151 @@
+"""
+Поиск по локальному каталогу (utils.catalog) на импортированном дампе.
+
+Генерируется дамп в формате OpenFoodFacts (JSONL) из названий с частыми
+и редкими словами: частоты слов убывают по закону Ципфа, как в настоящем
+дампе, где «chocolate» или «молоко» встречаются в десятках тысяч
+названий. Часть строк — с пустой и нечисловой калорийностью. Дамп
+импортируется через FoodCatalog.import_dump во временную базу, затем
+замеряется время FoodCatalog.search на запросах с опечатками, на
+запросах из одного частого слова и на отсутствующих продуктах.
+
+Для сравнения те же запросы выполняются без бюджета записей индекса
+(MAX_POSTINGS): по всем нужным триграммам запроса, сколько бы названий их
+ни содержало. Качество — доля запросов с опечаткой, для которых нужный
+продукт оказался первым.
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_catalog --products 300000
+"""
+import argparse
+import json
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import utils.catalog as catalog_module
+from utils.catalog import FoodCatalog
+
+FOODS = [
+    "chocolate", "milk", "cheese", "yogurt", "bread", "butter", "juice", "cookies", "pasta", "rice",
+    "chicken", "beef", "tea", "coffee", "cereal", "sauce", "soup", "cream", "biscuits", "honey",
+    "молоко", "кефир", "творог", "сметана", "сыр", "хлеб", "гречка", "печенье", "шоколад", "йогурт",
+    "масло", "колбаса", "курица", "макароны", "сок", "конфеты", "пельмени", "майонез", "чай", "кофе",
+]
+QUALIFIERS = [
+    "organic", "whole", "light", "classic", "dark", "natural", "original", "vanilla", "strawberry", "bio",
+    "сливочное", "обезжиренный", "классический", "ванильный", "домашний", "3,2%", "2,5%", "бзмж", "500 г", "1 кг",
+]
+SYLLABLES = [consonant + vowel for consonant in "bcdfghklmnprstvz" for vowel in "aeiou"]
+
+
+def zipf_choice(rng, words, weights):
+    return rng.choices(words, weights)[0]
+
+
+def make_names(rng, count):
+    """Уникальные названия: продукт, уточнения и бренд из случайных слогов."""
+    brands = sorted({"".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).capitalize() for _ in range(20000)})
+    food_weights = [1 / (rank + 1) for rank in range(len(FOODS))]
+    qualifier_weights = [1 / (rank + 1) for rank in range(len(QUALIFIERS))]
+    brand_weights = [1 / (rank + 1) ** 0.8 for rank in range(len(brands))]
+    names = set()
+    while len(names) < count:
+        words = [zipf_choice(rng, FOODS, food_weights)]
+        words += [zipf_choice(rng, QUALIFIERS, qualifier_weights) for _ in range(rng.randint(0, 2))]
+        words.append(zipf_choice(rng, brands, brand_weights))
+        rng.shuffle(words)
+        names.add(" ".join(words))
+    return sorted(names)
+
+
+def write_dump(path, names, rng):
+    """Дамп JSONL; у каждого двадцатого продукта калорийность пустая или нечисловая."""
+    with open(path, "w", encoding="utf-8") as file:
+        for index, name in enumerate(names):
+            kcal = rng.choice(["", "n/a"]) if index % 20 == 0 else round(rng.uniform(10, 600), 1)
+            file.write(json.dumps({"product_name": name, "nutriments": {"energy-kcal_100g": kcal}}, ensure_ascii=False))
+            file.write("\n")
+
+
+def typo(rng, name):
+    """Запрос с пропущенной буквой в одном из слов."""
+    words = name.split()
+    index = rng.randrange(len(words))
+    word = words[index]
+    if len(word) > 3:
+        position = rng.randrange(1, len(word) - 1)
+        words[index] = word[:position] + word[position + 1:]
+    return " ".join(words)
+
+
+def measure(catalog, queries):
+    """Время поиска в мс по каждому запросу и доля запросов, где первым найден нужный продукт."""
+    timings, hits, targeted = [], 0, 0
+    for query, target in queries:
+        started = time.perf_counter()
+        results = catalog.search(query)
+        timings.append((time.perf_counter() - started) * 1000)
+        if target is not None:
+            targeted += 1
+            hits += bool(results) and results[0][1] == target
+    return timings, hits / targeted if targeted else None
+
+
+def describe(timings):
+    timings = sorted(timings)
+    p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+    return f"{statistics.median(timings):>9.2f}{p99:>9.2f}{timings[-1]:>9.2f}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=300_000, help="продуктов в дампе")
+    parser.add_argument("--queries", type=int, default=100, help="запросов каждого вида")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    data_dir = Path(tempfile.mkdtemp(prefix="bot-catalog-"))
+    names = make_names(rng, args.products)
+    dump = data_dir / "dump.jsonl"
+    write_dump(dump, names, rng)
+
+    catalog = FoodCatalog(data_dir / "catalog.db")
+    started = time.perf_counter()
+    imported = catalog.import_dump(dump)
+    import_sec = time.perf_counter() - started
+    postings = catalog.conn.execute("SELECT COUNT(*) FROM product_trigrams").fetchone()[0]
+    top_gram, top_count = catalog.conn.execute(
+        "SELECT gram, COUNT(*) AS n FROM product_trigrams GROUP BY gram ORDER BY n DESC LIMIT 1"
+    ).fetchone()
+    print(f"Дамп: {len(names)} продуктов, импортировано {imported} за {import_sec:.1f} с")
+    print(f"Индекс: {postings} записей, самая частая триграмма «{top_gram}» — {top_count} продуктов")
+
+    with_kcal = [name for index, name in enumerate(names) if index % 20]
+    kinds = {
+        "с опечаткой": [(typo(rng, name), name) for name in rng.sample(with_kcal, args.queries)],
+        "частое слово": [(rng.choice(FOODS[:10] + FOODS[20:30]), None) for _ in range(args.queries)],
+        "нет в каталоге": [
+            ("".join(rng.choice(SYLLABLES) for _ in range(5)) + " " + rng.choice(FOODS), None)
+            for _ in range(args.queries)
+        ],
+    }
+
+    print(f"\n{'запросы':<16}{'поиск':<18}{'p50, мс':>9}{'p99, мс':>9}{'макс, мс':>9}{'top-1':>8}")
+    capped = catalog_module.MAX_POSTINGS
+    for kind, queries in kinds.items():
+        for label, max_postings in ((f"до {capped} записей", capped), ("без ограничения", sys.maxsize)):
+            catalog_module.MAX_POSTINGS = max_postings
+            measure(catalog, queries[:20])  # прогрев страниц базы
+            timings, top1 = measure(catalog, queries)
+            top1 = f"{top1:>8.0%}" if top1 is not None else f"{'—':>8}"
+            print(f"{kind:<16}{label:<18}{describe(timings)}{top1}")
+    catalog_module.MAX_POSTINGS = capped
+    catalog.close()
+
+
+if __name__ == "__main__":
+    main()
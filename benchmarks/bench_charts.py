@@ -0,0 +1,76 @@
+"""
+Сравнение бэкендов отрисовки графика прогресса: matplotlib и Pillow.
+
+Каждый бэкенд измеряется в отдельном процессе, чтобы время импорта и
+пиковая память не смешивались.
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_charts --renders 200
+"""
+import argparse
+import json
+import random
+import resource
+import statistics
+import subprocess
+import sys
+import time
+
+BACKENDS = ("matplotlib", "pillow")
+
+
+def run_backend(backend, renders):
+    """Замеряет один бэкенд в текущем процессе."""
+    started = time.perf_counter()
+    if backend == "pillow":
+        from utils.ring_chart import create_combined_progress_chart
+    else:
+        import matplotlib
+        matplotlib.use("Agg")
+        from utils.helpers import create_combined_progress_chart
+    import_ms = (time.perf_counter() - started) * 1000
+
+    rng = random.Random(0)
+    latencies = []
+    for _ in range(renders):
+        args = (rng.randint(0, 3000), 2500, rng.randint(0, 3500), 2200)
+        started = time.perf_counter()
+        create_combined_progress_chart(*args)
+        latencies.append((time.perf_counter() - started) * 1000)
+
+    latencies.sort()
+    return {
+        "backend": backend,
+        "import_ms": round(import_ms, 1),
+        "first_ms": round(latencies[0], 2),
+        "p50_ms": round(statistics.median(latencies), 2),
+        "p99_ms": round(latencies[int(0.99 * (len(latencies) - 1))], 2),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--renders", type=int, default=100, help="количество отрисовок на бэкенд")
+    parser.add_argument("--backend", choices=BACKENDS, help="замерить только один бэкенд в этом процессе")
+    args = parser.parse_args()
+
+    if args.backend:
+        print(json.dumps(run_backend(args.backend, args.renders)))
+        return
+
+    print(f"{'бэкенд':<12}{'импорт, мс':>12}{'p50, мс':>10}{'p99, мс':>10}{'RSS, МБ':>10}")
+    for backend in BACKENDS:
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_charts", "--backend", backend, "--renders", str(args.renders)],
+            check=True, capture_output=True, text=True,
+        ).stdout
+        result = json.loads(output)
+        print(
+            f"{backend:<12}{result['import_ms']:>12}{result['p50_ms']:>10}"
+            f"{result['p99_ms']:>10}{result['peak_rss_mb']:>10}"
+        )
+
+
+if __name__ == "__main__":
+    main()
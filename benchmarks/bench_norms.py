@@ -0,0 +1,84 @@
+"""
+Пакетный расчёт норм (utils.calculations) против расчёта по одному пользователю.
+
+Замеряется скорость ночного пересчёта норм на случайных профилях.
+Совпадение пакетного расчёта со скалярным проверяют тесты
+(tests/test_calculations.py).
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_norms --users 100000
+"""
+import argparse
+import time
+
+import numpy as np
+
+from utils.calculations import (
+    calculate_calories_norm,
+    calculate_calories_norms,
+    calculate_water_norm,
+    calculate_water_norms,
+)
+
+
+def make_profiles(rng, users):
+    """Случайные профили: смесь целых и дробных значений, как в хранилище."""
+    integer = rng.random(users) < 0.5
+    weight = np.where(integer, rng.integers(40, 150, users), np.round(rng.uniform(40, 150, users), 1))
+    height = np.where(integer, rng.integers(140, 210, users), np.round(rng.uniform(140, 210, users), 1))
+    return {
+        "weight": weight.tolist(),
+        "height": height.tolist(),
+        "age": rng.integers(14, 90, users).tolist(),
+        "gender": rng.choice(["male", "female"], users).tolist(),
+        "activity": rng.integers(0, 600, users).tolist(),
+        "temperature": rng.choice([-20.0, 25.0, 25.01, 30.0, 30.5, rng.uniform(-40, 45)], users).tolist(),
+    }
+
+
+def scalar_norms(profiles):
+    water = [
+        calculate_water_norm(weight, activity, temperature)
+        for weight, activity, temperature in zip(profiles["weight"], profiles["activity"], profiles["temperature"])
+    ]
+    calories = [
+        calculate_calories_norm(weight, height, age, gender, activity)
+        for weight, height, age, gender, activity in zip(
+            profiles["weight"], profiles["height"], profiles["age"], profiles["gender"], profiles["activity"]
+        )
+    ]
+    return water, calories
+
+
+def batch_norms(profiles):
+    water = calculate_water_norms(profiles["weight"], profiles["activity"], profiles["temperature"]).tolist()
+    calories = calculate_calories_norms(
+        profiles["weight"], profiles["height"], profiles["age"], profiles["gender"], profiles["activity"]
+    ).tolist()
+    return water, calories
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=100_000, help="количество пользователей")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    profiles = make_profiles(rng, args.users)
+    started = time.perf_counter()
+    expected = scalar_norms(profiles)
+    scalar_sec = time.perf_counter() - started
+
+    started = time.perf_counter()
+    actual = batch_norms(profiles)
+    batch_sec = time.perf_counter() - started
+    assert expected == actual
+
+    print(f"Пользователей: {args.users}")
+    print(f"По одному: {scalar_sec:.3f} с ({scalar_sec / args.users * 1e6:.2f} мкс на пользователя)")
+    print(f"Пачкой NumPy: {batch_sec:.3f} с ({batch_sec / args.users * 1e6:.2f} мкс на пользователя)")
+    print(f"Ускорение: {scalar_sec / batch_sec:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
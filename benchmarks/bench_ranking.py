@@ -0,0 +1,87 @@
+"""
+Сравнение ранжирования продуктов: difflib.SequenceMatcher и TrigramIndex.
+
+Скорость: время ранжирования одного запроса по выдаче разного размера
+(как page_size у OpenFoodFacts), для триграмм — с построением индекса
+и по заранее построенному индексу. Качество: доля запросов, для которых
+нужный продукт оказался первым, на искажённых запросах (регистр, ё,
+опечатка, латиница, лишнее слово).
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_ranking
+"""
+import argparse
+import random
+import time
+from difflib import SequenceMatcher
+
+from utils.ranking import TrigramIndex, _TRANSLIT
+
+BASES = [
+    "гречка", "гречневая крупа", "молоко", "кефир", "творог", "сметана", "йогурт", "банан",
+    "яблоко", "курица", "куриное филе", "говядина", "свинина", "рис", "овсянка", "хлеб",
+    "сыр", "масло сливочное", "ёжевика", "печенье", "шоколад", "макароны", "картофель", "морковь",
+]
+BRANDS = ["Простоквашино", "Мистраль", "Агуша", "Петелинка", "Домик в деревне", "Увелка", "365 дней", ""]
+SUFFIXES = ["", "ядрица", "3,2%", "2,5%", "обезжиренный", "классический", "с ванилью", "бзмж", "500 г"]
+
+
+def make_catalog(rng, size):
+    names = set()
+    while len(names) < size:
+        names.add(" ".join(filter(None, [rng.choice(BASES).capitalize(), rng.choice(SUFFIXES), rng.choice(BRANDS)])))
+    return sorted(names)
+
+
+def distort(rng, name):
+    """Искажает название так, как его мог бы ввести пользователь."""
+    words = name.lower().replace("ё", "е").split()
+    kind = rng.randrange(4)
+    if kind == 0 and len(words[0]) > 3:  # опечатка
+        i = rng.randrange(1, len(words[0]) - 1)
+        words[0] = words[0][:i] + words[0][i + 1:]
+    elif kind == 1:  # латиницей
+        words = [word.translate(_TRANSLIT) for word in words]
+    elif kind == 2:  # только часть слов
+        words = words[:2]
+    return " ".join(words).upper() if rng.random() < 0.3 else " ".join(words)
+
+
+def rank_difflib(query, names):
+    return sorted(range(len(names)), key=lambda i: SequenceMatcher(None, query.lower(), names[i].lower()).ratio(), reverse=True)
+
+
+def rank_trigram(query, names):
+    return [idx for idx, _ in TrigramIndex(names).rank(query)]
+
+
+def measure(rank, queries, names):
+    started = time.perf_counter()
+    hits = 0
+    for query, target in queries:
+        hits += rank(query, names)[0] == target
+    return (time.perf_counter() - started) * 1000 / len(queries), hits / len(queries)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", type=int, default=200, help="запросов на каждый размер выдачи")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    print(f"{'выдача':>8}{'difflib, мс':>14}{'top-1':>8}{'триграммы, мс':>16}{'top-1':>8}{'готовый индекс, мс':>21}")
+    for size in (10, 50, 200, 1000):
+        names = make_catalog(rng, size)
+        queries = [(distort(rng, names[target]), target) for target in (rng.randrange(size) for _ in range(args.queries))]
+        difflib_ms, difflib_top1 = measure(rank_difflib, queries, names)
+        trigram_ms, trigram_top1 = measure(rank_trigram, queries, names)
+        index = TrigramIndex(names)
+        indexed_ms, _ = measure(lambda query, _: [idx for idx, _ in index.rank(query)], queries, names)
+        print(
+            f"{size:>8}{difflib_ms:>14.3f}{difflib_top1:>8.2f}"
+            f"{trigram_ms:>16.3f}{trigram_top1:>8.2f}{indexed_ms:>21.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
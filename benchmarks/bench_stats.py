@@ -0,0 +1,127 @@
+"""
+Скорость расчёта статистики /stats: NumPy (utils.stats) и циклы Python.
+
+Генерируется год дневных итогов для заданного числа пользователей. NumPy
+считает статистику за 7, 30 и 90 дней сразу для пачки пользователей
+(массивы пользователи × дни); для сравнения та же статистика считается
+обычными циклами по словарям на части пользователей и пересчитывается
+на всех. Отдельно замеряется расчёт для одного пользователя, как в /stats.
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_stats --users 100000
+"""
+import argparse
+import statistics
+import time
+
+import numpy as np
+
+from utils.stats import PERIODS, summarize
+
+DAYS = 365
+
+
+def make_chunk(rng, users):
+    """Год дневных итогов для пачки пользователей."""
+    water_norm = np.repeat(rng.uniform(1500, 4000, (users, 1)), DAYS, axis=1)
+    calories_norm = np.repeat(rng.uniform(1600, 3200, (users, 1)), DAYS, axis=1)
+    active = rng.random((users, DAYS)) < 0.8
+    water = np.where(active, rng.normal(water_norm, 500), 0).clip(0)
+    calories = np.where(active, rng.normal(calories_norm, 400), 0).clip(0)
+    burned = np.where(rng.random((users, DAYS)) < 0.3, rng.uniform(100, 600, (users, DAYS)), 0)
+    return water, calories, burned, water_norm, calories_norm
+
+
+def summarize_python(days):
+    """Та же статистика циклами по списку словарей дневных итогов одного пользователя."""
+    result = {}
+    for period in PERIODS:
+        window = days[-period:]
+        water_met = [day["water_norm"] > 0 and day["water"] >= day["water_norm"] for day in window]
+        calories_met = [0 < day["calories"] <= day["calories_norm"] + day["burned"] for day in window]
+        net = [day["calories"] - day["burned"] for day in window]
+
+        def streaks(met):
+            best = run = 0
+            for value in met:
+                run = run + 1 if value else 0
+                best = max(best, run)
+            current = 0
+            for value in reversed(met if met[-1] else met[:-1]):
+                if not value:
+                    break
+                current += 1
+            return current, best
+
+        result[period] = {
+            "water_avg": sum(day["water"] for day in window) / period,
+            "calories_avg": sum(day["calories"] for day in window) / period,
+            "burned_avg": sum(day["burned"] for day in window) / period,
+            "net_avg": sum(net) / period,
+            "net_total": sum(net),
+            "water_streak": streaks(water_met),
+            "calories_streak": streaks(calories_met),
+            "active_days": sum(1 for day in window if day["water"] or day["calories"] or day["burned"]),
+        }
+    return result
+
+
+def as_dicts(chunk, user):
+    water, calories, burned, water_norm, calories_norm = (column[user].tolist() for column in chunk)
+    return [
+        {"water": w, "calories": c, "burned": b, "water_norm": wn, "calories_norm": cn}
+        for w, c, b, wn, cn in zip(water, calories, burned, water_norm, calories_norm)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=100_000, help="количество пользователей")
+    parser.add_argument("--chunk", type=int, default=10_000, help="пользователей в одной пачке NumPy")
+    parser.add_argument("--python-users", type=int, default=1000, help="пользователей для замера циклов Python")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    numpy_sec = 0.0
+    python_sec = 0.0
+    python_users = 0
+    single_ms = []
+    for start in range(0, args.users, args.chunk):
+        chunk = make_chunk(rng, min(args.chunk, args.users - start))
+
+        started = time.perf_counter()
+        summary = summarize(*chunk)
+        numpy_sec += time.perf_counter() - started
+
+        # Сверяем с циклами Python и замеряем их на части пользователей
+        for user in range(min(len(chunk[0]), args.python_users - python_users)):
+            days = as_dicts(chunk, user)
+            started = time.perf_counter()
+            expected = summarize_python(days)
+            python_sec += time.perf_counter() - started
+            python_users += 1
+            for period in PERIODS:
+                assert np.isclose(summary[period]["net_total"][user], expected[period]["net_total"])
+                assert summary[period]["water_streak"][user] == expected[period]["water_streak"][0]
+                assert summary[period]["water_best_streak"][user] == expected[period]["water_streak"][1]
+                assert summary[period]["calories_streak"][user] == expected[period]["calories_streak"][0]
+                assert summary[period]["active_days"][user] == expected[period]["active_days"]
+
+        # Один пользователь за 90 дней, как в обработчике /stats
+        if len(single_ms) < 200:
+            series = [column[0, -max(PERIODS):] for column in chunk]
+            for _ in range(200 // max(1, args.users // args.chunk)):
+                started = time.perf_counter()
+                summarize(*series)
+                single_ms.append((time.perf_counter() - started) * 1000)
+
+    python_total = python_sec / max(1, python_users) * args.users
+    print(f"Пользователей: {args.users}, дней: {DAYS}, периоды: {', '.join(map(str, PERIODS))}")
+    print(f"NumPy, пачками по {args.chunk}: {numpy_sec:.2f} с ({numpy_sec / args.users * 1e6:.1f} мкс на пользователя)")
+    print(f"Циклы Python (по {python_users} польз.): ~{python_total:.2f} с ({python_sec / max(1, python_users) * 1e6:.1f} мкс на пользователя)")
+    print(f"Ускорение: {python_total / numpy_sec:.1f}x")
+    print(f"Один пользователь (/stats): p50 {statistics.median(single_ms):.3f} мс")
+
+
+if __name__ == "__main__":
+    main()
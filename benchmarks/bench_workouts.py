@@ -0,0 +1,105 @@
+"""
+Скорость разбора сообщений о тренировках (utils.workouts).
+
+Генерируются сообщения из одной-четырёх тренировок: названия и синонимы
+из реестра, многословные названия, разные единицы длительности и
+разделители. Замеряется разбор через префиксное дерево реестра и, для
+сравнения, поиск того же самого длинного названия перебором всех названий
+(startswith), а также загрузка реестра из файла.
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_workouts --messages 100000
+"""
+import argparse
+import random
+import time
+
+from config import WORKOUTS_FILE
+from utils.workouts import WorkoutRegistry, fold_name
+
+SEPARATORS = [", ", "; ", " и ", " + ", "\n"]
+UNITS = ["", " мин", "мин", " минут", " м"]
+
+
+def make_messages(registry, count, rng):
+    """Случайные сообщения и ожидаемые (название тренировки, минуты)."""
+    names = [(name, workout) for workout in registry.workouts for name in (workout["name"], *workout["synonyms"])]
+    messages = []
+    for _ in range(count):
+        parts, expected = [], []
+        for _ in range(rng.randint(1, 4)):
+            name, workout = rng.choice(names)
+            if rng.random() < 0.2:
+                hours = rng.choice([1, 1.5, 2])
+                parts.append(f"{name.capitalize()} {str(hours).replace('.', ',')} ч")
+                expected.append((workout["name"], hours * 60))
+            else:
+                minutes = rng.randint(5, 120)
+                parts.append(f"{name} {minutes}{rng.choice(UNITS)}")
+                expected.append((workout["name"], minutes))
+        text = parts[0]
+        for part in parts[1:]:
+            text += rng.choice(SEPARATORS) + part
+        messages.append((text, expected))
+    return messages
+
+
+class LinearMatcher:
+    """Поиск самого длинного названия перебором всех названий — для сравнения с деревом."""
+
+    def __init__(self, registry):
+        self.names = sorted(
+            ((fold_name(name), workout) for workout in registry.workouts
+             for name in (workout["name"], *workout["synonyms"])),
+            key=lambda item: len(item[0]), reverse=True,
+        )
+
+    def match(self, text, start=0):
+        for name, workout in self.names:
+            end = start + len(name)
+            if text.startswith(name, start) and (end == len(text) or not text[end].isalpha()):
+                return workout, end
+        return None, start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=100_000, help="количество сообщений")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    registry = WorkoutRegistry.load(WORKOUTS_FILE)
+    load_ms = (time.perf_counter() - started) * 1000
+
+    messages = make_messages(registry, args.messages, random.Random(0))
+    workouts_count = sum(len(expected) for _, expected in messages)
+
+    # Проверяем разбор на всех сообщениях
+    for text, expected in messages:
+        entries, unknown = registry.parse(text)
+        assert not unknown, (text, unknown)
+        assert [(workout["name"], minutes) for workout, minutes in entries] == expected, (text, entries)
+
+    started = time.perf_counter()
+    for text, _ in messages:
+        registry.parse(text)
+    trie_sec = time.perf_counter() - started
+
+    # Тот же разбор, но поиск названия — перебором
+    linear = WorkoutRegistry(registry.workouts)
+    linear.match = LinearMatcher(registry).match
+    started = time.perf_counter()
+    for text, _ in messages:
+        linear.parse(text)
+    linear_sec = time.perf_counter() - started
+
+    names = sum(1 + len(workout["synonyms"]) for workout in registry.workouts)
+    print(f"Реестр: {len(registry.workouts)} тренировок, {names} названий, загрузка {load_ms:.2f} мс")
+    print(f"Сообщений: {args.messages}, тренировок в них: {workouts_count}")
+    print(f"Префиксное дерево: {args.messages / trie_sec:,.0f} сообщений/с ({trie_sec / args.messages * 1e6:.1f} мкс на сообщение)")
+    print(f"Перебор названий: {args.messages / linear_sec:,.0f} сообщений/с ({linear_sec / args.messages * 1e6:.1f} мкс на сообщение)")
+    print(f"Ускорение: {linear_sec / trie_sec:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,313 @@
+"""
+Нагрузочный тест диспетчера: сценарии диалогов на тысячах пользователей.
+
+Обновления подаются в настоящий диспетчер из bot.create_dispatcher со всеми
+роутерами и middleware. Запросы к Telegram перехватывает поддельная сессия
+бота (вызовы только подсчитываются), OpenWeather и OpenFoodFacts заменяет
+локальный сервер-заглушка. Базы создаются во временном каталоге.
+
+Каждый сценарий выполняется в отдельном процессе, чтобы пиковая память
+(RSS) не смешивалась. Для сценариев, кроме profile и full, профили
+пользователей создаются заранее и в замер не входят.
+
+Запуск из корня проекта:
+    python -m benchmarks.load_test --users 1000
+    python -m benchmarks.load_test --users 100000 --scenario water --concurrency 500
+
+Медленный или сбоящий API задаётся настройками транспорта (utils.transport):
+    API_LATENCY_MS=food=2000 API_ERROR_RATE=food=0.2 python -m benchmarks.load_test --scenario food
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+
+SCENARIOS = ("profile", "water", "food", "workout", "progress", "full")
+
+CITIES = [
+    "Москва", "Санкт-Петербург", "Новосибирск", "Екатеринбург", "Казань", "Нижний Новгород", "Челябинск",
+    "Самара", "Омск", "Ростов-на-Дону", "Уфа", "Красноярск", "Воронеж", "Пермь", "Волгоград", "Салехард",
+]
+PRODUCTS = [
+    "гречка", "молоко", "кефир", "творог", "банан", "яблоко", "курица", "рис", "овсянка", "хлеб",
+    "сыр", "йогурт", "макароны", "картофель", "говядина", "шоколад",
+]
+BRANDS = ["Простоквашино", "Мистраль", "Агуша", "Петелинка", "Домик в деревне", "Увелка", "365 дней"]
+WORKOUTS = ["бег", "плавание", "йога"]
+
+
+# --- Заглушка внешних API ---------------------------------------------------
+
+def create_stub_app(latency_ms):
+    """Веб-приложение, отвечающее как OpenWeather (/weather) и OpenFoodFacts (/food)."""
+    from aiohttp import web
+
+    async def delay():
+        if latency_ms:
+            await asyncio.sleep(latency_ms / 1000)
+
+    async def weather(request):
+        await delay()
+        city = request.query.get("q") or request.query.get("id", "")
+        seed = sum(map(ord, city))
+        return web.json_response({
+            "id": seed,
+            "name": city,
+            "main": {"temp": seed % 35 - 5},
+            "timezone": 3600 * (seed % 10),
+        })
+
+    async def food(request):
+        await delay()
+        query = request.query.get("search_terms", "")
+        rng = random.Random(query)
+        products = [
+            {"product_name": f"{query.capitalize()} {brand}", "nutriments": {"energy-kcal_100g": rng.randint(30, 600)}}
+            for brand in BRANDS
+        ]
+        products += [{"product_name": f"Продукт {i}", "nutriments": {}} for i in range(5)]
+        return web.json_response({"products": products})
+
+    app = web.Application()
+    app.router.add_get("/weather", weather)
+    app.router.add_get("/food", food)
+    return app
+
+
+def serve_stub(latency_ms):
+    """Запускает заглушку на свободном порту и печатает порт в stdout."""
+    from aiohttp import web
+
+    async def run():
+        runner = web.AppRunner(create_stub_app(latency_ms), access_log=None)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        print(site._server.sockets[0].getsockname()[1], flush=True)
+        await asyncio.Event().wait()
+
+    asyncio.run(run())
+
+
+# --- Поддельная сессия бота -------------------------------------------------
+
+def create_fake_session():
+    """Сессия бота, которая подсчитывает запросы к Telegram вместо отправки."""
+    from aiogram.client.session.base import BaseSession
+    from aiogram.methods import SendPhoto
+    from aiogram.types import Message
+
+    class FakeSession(BaseSession):
+        def __init__(self):
+            super().__init__()
+            self.calls = Counter()
+            self._ids = itertools.count(1)
+
+        async def make_request(self, bot, method, timeout=None):
+            self.calls[type(method).__name__] += 1
+            if method.__returning__ is not Message:
+                return True
+            message_id = next(self._ids)
+            payload = {"message_id": message_id, "date": 0, "chat": {"id": method.chat_id, "type": "private"}}
+            if isinstance(method, SendPhoto):
+                payload["photo"] = [{"file_id": f"photo-{message_id}", "file_unique_id": str(message_id),
+                                     "width": 600, "height": 600}]
+            return Message.model_validate(payload, context={"bot": bot})
+
+        async def stream_content(self, *args, **kwargs):
+            yield b""
+
+        async def close(self):
+            pass
+
+    return FakeSession()
+
+
+# --- Сценарии ---------------------------------------------------------------
+
+def _message(update_id, user_id, text):
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": int(time.time()),
+            "chat": {"id": user_id, "type": "private"},
+            "from": {"id": user_id, "is_bot": False, "first_name": "Тест"},
+            "text": text,
+        },
+    }
+
+
+def _callback(update_id, user_id, data):
+    return {
+        "update_id": update_id,
+        "callback_query": {
+            "id": str(update_id),
+            "chat_instance": str(user_id),
+            "from": {"id": user_id, "is_bot": False, "first_name": "Тест"},
+            "message": {"message_id": update_id, "date": 0, "chat": {"id": user_id, "type": "private"}, "text": "-"},
+            "data": data,
+        },
+    }
+
+
+def conversation(scenario, user_id, rng):
+    """Шаги диалога: пары (тип обновления, текст или данные кнопки)."""
+    steps = {
+        "profile": [
+            ("message", "/set_profile"), ("message", str(rng.randint(50, 110))), ("message", str(rng.randint(150, 200))),
+            ("message", str(rng.randint(18, 70))), ("message", rng.choice(["Мужской", "Женский"])),
+            ("message", str(rng.randint(0, 120))), ("message", rng.choice(CITIES)),
+        ],
+        "water": [("message", "/log_water"), ("message", str(rng.randint(100, 500)))],
+        "food": [
+            ("message", "/log_food"), ("message", rng.choice(PRODUCTS)),
+            ("callback", str(rng.randint(1, 5))), ("message", str(rng.randint(50, 300))),
+        ],
+        "workout": [("message", "/log_workout"), ("message", f"{rng.choice(WORKOUTS)} {rng.randint(10, 90)}")],
+        "progress": [("message", "/progress")],
+    }
+    if scenario == "full":
+        return [step for name in ("profile", "water", "food", "workout", "progress") for step in steps[name]]
+    return steps[scenario]
+
+
+def seed_profiles(storage, users, rng):
+    """Создаёт профили пользователей без прохождения диалога."""
+    storage.save_users({
+        str(user_id): {
+            "weight": 80.0, "height": 180.0, "age": 30, "gender": "male", "activity": 30,
+            "city": rng.choice(CITIES), "timezone": 10800, "water_norm": 2500.0, "calories_norm": 2400.0,
+            "water_logged": 0, "calories_logged": 0, "burned_calories": 0,
+        }
+        for user_id in users
+    })
+
+
+async def run_scenario(scenario, users, concurrency):
+    """Прогоняет сценарий в текущем процессе и возвращает результаты замера."""
+    from aiogram import Bot
+
+    import bot as bot_module
+    from utils.http import close_session
+    from utils.render_pool import render_pool
+    from utils.storage import storage
+
+    rng = random.Random(0)
+    user_ids = range(1_000_000, 1_000_000 + users)
+    if scenario not in ("profile", "full"):
+        seed_profiles(storage, user_ids, rng)
+        storage.flush()
+
+    session = create_fake_session()
+    bot = Bot(token="123456:load-test", session=session)
+    dp = bot_module.create_dispatcher()
+    await render_pool.start()
+
+    update_ids = itertools.count(1)
+    latencies = []
+    pending = iter(user_ids)
+
+    async def client():
+        for user_id in pending:
+            for kind, text in conversation(scenario, user_id, rng):
+                update_id = next(update_ids)
+                update = _message(update_id, user_id, text) if kind == "message" else _callback(update_id, user_id, text)
+                started = time.perf_counter()
+                await dp.feed_raw_update(bot, update)
+                latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    storage.close()
+    render_pool.shutdown()
+    await dp.storage.close()
+    await close_session()
+
+    latencies.sort()
+    return {
+        "scenario": scenario,
+        "users": users,
+        "updates": len(latencies),
+        "seconds": round(elapsed, 2),
+        "updates_per_sec": round(len(latencies) / elapsed),
+        "p50_ms": round(statistics.median(latencies) * 1000, 2),
+        "p99_ms": round(latencies[int(0.99 * (len(latencies) - 1))] * 1000, 2),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "telegram_calls": sum(session.calls.values()),
+    }
+
+
+def run_child(args):
+    """Настраивает окружение и запускает один сценарий в этом процессе."""
+    data_dir = tempfile.mkdtemp(prefix="bot-load-")
+    base_url = f"http://127.0.0.1:{args.stub_port}"
+    os.environ.update({
+        "STORAGE_DB": os.path.join(data_dir, "storage.db"),
+        "FSM_DB": os.path.join(data_dir, "fsm.db"),
+        "FOOD_CACHE_DB": os.path.join(data_dir, "food_cache.db"),
+        "CATALOG_DB": os.path.join(data_dir, "catalog.db"),
+        "WEATHER_CACHE_FILE": os.path.join(data_dir, "weather_cache.json"),
+        "HISTORY_DIR": os.path.join(data_dir, "history"),
+        "HISTORY_DB": os.path.join(data_dir, "history.db"),
+        "API_KEY": "load-test",
+        "WEATHER_API_URL": f"{base_url}/weather",
+        "FOOD_API_URL": f"{base_url}/food",
+    })
+    result = asyncio.run(run_scenario(args.scenario, args.users, args.concurrency))
+    print(json.dumps(result))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=1000, help="количество пользователей в сценарии")
+    parser.add_argument("--concurrency", type=int, default=100, help="сколько пользователей ведут диалог одновременно")
+    parser.add_argument("--scenario", choices=SCENARIOS, action="append", help="сценарий (можно несколько), по умолчанию все")
+    parser.add_argument("--api-latency", type=float, default=0, help="задержка ответа заглушки API, мс")
+    parser.add_argument("--stub-port", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--serve-stub", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve_stub:
+        serve_stub(args.api_latency)
+        return
+    if args.stub_port:
+        args.scenario = args.scenario[0]
+        run_child(args)
+        return
+
+    stub = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.load_test", "--serve-stub", "--api-latency", str(args.api_latency)],
+        stdout=subprocess.PIPE, text=True,
+    )
+    try:
+        stub_port = int(stub.stdout.readline())
+        print(f"{'сценарий':<10}{'польз.':>8}{'обновл.':>9}{'обновл./с':>11}{'p50, мс':>9}{'p99, мс':>9}{'RSS, МБ':>9}{'вызовов Telegram':>18}")
+        for scenario in args.scenario or SCENARIOS:
+            output = subprocess.run(
+                [sys.executable, "-m", "benchmarks.load_test", "--scenario", scenario, "--users", str(args.users),
+                 "--concurrency", str(args.concurrency), "--stub-port", str(stub_port)],
+                check=True, capture_output=True, text=True,
+            ).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            print(
+                f"{scenario:<10}{result['users']:>8}{result['updates']:>9}{result['updates_per_sec']:>11}"
+                f"{result['p50_ms']:>9}{result['p99_ms']:>9}{result['peak_rss_mb']:>9}{result['telegram_calls']:>18}"
+            )
+    finally:
+        stub.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,50 +1,89 @@
-import json
-from pathlib import Path
-from aiohttp import web
 import asyncio
+import contextlib
 import logging
-from aiogram import Bot, Dispatcher
-import aiocron  # Асинхронная библиотека для задач
-
-from config import BOT_TOKEN
-from handlers import commands, profile, water, food, workout, progress
-from utils.helpers import load_data, save_data, update_daily_goals
-
-# Создаем экземпляр бота
-bot = Bot(token=BOT_TOKEN)
-dp = Dispatcher()
-
-# Включаем логирование, чтобы не пропустить важные сообщения
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-    handlers=[
-        logging.FileHandler("bot.log"),
-        logging.StreamHandler()
-    ]
-)
+import sys
+
+from config import BOT_TOKEN, LEGACY_STORAGE_FILE, DAILY_UPDATE_CRON, STARTUP_BUDGET_MS
+from config import BOT_MODE, BOT_WORKERS, WEBHOOK_HOST, WEBHOOK_PORT, WEBHOOK_PATH, WEBHOOK_SECRET, WEBHOOK_URL
+from config import METRICS_PATH, METRICS_PORT
+from utils.startup import process_uptime_ms, check_budget, profile_imports, run_probe
+
+# Код, который выполняется до первого опроса Telegram: по нему меряем старт
+STARTUP_PROBE = "import bot; bot.create_dispatcher(); from utils.startup import process_uptime_ms; print(process_uptime_ms())"
+
+
+def setup_logging():
+    """Включаем логирование, чтобы не пропустить важные сообщения."""
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(levelname)s - %(message)s",
+        handlers=[
+            logging.FileHandler("bot.log"),
+            logging.StreamHandler()
+        ]
+    )
+
+
+def create_dispatcher():
+    """
+    Создаёт диспетчер и регистрирует обработчики.
+
+    Обработчики и aiogram импортируются здесь, а не на уровне модуля:
+    процессы пула отрисовки импортируют bot.py заново и не должны их загружать.
+    """
+    from aiogram import Dispatcher
+    from aiogram.fsm.storage.memory import SimpleEventIsolation
+    from handlers import commands, profile, water, food, workout, progress, history, stats
+    from utils.fsm_storage import SQLiteStorage
+    from utils.middlewares import ChatOrderMiddleware, DayRolloverMiddleware, HandlerMetricsMiddleware
+
+    # Состояния диалогов храним на диске, чтобы они переживали перезапуск.
+    # Обновления одного чата выполняются по очереди под блокировкой чата,
+    # и состояние читается уже под ней — следующий шаг диалога видит предыдущий
+    dp = Dispatcher(storage=SQLiteStorage(), events_isolation=SimpleEventIsolation())
 
-# Регистрируем обработчики
-dp.include_router(commands.router)
-dp.include_router(profile.router)
-dp.include_router(water.router)
-dp.include_router(food.router)
-dp.include_router(workout.router)
-dp.include_router(progress.router)
+    # Разные чаты обрабатываем параллельно: до FSM — учёт и лимит очереди чата,
+    # после неё (под блокировкой чата) — ограничение числа одновременных обновлений
+    chat_order = ChatOrderMiddleware()
+    dp.update.outer_middleware.unregister(dp.fsm)
+    dp.update.outer_middleware(chat_order)
+    dp.update.outer_middleware(dp.fsm)
+    dp.update.outer_middleware(chat_order.run)
 
-# Путь к файлу для хранения данных
-STORAGE_FILE = Path("data/storage.json")
+    # Смена дня у пользователя при первом обращении в новые сутки
+    dp.message.outer_middleware(DayRolloverMiddleware())
+    dp.callback_query.outer_middleware(DayRolloverMiddleware())
+
+    # Время работы каждого обработчика (срабатывает и для вложенных роутеров)
+    dp.message.middleware(HandlerMetricsMiddleware())
+    dp.callback_query.middleware(HandlerMetricsMiddleware())
+
+    # Регистрируем обработчики
+    dp.include_router(commands.router)
+    dp.include_router(profile.router)
+    dp.include_router(water.router)
+    dp.include_router(food.router)
+    dp.include_router(workout.router)
+    dp.include_router(progress.router)
+    dp.include_router(history.router)
+    dp.include_router(stats.router)
+
+    dp.startup.register(on_startup)
+    return dp
+
+
+async def on_startup():
+    """Фиксирует время от запуска процесса до начала опроса Telegram."""
+    check_budget("Время до первого опроса", process_uptime_ms(), STARTUP_BUDGET_MS)
 
 
 async def daily_update():
-    """Запускает обновление норм для всех пользователей."""
-    all_users = load_data(STORAGE_FILE)
-    for user_id in all_users.keys():
-        user_data = all_users.get(user_id, {})
-        user_data = update_daily_goals(user_data)
-        all_users[user_id] = user_data
-        save_data(STORAGE_FILE, all_users)
-    logging.info("Ежедневное обновление норм выполнено")
+    """Сменяет день у всех пользователей, у которых он уже наступил."""
+    from utils.daily import run_daily_update
+    from utils.storage import storage
+    from utils.weather import weather_cache
+
+    await run_daily_update(storage, weather_cache)
 
 
 # Планируем задачу с помощью aiocron
@@ -52,21 +91,287 @@ async def scheduled_task():
     await daily_update()
 
 # Регистрируем задачу в текущем цикле событий
-async def register_cron_jobs():
-    """Регистрация всех задач cron в текущем asyncio-цикле."""
-    cron = aiocron.crontab("00 00 * * *", func=scheduled_task, start=False)
+async def register_cron_jobs(job=None):
+    """
+    Регистрация всех задач cron в текущем asyncio-цикле.
+
+    День у пользователей сменяется лениво при первом обращении, поэтому
+    общий проход по расписанию по умолчанию выключен (DAILY_UPDATE_CRON).
+
+    :param job: Задача по расписанию, по умолчанию смена дня в этом процессе.
+    """
+    if not DAILY_UPDATE_CRON:
+        return
+    import aiocron  # Асинхронная библиотека для задач
+
+    cron = aiocron.crontab(DAILY_UPDATE_CRON, func=job or scheduled_task, start=False)
     cron.start()
     logging.info("Задача cron успешно зарегистрирована.")
 
+
+async def start_metrics_server(port):
+    """
+    Запускает отдельный веб-сервер с метриками Prometheus.
+
+    :return: AppRunner сервера; остановка — runner.cleanup().
+    """
+    from aiohttp import web
+    from utils.metrics import metrics_handler
+
+    app = web.Application()
+    app.router.add_get(METRICS_PATH, metrics_handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, WEBHOOK_HOST, port).start()
+    logging.info(f"Метрики доступны на {WEBHOOK_HOST}:{port}{METRICS_PATH}")
+    return runner
+
+
+def create_webhook_app(bot, dp):
+    """
+    Создаёт веб-приложение aiohttp, принимающее обновления Telegram по вебхуку.
+
+    Каждое обновление обрабатывается в отдельной задаче: Telegram сразу
+    получает ответ, а обработчики разных обновлений выполняются параллельно.
+    Запросы без верного секрета (WEBHOOK_SECRET) отклоняются.
+    """
+    from aiohttp import web
+    from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+    from utils.metrics import metrics_handler
+
+    app = web.Application()
+    app.router.add_get(METRICS_PATH, metrics_handler)
+    SimpleRequestHandler(
+        dispatcher=dp,
+        bot=bot,
+        handle_in_background=True,
+        secret_token=WEBHOOK_SECRET or None,
+    ).register(app, path=WEBHOOK_PATH)
+    # Запуск и остановка диспетчера вместе с приложением
+    setup_application(app, dp, bot=bot)
+    return app
+
+
+async def run_webhook(bot, dp, allowed_updates=None):
+    """Запускает веб-сервер для вебхука и работает до отмены."""
+    from aiohttp import web
+
+    if WEBHOOK_URL:
+        await bot.set_webhook(
+            WEBHOOK_URL.rstrip("/") + WEBHOOK_PATH,
+            secret_token=WEBHOOK_SECRET or None,
+            allowed_updates=allowed_updates,
+        )
+        logging.info(f"Вебхук зарегистрирован: {WEBHOOK_URL.rstrip('/')}{WEBHOOK_PATH}")
+
+    runner = web.AppRunner(create_webhook_app(bot, dp))
+    await runner.setup()
+    try:
+        await web.TCPSite(runner, WEBHOOK_HOST, WEBHOOK_PORT).start()
+        logging.info(f"Вебхук слушает {WEBHOOK_HOST}:{WEBHOOK_PORT}{WEBHOOK_PATH}")
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
+
+
+def profile_startup():
+    """
+    Печатает разбивку времени импортов и сравнивает время старта с бюджетом.
+
+    :return: Код выхода: 0, если бюджет STARTUP_BUDGET_MS соблюдён.
+    """
+    print("Самые долгие импорты до первого опроса:")
+    print(f"{'суммарно, мс':>14}{'своё, мс':>10}  модуль")
+    for cumulative_us, self_us, name in profile_imports(STARTUP_PROBE):
+        print(f"{cumulative_us / 1000:>14.1f}{self_us / 1000:>10.1f}  {name}")
+
+    ready_ms = float(run_probe(STARTUP_PROBE).stdout.strip().splitlines()[-1])
+    within = ready_ms <= STARTUP_BUDGET_MS
+    print(f"\nВремя до первого опроса: {ready_ms:.0f} мс (бюджет {STARTUP_BUDGET_MS:.0f} мс)"
+          f" — {'в пределах бюджета' if within else 'БЮДЖЕТ ПРЕВЫШЕН'}")
+    return 0 if within else 1
+
+
+@contextlib.asynccontextmanager
+async def running_services(dp, metrics_port=None):
+    """
+    Запускает фоновые задачи бота и по выходе закрывает все хранилища и соединения.
+
+    :param metrics_port: Порт отдельного сервера метрик, если он нужен.
+    """
+    from utils.catalog import catalog
+    from utils.food_cache import food_cache
+    from utils.history import history
+    from utils.http import close_session
+    from utils.render_pool import render_pool
+    from utils.storage import storage
+    from utils.weather import weather_cache
+
+    # Прогреваем процессы для отрисовки графиков в фоне, не задерживая старт
+    warm_up = asyncio.create_task(render_pool.start())
+
+    # Периодически сбрасываем изменения пользователей и журнал истории на диск
+    flusher = asyncio.create_task(storage.run_flusher(others=(history,)))
+
+    metrics = await start_metrics_server(metrics_port) if metrics_port else None
+
+    try:
+        yield
+    finally:
+        if metrics is not None:
+            await metrics.cleanup()
+        flusher.cancel()
+        warm_up.cancel()
+        storage.close()
+        weather_cache.flush()
+        food_cache.close()
+        catalog.close()
+        history.close()
+        render_pool.shutdown()
+        await dp.storage.close()
+        await close_session()
+
+
+async def serve(bot, dp, allowed_updates=None):
+    """Получает обновления от Telegram в выбранном режиме (BOT_MODE)."""
+    if allowed_updates is None:
+        allowed_updates = dp.resolve_used_update_types()
+    if BOT_MODE == "webhook":
+        await run_webhook(bot, dp, allowed_updates)
+    else:
+        # Запускаем polling
+        await dp.start_polling(bot, allowed_updates=allowed_updates)
+
+
+def run_worker(index, workers, updates):
+    """
+    Рабочий процесс: обрабатывает обновления своей доли пользователей.
+
+    :param index: Номер процесса.
+    :param workers: Количество рабочих процессов.
+    :param updates: Очередь, из которой приходят обновления и команды координатора.
+    """
+    setup_logging()
+    asyncio.run(worker_main(index, workers, updates))
+
+
+async def worker_main(index, workers, updates):
+    from aiogram import Bot
+    from config import WEATHER_CACHE_FILE
+    from utils.daily import run_daily_update
+    from utils.shards import shard_of
+    from utils.storage import storage
+    from utils.weather import weather_cache
+
+    # Свой файл кэша погоды: иначе процессы перезаписывали бы общий файл друг за другом
+    weather_cache.path = WEATHER_CACHE_FILE.with_name(f"{WEATHER_CACHE_FILE.stem}.{index}{WEATHER_CACHE_FILE.suffix}")
+    bot = Bot(token=BOT_TOKEN)
+    dp = create_dispatcher()
+    loop = asyncio.get_running_loop()
+    tasks = set()
+    logging.info(f"Рабочий процесс {index} из {workers} запущен")
+
+    # Каждый процесс отдаёт свои метрики на своём порту
+    async with running_services(dp, METRICS_PORT and METRICS_PORT + 1 + index):
+        while True:
+            message = await loop.run_in_executor(None, updates.get)
+            if message is None:
+                break
+            kind, payload = message
+            if kind == "update":
+                task = asyncio.create_task(dp.feed_raw_update(bot, payload))
+            else:
+                # Смена дня только у пользователей этого процесса
+                task = asyncio.create_task(run_daily_update(
+                    storage, weather_cache, owns=lambda user_id: shard_of(user_id, workers) == index
+                ))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        await asyncio.gather(*tasks, return_exceptions=True)
+    await bot.session.close()
+    logging.info(f"Рабочий процесс {index} остановлен")
+
+
+async def run_supervisor(bot, workers):
+    """
+    Координатор: получает обновления и раздаёт их рабочим процессам.
+
+    Пользователь закреплён за процессом по остатку от деления ID
+    (utils.shards), поэтому записи пользователей не делятся между
+    процессами. Общее хранилище — SQLite в режиме WAL. Координатор сам
+    обновления не обрабатывает и только по расписанию просит все процессы
+    сменить день у своих пользователей.
+    """
+    import multiprocessing
+    from aiogram import Dispatcher
+    from utils.shards import ShardRouterMiddleware
+
+    context = multiprocessing.get_context("spawn")
+    queues = [context.Queue() for _ in range(workers)]
+    processes = [
+        context.Process(target=run_worker, args=(index, workers, queue), name=f"bot-worker-{index}")
+        for index, queue in enumerate(queues)
+    ]
+    for process in processes:
+        process.start()
+
+    async def broadcast_daily_update():
+        for queue in queues:
+            queue.put(("daily", None))
+
+    dp = Dispatcher()
+    dp.update.outer_middleware(ShardRouterMiddleware(queues))
+    dp.startup.register(on_startup)
+    await register_cron_jobs(broadcast_daily_update)
+
+    # Метрики координатора; рабочие процессы отдают свои на следующих портах
+    metrics = await start_metrics_server(METRICS_PORT) if METRICS_PORT and BOT_MODE != "webhook" else None
+
+    try:
+        # Типы обновлений берём у настоящего диспетчера с обработчиками
+        await serve(bot, dp, create_dispatcher().resolve_used_update_types())
+    finally:
+        if metrics is not None:
+            await metrics.cleanup()
+        for queue in queues:
+            queue.put(None)
+        loop = asyncio.get_running_loop()
+        for process in processes:
+            await loop.run_in_executor(None, process.join)
+        await bot.session.close()
+
+
 async def main():
+    from aiogram import Bot
+    from utils.storage import storage, migrate_from_json
+
+    setup_logging()
     print("Бот запущен!")
 
+    # Создаем экземпляр бота
+    bot = Bot(token=BOT_TOKEN)
+
+    # Переносим данные из старого storage.json, если он остался
+    migrated = migrate_from_json(LEGACY_STORAGE_FILE, storage)
+    if migrated:
+        logging.info(f"Перенесено пользователей из {LEGACY_STORAGE_FILE}: {migrated}")
+
+    if BOT_WORKERS > 1:
+        # Хранилище координатору больше не нужно: пользователями владеют рабочие процессы
+        storage.close()
+        await run_supervisor(bot, BOT_WORKERS)
+        return
+
+    dp = create_dispatcher()
+
     # Регистрируем cron-задачи
     await register_cron_jobs()
 
-    # Запускаем polling
-    await dp.start_polling(bot)
+    async with running_services(dp, METRICS_PORT if BOT_MODE != "webhook" else None):
+        await serve(bot, dp)
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    if "--profile-startup" in sys.argv:
+        sys.exit(profile_startup())
+    asyncio.run(main())
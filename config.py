@@ -1,7 +1,101 @@
 import os
+from pathlib import Path
 from dotenv import load_dotenv
 
 load_dotenv()
 
 BOT_TOKEN = os.getenv("BOT_TOKEN")
-WEATHER_API_KEY = os.getenv("WEATHER_API_KEY")
\ No newline at end of file
+WEATHER_API_KEY = os.getenv("WEATHER_API_KEY")
+
+# Хранилище пользователей
+STORAGE_DB = Path(os.getenv("STORAGE_DB", "data/storage.db"))
+LEGACY_STORAGE_FILE = Path("data/storage.json")
+STORAGE_CACHE_SIZE = int(os.getenv("STORAGE_CACHE_SIZE", "100000"))  # записей в памяти
+STORAGE_FLUSH_INTERVAL = float(os.getenv("STORAGE_FLUSH_INTERVAL", "5"))  # секунд между сбросами
+STORAGE_FLUSH_MAX_DIRTY = int(os.getenv("STORAGE_FLUSH_MAX_DIRTY", "1000"))  # сброс при стольких изменениях
+
+# HTTP-клиент для внешних API
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "100"))  # соединений в пуле
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "10"))  # общий таймаут запроса, сек
+HTTP_RETRIES = int(os.getenv("HTTP_RETRIES", "2"))  # повторов после первой попытки
+HTTP_BACKOFF = float(os.getenv("HTTP_BACKOFF", "0.3"))  # базовая задержка повтора, сек
+HTTP_DNS_TTL = int(os.getenv("HTTP_DNS_TTL", "300"))  # время жизни DNS-кэша, сек
+WEATHER_API_URL = os.getenv("WEATHER_API_URL", "https://api.openweathermap.org/data/2.5/weather")
+FOOD_API_URL = os.getenv("FOOD_API_URL", "https://world.openfoodfacts.org/cgi/search.pl")
+WEATHER_TIMEOUT = float(os.getenv("WEATHER_TIMEOUT", "5"))
+FOOD_TIMEOUT = float(os.getenv("FOOD_TIMEOUT", "8"))
+FOOD_PAGE_SIZE = int(os.getenv("FOOD_PAGE_SIZE", "50"))  # сколько продуктов запрашивать у OpenFoodFacts для ранжирования
+
+# Транспорт внешних API: "live", "record" (живые запросы с записью ответов) или "replay" (без сети)
+API_TRANSPORT = os.getenv("API_TRANSPORT", "live")
+API_FIXTURES = Path(os.getenv("API_FIXTURES", "data/api_fixtures.json"))  # записанные ответы
+API_LATENCY_MS = os.getenv("API_LATENCY_MS", "")  # искусственная задержка: "2000" или "food=2000,weather=50"
+API_ERROR_RATE = os.getenv("API_ERROR_RATE", "")  # доля искусственных ошибок: "0.1" или "food=0.5"
+API_FAULT_SEED = int(os.getenv("API_FAULT_SEED", "0"))
+
+# Кэш погоды
+WEATHER_CACHE_FILE = Path(os.getenv("WEATHER_CACHE_FILE", "data/weather_cache.json"))
+WEATHER_TTL = int(os.getenv("WEATHER_TTL", "3600"))  # сколько секунд температура считается свежей
+WEATHER_STALE_TTL = int(os.getenv("WEATHER_STALE_TTL", "21600"))  # сколько ещё отдаём устаревшую, обновляя в фоне
+
+# Кэш поиска продуктов
+FOOD_CACHE_DB = Path(os.getenv("FOOD_CACHE_DB", "data/food_cache.db"))
+FOOD_CACHE_SIZE = int(os.getenv("FOOD_CACHE_SIZE", "2048"))  # запросов в памяти
+FOOD_CACHE_TTL = int(os.getenv("FOOD_CACHE_TTL", str(7 * 24 * 3600)))  # время жизни найденных продуктов, сек
+FOOD_NEGATIVE_TTL = int(os.getenv("FOOD_NEGATIVE_TTL", str(24 * 3600)))  # время жизни ответа «не найдено», сек
+
+# Локальный каталог продуктов
+CATALOG_DB = Path(os.getenv("CATALOG_DB", "data/catalog.db"))
+CATALOG_MIN_SCORE = float(os.getenv("CATALOG_MIN_SCORE", "0.45"))  # минимальная схожесть для локального ответа
+FOOD_AUTO_SCORE = float(os.getenv("FOOD_AUTO_SCORE", "0.7"))  # схожесть, при которой продукт выбирается без вопроса
+
+# Реестр тренировок: MET и синонимы
+WORKOUTS_FILE = Path(os.getenv("WORKOUTS_FILE", Path(__file__).parent / "utils" / "workouts.json"))
+
+# Ежедневное обновление норм
+DAILY_FETCH_CONCURRENCY = int(os.getenv("DAILY_FETCH_CONCURRENCY", "20"))  # одновременных запросов погоды
+DAILY_UPDATE_CRON = os.getenv("DAILY_UPDATE_CRON", "")  # расписание общего прохода смены дня, по умолчанию выключен
+DEFAULT_UTC_OFFSET = int(os.getenv("DEFAULT_UTC_OFFSET", "10800"))  # часовой пояс по умолчанию, сек от UTC
+
+# Отрисовка графиков
+CHART_WORKERS = int(os.getenv("CHART_WORKERS", str(min(4, os.cpu_count() or 1))))  # процессов отрисовки на весь бот
+CHART_QUEUE_SIZE = int(os.getenv("CHART_QUEUE_SIZE", "32"))  # задач в очереди сверх числа процессов
+CHART_QUEUE_TIMEOUT = float(os.getenv("CHART_QUEUE_TIMEOUT", "5"))  # сколько ждать места в очереди, сек
+CHART_CACHE_SIZE = int(os.getenv("CHART_CACHE_SIZE", "512"))  # готовых графиков в памяти
+CHART_CACHE_FILE_ID = os.getenv("CHART_CACHE_FILE_ID", "1") == "1"  # переотправлять графики по file_id Telegram
+CHART_BACKEND = os.getenv("CHART_BACKEND", "matplotlib")  # "matplotlib" или "pillow"
+CHART_FONT = os.getenv("CHART_FONT", "DejaVuSans.ttf")  # шрифт с кириллицей для бэкенда pillow
+CHART_FONT_BOLD = os.getenv("CHART_FONT_BOLD", "DejaVuSans-Bold.ttf")
+
+# История записей: журнал по месяцам и итоги за день/неделю/месяц
+HISTORY_DIR = Path(os.getenv("HISTORY_DIR", "data/history"))
+HISTORY_DB = Path(os.getenv("HISTORY_DB", "data/history.db"))
+
+# Хранилище состояний диалогов (FSM)
+FSM_DB = Path(os.getenv("FSM_DB", "data/fsm.db"))
+FSM_TTL = int(os.getenv("FSM_TTL", str(24 * 3600)))  # через сколько секунд бездействия диалог считается брошенным
+
+# Режим получения обновлений: "polling" (для разработки) или "webhook"
+BOT_MODE = os.getenv("BOT_MODE", "polling")
+WEBHOOK_HOST = os.getenv("WEBHOOK_HOST", "0.0.0.0")  # адрес, на котором слушает веб-сервер
+WEBHOOK_PORT = int(os.getenv("WEBHOOK_PORT", os.getenv("PORT", "5000")))
+WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "/webhook")
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET", "")  # секрет из заголовка X-Telegram-Bot-Api-Secret-Token
+WEBHOOK_URL = os.getenv("WEBHOOK_URL", "")  # внешний адрес бота; если задан, вебхук регистрируется при запуске
+
+# Количество рабочих процессов: больше 1 — координатор раздаёт им обновления по ID пользователя
+BOT_WORKERS = int(os.getenv("BOT_WORKERS", "1"))
+
+# Параллельная обработка обновлений (разные чаты параллельно, один чат по очереди)
+UPDATE_CONCURRENCY = int(os.getenv("UPDATE_CONCURRENCY", "64"))  # обновлений в работе одновременно
+CHAT_QUEUE_LIMIT = int(os.getenv("CHAT_QUEUE_LIMIT", "20"))  # обновлений одного чата в очереди, лишние отбрасываются
+
+# Метрики Prometheus: в режиме вебхука отдаются веб-сервером вебхука,
+# иначе — отдельным сервером на METRICS_PORT (0 — не запускать)
+METRICS_PATH = os.getenv("METRICS_PATH", "/metrics")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+
+# Бюджет времени запуска: от старта процесса до первого опроса Telegram, мс.
+# Нижняя граница — импорт самого aiogram (в основном aiogram.methods), его
+# ленивые импорты не сокращают: 2,4–2,8 с на одном ядре; модули бота добавляют ~0,3 с
+STARTUP_BUDGET_MS = float(os.getenv("STARTUP_BUDGET_MS", "4000"))
\ No newline at end of file
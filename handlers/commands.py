@@ -9,7 +9,8 @@ keyboard = ReplyKeyboardMarkup(
     keyboard=[
         [KeyboardButton(text="/set_profile"), KeyboardButton(text="/log_water")],
         [KeyboardButton(text="/log_food"), KeyboardButton(text="/log_workout")],
-        [KeyboardButton(text="/progress"), KeyboardButton(text="/help")]
+        [KeyboardButton(text="/progress"), KeyboardButton(text="/history")],
+        [KeyboardButton(text="/stats"), KeyboardButton(text="/help")]
     ],
     resize_keyboard=True  # Клавиатура адаптируется под экран устройства
 )
@@ -34,8 +35,10 @@ async def help_command(message: Message):
         "Доступные команды:\n"
         "/set_profile - Настройка профиля\n"
         "/log_water - Логировать воду\n"
-        "/log_food - Логировать еду\n"
-        "/log_workout - Логировать тренировку\n"
-        "/progress - Проверить прогресс",
+        "/log_food - Логировать еду (можно списком: /log_food 150г гречка, 1 банан)\n"
+        "/log_workout - Логировать тренировку (можно несколько: /log_workout бег 30, йога 20)\n"
+        "/progress - Проверить прогресс\n"
+        "/history - Итоги за день, неделю и месяц\n"
+        "/stats - Тренды за 7, 30 и 90 дней",
         reply_markup=keyboard
     )
\ No newline at end of file
@@ -1,17 +1,14 @@
-import json
-from pathlib import Path
 from aiogram import Router, F
 from aiogram.types import Message, CallbackQuery
-from aiogram.filters import Command
+from aiogram.filters import Command, CommandObject
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 
-from utils.api import get_food
-from utils.helpers import load_data, save_data
-
-# Путь к файлу для хранения данных
-STORAGE_FILE = Path("data/storage.json")
+from utils.catalog import find_food
+from utils.history import history, FOOD
+from utils.meal import food_options, parse_meal, resolve_meal
+from utils.storage import storage
 
 # Создаем роутер
 router = Router()
@@ -24,43 +21,132 @@ class FoodLogStates(StatesGroup):
     waiting_for_quantity = State()
 
 
+def log_calories(user_id, calories):
+    """
+    Добавляет калории продуктов к дневному счётчику одной записью.
+
+    :param user_id: Идентификатор пользователя.
+    :param calories: Калорийность каждого продукта, ккал.
+    :return: Данные пользователя после записи.
+    """
+    user_data = storage.get_user(user_id) or {}
+    total_logged_calories = user_data.get("calories_logged", 0)
+    user_data = storage.update_user(user_id, {"calories_logged": total_logged_calories + sum(calories)})
+    for amount in calories:
+        history.record(user_id, FOOD, amount, user_data)
+    return user_data
+
+
+def day_total(user_data):
+    """Строка с количеством калорий за день."""
+    return (
+        f"Общее количество калорий за день: "
+        f"{user_data['calories_logged']:.0f} / {user_data.get('calories_norm', 0):.0f} ккал."
+    )
+
+
+async def ask_choice(message: Message, state: FSMContext, title, options):
+    """
+    Показывает найденные продукты кнопками и ждёт выбора.
+
+    :param title: Текст над списком продуктов.
+    :param options: Продукты (utils.meal.food_options).
+    """
+    await state.update_data(food_options=options)
+
+    # Формируем список выбора
+    keyboard = InlineKeyboardBuilder()
+    for idx, product in enumerate(options, 1):
+        keyboard.button(text=f"{idx}. {product['name']}", callback_data=str(idx))
+    keyboard.adjust(1)
+
+    await message.answer(f"{title}\nВыберите номер продукта:", reply_markup=keyboard.as_markup())
+    await state.set_state(FoodLogStates.waiting_for_choice)
+
+
+async def ask_next_item(message: Message, state: FSMContext):
+    """
+    Переходит к следующему продукту из сообщения, который не удалось выбрать автоматически.
+
+    Если таких не осталось, диалог завершается.
+    """
+    data = await state.get_data()
+    pending_items = data.get("pending_items", [])
+    if not pending_items:
+        await state.clear()
+        return
+
+    item = pending_items.pop(0)
+    await state.update_data(pending_items=pending_items, item_grams=item["grams"])
+    await ask_choice(message, state, f"Уточните продукт «{item['name']}»:\n{item['message']}", item["options"])
+
+
 @router.message(Command("log_food"))
-async def start_food_logging(message: Message, state: FSMContext):
+async def start_food_logging(message: Message, state: FSMContext, command: CommandObject):
     """
     Обработчик команды /log_food.
     Начало логирования еды.
+
+    Со списком продуктов (/log_food 150г гречка, 200г курица, 1 банан)
+    записывает их сразу; пошагово уточняются только неоднозначные продукты.
     """
+    await state.clear()
+    if command.args:
+        await log_meal(message, state, command.args)
+        return
+
     await message.answer("Введите название продукта:")
     await state.set_state(FoodLogStates.waiting_for_product)
 
 
+async def log_meal(message: Message, state: FSMContext, text):
+    """
+    Записывает несколько продуктов из одного сообщения.
+
+    Все продукты ищутся одновременно. Уверенно найденные продукты с
+    известным весом записываются одной записью, по остальным пользователь
+    выбирает продукт и вводит граммы, как при пошаговом вводе.
+    """
+    items = parse_meal(text)
+    if not items:
+        await message.answer("Перечислите продукты через запятую, например: /log_food 150г гречка, 200г курица, 1 банан")
+        return
+
+    resolved, ambiguous, missing = await resolve_meal(items)
+
+    lines = []
+    if resolved:
+        user_data = log_calories(str(message.from_user.id), [item["calories"] for item in resolved])
+        lines.append("Записано:")
+        lines.extend(
+            f"{item['product']['name']} — {item['grams']:g} г, {item['calories']:.2f} ккал" for item in resolved
+        )
+        lines.append(f"\n{day_total(user_data)}")
+    for item in missing:
+        lines.append(f"«{item['name']}»: {item['error']}")
+    if ambiguous:
+        lines.append(f"Нужно уточнить продуктов: {len(ambiguous)}.")
+    await message.answer("\n".join(lines))
+
+    await state.update_data(pending_items=ambiguous)
+    await ask_next_item(message, state)
+
+
 @router.message(FoodLogStates.waiting_for_product)
 async def process_product_name(message: Message, state: FSMContext):
     """
     Обработка названия продукта.
     """
     product_name = message.text.strip()
-    food_data = get_food(product_name)
+    food_data = await find_food(product_name)
 
     if food_data["status"] != 200:
         await message.answer(food_data.get("error", "Ошибка при поиске продукта."))
         await state.clear()
         return
 
-    # Сохраняем найденные продукты в состоянии
-    await state.update_data(food_options=food_data["temp"])
-
-    # Формируем список выбора
-    keyboard = InlineKeyboardBuilder()
-    for idx, product in enumerate(food_data["temp"], 1):
-        keyboard.button(text=f"{idx}. {product['product_name']}", callback_data=str(idx))
-    keyboard.adjust(1)
-
-    await message.answer(
-        f"Найденные продукты:\n{food_data['message']}\nВыберите номер продукта:",
-        reply_markup=keyboard.as_markup()
-    )
-    await state.set_state(FoodLogStates.waiting_for_choice)
+    # Сохраняем в состоянии только название и калорийность найденных продуктов
+    await ask_choice(message, state, f"Найденные продукты:\n{food_data['message']}", food_options(food_data))
 
 
 @router.callback_query(FoodLogStates.waiting_for_choice)
@@ -80,8 +166,22 @@ async def process_product_choice(callback: CallbackQuery, state: FSMContext):
     selected_product = food_options[int(choice) - 1]
     await state.update_data(selected_product=selected_product)
 
+    # Вес продукта уже указан в сообщении со списком продуктов
+    quantity = data.get("item_grams")
+    if quantity is not None:
+        total_calories = (selected_product['kcal'] / 100) * quantity
+        user_data = log_calories(str(callback.from_user.id), [total_calories])
+        await callback.message.answer(
+            f"Продукт: {selected_product['name']}\n"
+            f"Количество: {quantity:g} г\n"
+            f"Калорийность: {total_calories:.2f} ккал\n\n"
+            f"{day_total(user_data)}"
+        )
+        await ask_next_item(callback.message, state)
+        return
+
     await callback.message.answer(
-        f"Вы выбрали: {selected_product['product_name']}. Введите количество в граммах:"
+        f"Вы выбрали: {selected_product['name']}. Введите количество в граммах:"
     )
     await state.set_state(FoodLogStates.waiting_for_quantity)
 
@@ -98,24 +198,19 @@ async def process_quantity(message: Message, state: FSMContext):
 
         data = await state.get_data()
         selected_product = data.get("selected_product", {})
-        calories_per_100g = selected_product['nutriments']['energy-kcal_100g']
+        calories_per_100g = selected_product['kcal']
         total_calories = (calories_per_100g / 100) * quantity
 
         # Сохраняем результат в общий счётчик калорий
-        user_id = str(message.from_user.id)
-        all_users = load_data(STORAGE_FILE)
-        user_data = all_users.get(user_id, {})
-        total_logged_calories = user_data.get("calories_logged", 0)
-        user_data["calories_logged"] = total_logged_calories + total_calories
-        all_users[user_id] = user_data
-        save_data(STORAGE_FILE, all_users)
+        user_data = log_calories(str(message.from_user.id), [total_calories])
 
         await message.answer(
-            f"Продукт: {selected_product['product_name']}\n"
+            f"Продукт: {selected_product['name']}\n"
             f"Количество: {quantity} г\n"
             f"Калорийность: {total_calories:.2f} ккал\n\n"
-            f"Общее количество калорий за день: {user_data['calories_logged']:.0f} / {user_data['calories_norm']:.0f} ккал."
+            f"{day_total(user_data)}"
         )
-        await state.clear()
+        # Следующий неоднозначный продукт из списка, если он есть
+        await ask_next_item(message, state)
     except ValueError:
         await message.answer("Введите корректное количество (число больше нуля).")
\ No newline at end of file
@@ -0,0 +1,50 @@
+from datetime import date
+
+from aiogram import Router
+from aiogram.types import Message
+from aiogram.filters import Command
+
+from utils.daily import local_day
+from utils.history import history
+from utils.storage import storage
+
+# Создаем роутер
+router = Router()
+
+
+def format_totals(title, totals):
+    """
+    Формирует блок итогов за период.
+
+    :param title: Название периода.
+    :param totals: Итоги из HistoryLog.totals либо None.
+    :return: Текст блока.
+    """
+    if totals is None:
+        return f"{title}: записей нет"
+    return (
+        f"{title}:\n"
+        f"Вода: {totals['water']:.0f} мл\n"
+        f"Калории: {totals['calories']:.0f} ккал\n"
+        f"Сожжено: {totals['burned']:.0f} ккал"
+    )
+
+
+@router.message(Command("history"))
+async def show_history(message: Message):
+    """
+    Обработчик команды /history.
+    Показывает итоги пользователя за сегодня, неделю и месяц.
+    """
+    user_id = str(message.from_user.id)
+    user_data = storage.get_user(user_id) or {}
+    totals = history.totals(user_id, date.fromisoformat(local_day(user_data)))
+
+    await message.answer(
+        "Ваша история:\n\n"
+        + "\n\n".join((
+            format_totals("Сегодня", totals["day"]),
+            format_totals("Эта неделя", totals["week"]),
+            format_totals("Этот месяц", totals["month"]),
+        ))
+    )
@@ -1,5 +1,3 @@
-import json
-from pathlib import Path
 from aiogram import Router
 from aiogram.types import Message
 from aiogram.filters import Command
@@ -7,12 +5,9 @@ from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 from aiogram.types import ReplyKeyboardMarkup, KeyboardButton
 
-from utils.api import get_temp
 from utils.calculations import calculate_water_norm, calculate_calories_norm
-from utils.helpers import load_data, save_data
-
-# Путь к файлу для хранения данных
-STORAGE_FILE = Path("data/storage.json")
+from utils.storage import storage
+from utils.weather import weather_cache
 
 # Создаем роутер
 router = Router()
@@ -124,7 +119,7 @@ async def process_activity(message: Message, state: FSMContext):
 @router.message(ProfileState.city)
 async def process_city(message: Message, state: FSMContext):
     city = message.text.strip()
-    weather_response = get_temp(city)
+    weather_response = await weather_cache.get_temp(city)
 
     # Проверяем статус ответа
     if weather_response["status"] != 200:
@@ -141,9 +136,6 @@ async def process_city(message: Message, state: FSMContext):
     # Получаем данные из FSM
     data = await state.get_data()
 
-    # Загружаем существующие данные из файла
-    all_users = load_data(STORAGE_FILE)
-
     # Рассчитываем дневную норму воды
     water_norm = calculate_water_norm(
         weight=data["weight"],
@@ -171,18 +163,15 @@ async def process_city(message: Message, state: FSMContext):
         "gender": data["gender"],
         "activity": data["activity"],
         "city": data["city"],
+        "city_id": weather_response["city_id"],
+        "timezone": weather_response["timezone"],
         "water_norm": water_norm,
+        "workout_water": 0,
         "calories_norm": calories_norm
     }
 
     # Обновляем только указанные поля для пользователя
-    if str(message.from_user.id) not in all_users:
-        all_users[str(message.from_user.id)] = {}
-
-    all_users[str(message.from_user.id)].update(updated_fields)
-
-    # Сохраняем данные в файл
-    save_data(STORAGE_FILE, all_users)
+    storage.update_user(str(message.from_user.id), updated_fields)
 
     # Завершаем FSM
     await state.clear()
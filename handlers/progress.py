@@ -1,24 +1,14 @@
-import json
-from pathlib import Path
 from aiogram import Router
-from aiogram.types import Message, FSInputFile
+from aiogram.types import Message, BufferedInputFile
 from aiogram.filters import Command
 
-from utils.helpers import create_combined_progress_chart
-
-# Путь к файлу для хранения данных
-STORAGE_FILE = Path("data/storage.json")
+from utils.charts import chart_cache
+from utils.render_pool import RenderQueueFull
+from utils.storage import storage
 
 # Создаем роутер
 router = Router()
 
-def load_data():
-    """Загрузка данных из файла JSON."""
-    if STORAGE_FILE.exists():
-        with open(STORAGE_FILE, "r", encoding="utf-8") as file:
-            return json.load(file)
-    return {}
-
 @router.message(Command("progress"))
 async def show_progress(message: Message):
     """
@@ -27,15 +17,13 @@ async def show_progress(message: Message):
     """
     user_id = str(message.from_user.id)
 
-    # Загружаем данные
-    all_users = load_data()
+    # Загружаем данные пользователя
+    user_data = storage.get_user(user_id)
 
-    if user_id not in all_users:
+    if user_data is None:
         await message.answer("Ваш профиль не найден. Сначала настройте его с помощью команды /set_profile.")
         return
 
-    # Получаем данные пользователя
-    user_data = all_users[user_id]
     water_norm = user_data.get("water_norm", 0)
     calories_norm = user_data.get("calories_norm", 0)
     water_logged = user_data.get("water_logged", 0)
@@ -58,8 +46,18 @@ async def show_progress(message: Message):
     )
 
     # Создаём и отправляем диаграмму
-    chart_path = Path(f"data/progress_{str(message.from_user.id)}.png")
-    create_combined_progress_chart(water_logged, water_norm, calories_logged, calories_norm, chart_path)
-
     await message.answer(progress_message)
-    await message.answer_photo(FSInputFile(chart_path))
\ No newline at end of file
+
+    chart_key = chart_cache.key(water_logged, water_norm, calories_logged, calories_norm)
+    file_id = chart_cache.get_file_id(chart_key)
+    if file_id is not None:
+        await message.answer_photo(file_id)
+        return
+
+    try:
+        image = await chart_cache.render(chart_key)
+    except RenderQueueFull:
+        await message.answer("График сейчас недоступен, попробуйте позже.")
+        return
+    sent = await message.answer_photo(BufferedInputFile(image, filename="progress.png"))
+    chart_cache.remember_file_id(chart_key, sent.photo[-1].file_id)
\ No newline at end of file
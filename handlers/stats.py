@@ -0,0 +1,78 @@
+from datetime import date
+
+from aiogram import Router
+from aiogram.types import Message, BufferedInputFile
+from aiogram.filters import Command
+
+from utils.daily import local_day
+from utils.history import history
+from utils.render_pool import render_pool, RenderQueueFull
+from utils.storage import storage
+
+# Создаем роутер
+router = Router()
+
+# Сколько последних дней показывать на графике трендов
+CHART_DAYS = 30
+
+
+def format_period(days, stats):
+    """
+    Формирует блок статистики за период.
+
+    :param days: Длина периода в днях.
+    :param stats: Показатели периода из utils.stats.summarize.
+    :return: Текст блока.
+    """
+    return (
+        f"За {days} дней (дней с записями: {stats['active_days']}):\n"
+        f"Вода в среднем: {stats['water_avg']:.0f} мл/день\n"
+        f"Калории в среднем: {stats['calories_avg']:.0f} ккал/день, сожжено {stats['burned_avg']:.0f} ккал/день\n"
+        f"Чистый баланс: {stats['net_total']:.0f} ккал ({stats['net_avg']:.0f} ккал/день)\n"
+        f"Норма воды подряд: {stats['water_streak']} дн. (рекорд {stats['water_best_streak']})\n"
+        f"Норма калорий подряд: {stats['calories_streak']} дн. (рекорд {stats['calories_best_streak']})"
+    )
+
+
+@router.message(Command("stats"))
+async def show_stats(message: Message):
+    """
+    Обработчик команды /stats.
+    Показывает тренды пользователя за 7, 30 и 90 дней и график за последний месяц.
+    """
+    user_id = str(message.from_user.id)
+    user_data = storage.get_user(user_id)
+    if user_data is None:
+        await message.answer("Ваш профиль не найден. Сначала настройте его с помощью команды /set_profile.")
+        return
+
+    # utils.stats тянет numpy, поэтому импортируется при первом /stats, а не на старте
+    from utils.stats import PERIODS, rolling_mean, summarize, user_series
+
+    today = date.fromisoformat(local_day(user_data))
+    series = user_series(
+        history, user_id, today, norms=(user_data.get("water_norm", 0), user_data.get("calories_norm", 0))
+    )
+    summary = summarize(series.water, series.calories, series.burned, series.water_norm, series.calories_norm)
+
+    await message.answer(
+        "Ваша статистика:\n\n" + "\n\n".join(format_period(days, summary[days]) for days in PERIODS)
+    )
+
+    # График за последний месяц; средние считаем по всему ряду, чтобы начало графика было точным
+    net = series.calories - series.burned
+    last = slice(-CHART_DAYS, None)
+    try:
+        image = await render_pool.render_trend_chart(
+            [day.strftime("%d.%m") for day in series.days[last]],
+            series.water[last].tolist(),
+            rolling_mean(series.water)[last].tolist(),
+            series.water_norm[last].tolist(),
+            net[last].tolist(),
+            rolling_mean(net)[last].tolist(),
+            series.calories_norm[last].tolist(),
+        )
+    except RenderQueueFull:
+        await message.answer("График сейчас недоступен, попробуйте позже.")
+        return
+    await message.answer_photo(BufferedInputFile(image, filename="trends.png"))
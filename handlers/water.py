@@ -1,15 +1,11 @@
-import json
-from pathlib import Path
 from aiogram import Router
 from aiogram.types import Message
 from aiogram.filters import Command
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 
-from utils.helpers import load_data, save_data
-
-# Путь к файлу для хранения данных
-STORAGE_FILE = Path("data/storage.json")
+from utils.history import history, WATER
+from utils.storage import storage
 
 # Создаем роутер
 router = Router()
@@ -35,11 +31,9 @@ async def add_water(message: Message, state: FSMContext):
     Обработка введённого количества воды.
     """
     user_id = str(message.from_user.id)
-    all_users = load_data(STORAGE_FILE)
 
     # Если пользователь не существует, создаём запись
-    if user_id not in all_users:
-        all_users[user_id] = {"water_logged": 0}
+    user_data = storage.get_user(user_id) or {"water_logged": 0}
 
     try:
         water_amount = int(message.text)
@@ -48,10 +42,10 @@ async def add_water(message: Message, state: FSMContext):
             return
 
         # Обновляем лог воды
-        all_users[user_id]["water_logged"] = all_users[user_id].get("water_logged", 0) + water_amount
-        save_data(STORAGE_FILE, all_users)
+        total_water = user_data.get("water_logged", 0) + water_amount
+        user_data = storage.update_user(user_id, {"water_logged": total_water})
+        history.record(user_id, WATER, water_amount, user_data)
 
-        total_water = all_users[user_id]["water_logged"]
         await message.answer(f"Вы добавили {water_amount} мл воды. Всего сегодня: {total_water} мл.")
         await state.clear()  # Сбрасываем состояние
     except ValueError:
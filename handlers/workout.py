@@ -1,18 +1,15 @@
 # Логирование тренировок
-import json
-from pathlib import Path
 from aiogram import Router, F
 from aiogram.types import Message, CallbackQuery
-from aiogram.filters import Command
+from aiogram.filters import Command, CommandObject
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 
 from utils.calculations import calculate_workout
-from utils.helpers import load_data, save_data
-
-# Путь к файлу для хранения данных
-STORAGE_FILE = Path("data/storage.json")
+from utils.history import history, WORKOUT
+from utils.storage import storage
+from utils.workouts import workouts
 
 # Создаем роутер
 router = Router()
@@ -25,58 +22,78 @@ class WorkoutLogStates(StatesGroup):
 
 
 @router.message(Command("log_workout"))
-async def start_workout_logging(message: Message, state: FSMContext):
+async def start_workout_logging(message: Message, state: FSMContext, command: CommandObject):
     """
     Обработчик команды /log_workout.
     Начало логирования тренировки.
+
+    Тренировки можно указать сразу: /log_workout бег 30, йога 20.
     """
-    await message.answer("Введите тип и длительность тренировки:")
+    if command.args:
+        await log_workouts(message, state, command.args)
+        return
+
+    await message.answer("Введите тип и длительность тренировки (можно несколько через запятую):")
     await state.set_state(WorkoutLogStates.type_training)
 
 
 @router.message(WorkoutLogStates.type_training)
-async def process_product_name(message: Message, state: FSMContext):
+async def process_workout(message: Message, state: FSMContext):
     """
-    Обработка названия продукта.
+    Обработка типа и длительности тренировки.
     """
-    try:
-        # Парсим сообщение
-        workout_type, duration = message.text.split()
-        duration = int(duration)
-
-        if duration <= 0:
-            raise ValueError("Длительность должна быть больше 0.")
-
-        # Рассчитываем калории и воду
-        calories, additional_water = calculate_workout(workout_type, duration)
+    await log_workouts(message, state, message.text or "")
 
-        # Загружаем данные пользователя
-        user_id = str(message.from_user.id)
-        all_users = load_data(STORAGE_FILE)
-        user_data = all_users.get(user_id, {})
 
-        # Обновляем общее количество сожженых калорий
-        burned_calories = user_data.get("burned_calories", 0) + calories
-        user_data["burned_calories"] = burned_calories
-
-        # Обновляем норму воды
-        water_norm = user_data.get("water_norm", 0) + additional_water
-        user_data["water_norm"] = water_norm
-
-        # Сохраняем данные
-        all_users[user_id] = user_data
-        save_data(STORAGE_FILE, all_users)
+async def log_workouts(message: Message, state: FSMContext, text):
+    """
+    Записывает одну или несколько тренировок из сообщения одной записью.
 
-        # Ответ пользователю
+    Если часть тренировок не распознана, ничего не записывается и
+    пользователь может исправить сообщение.
+    """
+    entries, unknown = workouts.parse(text)
+    if unknown or not entries:
+        details = f"Не удалось распознать: {', '.join(unknown)}\n" if unknown else ""
         await message.answer(
-            f"🏋️‍♂️ Тренировка: {workout_type.capitalize()} ({duration} мин)\n"
-            f"Сожжено: {calories:.0f} ккал\n"
-            f"Дополнительно выпейте воды: {additional_water:.0f} мл\n\n"
-            f"Общее количество сожженых калорий: {burned_calories:.0f} ккал\n"
-            f"Обновлённая норма воды: {water_norm:.0f} мл"
+            f"{details}Введите тренировки в формате: <тип тренировки> <время (мин)>, например: бег 30, йога 20"
         )
-        await state.clear()
-    except ValueError:
-        await message.answer("Укажите корректную длительность тренировки (в минутах).")
-    except Exception:
-        await message.answer("Введите команду в формате: <тип тренировки> <время (мин)>")
\ No newline at end of file
+        await state.set_state(WorkoutLogStates.type_training)
+        return
+
+    # Загружаем данные пользователя
+    user_id = str(message.from_user.id)
+    user_data = storage.get_user(user_id) or {}
+
+    # Рассчитываем калории и воду по каждой тренировке
+    results = [
+        (workout, duration, *calculate_workout(workout, duration, user_data.get("weight")))
+        for workout, duration in entries
+    ]
+    calories = sum(result[2] for result in results)
+    additional_water = sum(result[3] for result in results)
+
+    # Обновляем сожжённые калории и норму воды и сохраняем одной записью
+    burned_calories = user_data.get("burned_calories", 0) + calories
+    water_norm = user_data.get("water_norm", 0) + additional_water
+    # Прибавку к норме воды храним отдельно: при смене дня она вычитается из нормы
+    workout_water = user_data.get("workout_water", 0) + additional_water
+    user_data = storage.update_user(
+        user_id, {"burned_calories": burned_calories, "water_norm": water_norm, "workout_water": workout_water}
+    )
+    for _, _, workout_calories, _ in results:
+        history.record(user_id, WORKOUT, workout_calories, user_data)
+
+    # Ответ пользователю
+    lines = [
+        f"🏋️‍♂️ Тренировка: {workout['name'].capitalize()} ({duration:g} мин)\n"
+        f"Сожжено: {workout_calories:.0f} ккал\n"
+        f"Дополнительно выпейте воды: {extra_water:.0f} мл"
+        for workout, duration, workout_calories, extra_water in results
+    ]
+    await message.answer(
+        "\n\n".join(lines) + "\n\n"
+        f"Общее количество сожженых калорий: {burned_calories:.0f} ккал\n"
+        f"Обновлённая норма воды: {water_norm:.0f} мл"
+    )
+    await state.clear()
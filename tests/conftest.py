@@ -0,0 +1,82 @@
+"""
+Общие настройки тестов: временные базы и поддельный Telegram.
+
+Переменные окружения задаются до импорта модулей бота: config читает их
+при импорте. Запросы к Telegram перехватывает поддельная сессия бота из
+benchmarks.load_test.
+"""
+import asyncio
+import os
+import tempfile
+
+import pytest
+
+DATA_DIR = tempfile.mkdtemp(prefix="bot-tests-")
+WEBHOOK_SECRET = "test-webhook-secret"
+os.environ.update({
+    "STORAGE_DB": os.path.join(DATA_DIR, "storage.db"),
+    "FSM_DB": os.path.join(DATA_DIR, "fsm.db"),
+    "FOOD_CACHE_DB": os.path.join(DATA_DIR, "food_cache.db"),
+    "CATALOG_DB": os.path.join(DATA_DIR, "catalog.db"),
+    "WEATHER_CACHE_FILE": os.path.join(DATA_DIR, "weather_cache.json"),
+    "HISTORY_DIR": os.path.join(DATA_DIR, "history"),
+    "HISTORY_DB": os.path.join(DATA_DIR, "history.db"),
+    "WEBHOOK_SECRET": WEBHOOK_SECRET,
+    "WEBHOOK_PATH": "/webhook",
+})
+
+# Задержка ответа поддельного Telegram, сек: пока обработчик ждёт ответа,
+# успевают прийти следующие обновления
+TELEGRAM_LATENCY = 0.02
+
+
+async def wait_for(condition, timeout=5.0):
+    """Ждёт, пока обработка в фоне выполнит условие."""
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while not condition():
+        if loop.time() > deadline:
+            return False
+        await asyncio.sleep(0.01)
+    return True
+
+
+@pytest.fixture
+def session():
+    """Поддельная сессия бота, отвечающая с задержкой TELEGRAM_LATENCY."""
+    from benchmarks.load_test import create_fake_session
+
+    session = create_fake_session()
+    make_request = session.make_request
+
+    async def slow_request(bot, method, timeout=None):
+        await asyncio.sleep(TELEGRAM_LATENCY)
+        return await make_request(bot, method, timeout)
+
+    session.make_request = slow_request
+    return session
+
+
+@pytest.fixture
+def bot(session):
+    from aiogram import Bot
+
+    return Bot(token="123456:test", session=session)
+
+
+@pytest.fixture(scope="session")
+def dp():
+    """
+    Диспетчер бота из bot.create_dispatcher, один на все тесты.
+
+    Роутеры обработчиков — модульные и подключаются только к одному
+    диспетчеру. Тесты пишут в разные чаты, поэтому состояния и блокировки
+    чатов у них не пересекаются.
+    """
+    import bot as bot_module
+    from utils.storage import storage
+
+    dp = bot_module.create_dispatcher()
+    yield dp
+    asyncio.run(dp.storage.close())
+    storage.close()
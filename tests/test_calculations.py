@@ -0,0 +1,82 @@
+"""
+Пакетный расчёт норм совпадает со скалярным.
+
+calculate_water_norms и calculate_calories_norms должны давать ровно те же
+значения, что calculate_water_norm и calculate_calories_norm для каждого
+профиля. Профили случайные, но с фиксированным зерном, так что любое
+расхождение воспроизводится; в сообщении об ошибке — сам профиль.
+"""
+import random
+
+import pytest
+
+from utils.calculations import (
+    calculate_calories_norm,
+    calculate_calories_norms,
+    calculate_water_norm,
+    calculate_water_norms,
+)
+
+# Температуры на границах надбавок за жару и вокруг них
+BOUNDARY_TEMPERATURES = (-20.0, 25, 25.0, 25.01, 30, 30.0, 30.5)
+
+
+def random_profile(rng):
+    """Случайный профиль: целые и дробные значения вперемешку, как в хранилище."""
+    integer = rng.random() < 0.5
+    return {
+        "weight": rng.randint(40, 150) if integer else round(rng.uniform(40, 150), 1),
+        "height": rng.randint(140, 210) if integer else round(rng.uniform(140, 210), 1),
+        "age": rng.randint(14, 90),
+        "gender": rng.choice(("male", "female")),
+        "activity": rng.randint(0, 600),
+        "temperature": rng.choice(BOUNDARY_TEMPERATURES) if rng.random() < 0.3 else rng.uniform(-40, 45),
+    }
+
+
+def near_tie(profile):
+    """Проверяет, что норма калорий до округления почти ровно посередине между сотыми."""
+    bmr = 10 * profile["weight"] + 6.25 * profile["height"] - 5 * profile["age"]
+    bmr += 5 if profile["gender"] == "male" else -161
+    calories = bmr * (1.2 + (profile["activity"] / 480) * (1.9 - 1.2))
+    return abs((calories * 100) % 1 - 0.5) < 1e-3
+
+
+def assert_batch_matches_scalar(profiles):
+    columns = {field: [profile[field] for profile in profiles] for field in profiles[0]}
+    water_norms = calculate_water_norms(columns["weight"], columns["activity"], columns["temperature"]).tolist()
+    calories_norms = calculate_calories_norms(
+        columns["weight"], columns["height"], columns["age"], columns["gender"], columns["activity"]
+    ).tolist()
+
+    for profile, water_norm, calories_norm in zip(profiles, water_norms, calories_norms):
+        expected_water = calculate_water_norm(profile["weight"], profile["activity"], profile["temperature"])
+        expected_calories = calculate_calories_norm(
+            profile["weight"], profile["height"], profile["age"], profile["gender"], profile["activity"]
+        )
+        assert water_norm == expected_water, f"вода: {water_norm} != {expected_water} для {profile}"
+        assert calories_norm == expected_calories, f"калории: {calories_norm} != {expected_calories} для {profile}"
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_random_profiles(seed):
+    rng = random.Random(seed)
+    assert_batch_matches_scalar([random_profile(rng) for _ in range(rng.randint(1, 2000))])
+
+
+def test_profiles_near_rounding_ties():
+    # Здесь округление NumPy и Python может расходиться
+    rng = random.Random(0)
+    profiles = []
+    while len(profiles) < 100:
+        profile = random_profile(rng)
+        if near_tie(profile):
+            profiles.append(profile)
+    assert_batch_matches_scalar(profiles)
+
+
+def test_unknown_gender_is_rejected():
+    with pytest.raises(ValueError):
+        calculate_calories_norm(70, 175, 30, "other", 30)
+    with pytest.raises(ValueError):
+        calculate_calories_norms([70, 80], [175, 180], [30, 40], ["male", "other"], [30, 60])
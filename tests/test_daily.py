@@ -0,0 +1,63 @@
+"""Смена дня пачкой (apply_rollovers) против смены дня по одному пользователю."""
+import copy
+import random
+from datetime import datetime, timezone
+
+from tests.test_calculations import random_profile
+from utils.daily import apply_rollover, apply_rollovers
+
+NOW = datetime(2024, 12, 31, 12, tzinfo=timezone.utc)
+
+
+def stale_user(profile):
+    """Пользователь со вчерашними счётчиками и прибавкой к норме воды за тренировку."""
+    user_data = {key: value for key, value in profile.items() if key != "temperature"}
+    user_data.update({
+        "city": "Москва",
+        "day": "2024-12-30",
+        "water_norm": 2500,
+        "calories_norm": 2200.0,
+        "water_logged": 1800,
+        "calories_logged": 1500,
+        "burned_calories": 300,
+        "workout_water": 400,
+    })
+    return user_data
+
+
+def test_batch_matches_one_by_one():
+    rng = random.Random(0)
+    users, temperatures = {}, {}
+    for user_id in range(500):
+        profile = random_profile(rng)
+        users[user_id] = stale_user(profile)
+        temperatures[user_id] = profile["temperature"] if user_id % 10 else None
+
+    expected = copy.deepcopy(users)
+    expected_updated = sum(apply_rollover(expected[user_id], temperatures[user_id], NOW) for user_id in expected)
+
+    assert apply_rollovers(users, temperatures, NOW) == expected_updated
+    assert users == expected
+
+
+def test_bad_profile_does_not_break_batch():
+    rng = random.Random(1)
+    users = {user_id: stale_user(random_profile(rng)) for user_id in range(5)}
+    users[1]["gender"] = "unknown"
+    users[2]["activity"] = "30"
+    users[3]["weight"] = None
+    temperatures = dict.fromkeys(users, 20.0)
+    expected = copy.deepcopy(users)
+
+    assert apply_rollovers(users, temperatures, NOW) == 2
+
+    for user_id in (0, 4):
+        apply_rollover(expected[user_id], 20.0, NOW)
+        assert users[user_id] == expected[user_id]
+    for user_id in (1, 2, 3):
+        # Счётчики обнулены, нормы прежние, кроме снятой прибавки за тренировку
+        assert users[user_id]["day"] == "2024-12-31"
+        assert users[user_id]["water_logged"] == 0
+        assert users[user_id]["calories_norm"] == 2200.0
+        assert users[user_id]["water_norm"] == 2100
+        assert "workout_water" not in users[user_id]
@@ -0,0 +1,66 @@
+"""
+Порядок обработки обновлений одного чата вместе с состоянием FSM.
+
+Второе обновление чата должно не только выполниться после первого, но и
+увидеть состояние, которое установил обработчик первого. Обновления
+подаются в диспетчер одновременно, с разницей в 10 мс, пока первый
+обработчик ещё ждёт.
+"""
+import asyncio
+
+from aiogram import F, Router
+from aiogram.filters import Command
+from aiogram.fsm.state import State, StatesGroup
+
+from benchmarks.load_test import _message
+
+
+class CheckStates(StatesGroup):
+    a = State()
+
+
+seen = []
+router = Router()
+
+
+@router.message(Command("order_check"))
+async def start(message, state):
+    await asyncio.sleep(0.05)
+    await state.set_state(CheckStates.a)
+    seen.append("start")
+
+
+@router.message(CheckStates.a, F.text == "hello")
+async def in_state(message, state):
+    seen.append("state a")
+    await state.clear()
+
+
+@router.message(F.text == "hello")
+async def fallback(message):
+    seen.append("no state")
+
+
+def feed_pair(dp, bot, chat_id, first, second):
+    """Подаёт два сообщения одного чата одновременно, второе — через 10 мс."""
+    async def later():
+        await asyncio.sleep(0.01)
+        await dp.feed_raw_update(bot, _message(2, chat_id, second))
+
+    async def run():
+        await asyncio.gather(dp.feed_raw_update(bot, _message(1, chat_id, first)), later())
+
+    asyncio.run(run())
+
+
+def test_second_update_sees_state_set_by_first(bot, dp):
+    dp.include_router(router)
+    feed_pair(dp, bot, 4001, "/order_check", "hello")
+    assert seen == ["start", "state a"]
+
+
+def test_water_amount_right_after_command(bot, dp):
+    from utils.storage import storage
+
+    feed_pair(dp, bot, 4002, "/log_water", "500")
+    assert (storage.get_user("4002") or {}).get("water_logged") == 500
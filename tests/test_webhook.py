@@ -0,0 +1,102 @@
+"""
+Вебхук без Telegram: подписанные обновления в bot.create_webhook_app.
+
+Веб-приложение поднимается через aiohttp.test_utils с настоящим
+диспетчером; обновления обрабатываются в фоне (handle_in_background=True),
+пока ответ Telegram задерживается.
+"""
+import asyncio
+
+from benchmarks.load_test import _message
+from tests.conftest import WEBHOOK_SECRET, wait_for
+
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+
+def run_app(bot, dp, scenario):
+    """Выполняет scenario(client) с тестовым клиентом веб-приложения вебхука."""
+    from aiohttp.test_utils import TestClient, TestServer
+
+    import bot as bot_module
+
+    async def run():
+        async with TestClient(TestServer(bot_module.create_webhook_app(bot, dp))) as client:
+            await scenario(client)
+
+    asyncio.run(run())
+
+
+def post(client, update, secret=WEBHOOK_SECRET):
+    from config import WEBHOOK_PATH
+
+    headers = {SECRET_HEADER: secret} if secret is not None else {}
+    return client.post(WEBHOOK_PATH, json=update, headers=headers)
+
+
+def water_logged(chat_id):
+    from utils.storage import storage
+
+    return (storage.get_user(str(chat_id)) or {}).get("water_logged")
+
+
+def test_rejects_missing_or_wrong_secret(bot, dp, session):
+    async def scenario(client):
+        response = await post(client, _message(1, 3001, "/help"), secret=None)
+        assert response.status == 401
+        response = await post(client, _message(2, 3001, "/help"), secret="wrong")
+        assert response.status == 401
+        await asyncio.sleep(0.1)
+
+    run_app(bot, dp, scenario)
+    assert session.calls["SendMessage"] == 0
+
+
+def test_handles_signed_update(bot, dp, session):
+    async def scenario(client):
+        response = await post(client, _message(1, 3002, "/help"))
+        assert response.status == 200
+        assert await wait_for(lambda: session.calls["SendMessage"] == 1)
+
+    run_app(bot, dp, scenario)
+
+
+def test_serves_metrics(bot, dp):
+    from config import METRICS_PATH
+
+    async def scenario(client):
+        response = await client.get(METRICS_PATH)
+        assert response.status == 200
+        assert "bot_handler_duration_seconds" in await response.text()
+
+    run_app(bot, dp, scenario)
+
+
+def test_concurrent_updates_for_many_chats(bot, dp):
+    chats = range(3100, 3110)
+
+    async def log_water(client, chat_id, amount):
+        # Telegram шлёт обновления чата одно за другим, не дожидаясь обработки
+        for update_id, text in enumerate(("/log_water", str(amount)), start=chat_id * 10):
+            response = await post(client, _message(update_id, chat_id, text))
+            assert response.status == 200
+
+    async def scenario(client):
+        await asyncio.gather(*(log_water(client, chat_id, 100 + chat_id % 10) for chat_id in chats))
+        assert await wait_for(lambda: all(water_logged(chat_id) is not None for chat_id in chats))
+
+    run_app(bot, dp, scenario)
+    assert {chat_id: water_logged(chat_id) for chat_id in chats} == {chat_id: 100 + chat_id % 10 for chat_id in chats}
+
+
+def test_concurrent_updates_for_one_chat(bot, dp, session):
+    chat_id = 3200
+    texts = ["/log_water", "200", "/log_water", "300", "/help"]
+
+    async def scenario(client):
+        for update_id, text in enumerate(texts, start=1):
+            response = await post(client, _message(update_id, chat_id, text))
+            assert response.status == 200
+        assert await wait_for(lambda: session.calls["SendMessage"] >= len(texts))
+
+    run_app(bot, dp, scenario)
+    assert water_logged(chat_id) == 500
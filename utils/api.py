@@ -1,43 +1,61 @@
-import requests
 import os
-from difflib import SequenceMatcher
 
 from dotenv import load_dotenv
 
+from config import WEATHER_API_URL, WEATHER_TIMEOUT, FOOD_API_URL, FOOD_TIMEOUT, FOOD_PAGE_SIZE
+from utils.metrics import EXTERNAL_LATENCY, track_status
+from utils.ranking import rank_names
+from utils.transport import transport
+
 # Загружаем переменные окружения
 load_dotenv()
 
 API_KEY = os.getenv("API_KEY")
 
 
-def get_temp(city):
+@track_status(EXTERNAL_LATENCY, "get_temp")
+async def get_temp(city=None, city_id=None):
     """
     Получает текущую температуру для указанного города с использованием OpenWeather API.
+
+    :param city: Название города.
+    :param city_id: Идентификатор города в OpenWeather (используется вместо названия).
+    :return: Словарь с температурой, id и названием города, смещением часового пояса и статусом.
     """
-    url = f"http://api.openweathermap.org/data/2.5/weather?q={city}&appid={API_KEY}&units=metric"
+    url = WEATHER_API_URL
+    params = {"appid": API_KEY, "units": "metric"}
+    if city_id is not None:
+        params["id"] = city_id
+    else:
+        params["q"] = city
     try:
-        response = requests.get(url)
-        response.raise_for_status()  # Проверяем статус ответа
-        data = response.json()
-        return {"temp": data["main"]["temp"], "status": 200}  # Возвращаем температуру и статус
-    except requests.exceptions.HTTPError as http_err:
-        if response.status_code == 404:
+        status, data = await transport.fetch_json("weather", url, params=params, timeout=WEATHER_TIMEOUT)
+        if status == 404:
             return {"error": "Город не найден", "status": 404}
-        if response.status_code == 401:
+        if status == 401:
             return {"error": "Неверный API ключ", "status": 401}
-        return {"error": str(http_err), "status": response.status_code}
+        if status != 200:
+            return {"error": f"Ошибка HTTP {status}", "status": status}
+        return {
+            "temp": data["main"]["temp"],
+            "city_id": data.get("id"),
+            "name": data.get("name"),
+            "timezone": data.get("timezone", 0),  # смещение от UTC в секундах
+            "status": 200,
+        }
     except Exception as err:
         return {"error": f"Ошибка: {err}", "status": 500}
 
 
-def get_food(product_name):
+@track_status(EXTERNAL_LATENCY, "get_food")
+async def get_food(product_name):
     """
     Получение информации о калорийности продукта с оптимизацией запроса.
 
     :param product_name: Название продукта для поиска.
     :return: Словарь с названием продукта и калорийностью, либо None.
     """
-    base_url = "https://world.openfoodfacts.org/cgi/search.pl"
+    base_url = FOOD_API_URL
     search_terms = product_name
 
     params = {
@@ -45,14 +63,14 @@ def get_food(product_name):
         "search_terms": search_terms,
         "json": "true",
         "fields": "product_name,nutriments",  # Только нужные поля
-        "page_size": 10,  # Ограничиваем выборку
+        "page_size": FOOD_PAGE_SIZE,  # Ограничиваем выборку
         "lc": "ru",  # Ограничиваем выборку русским языком
     }
 
     try:
-        response = requests.get(base_url, params=params)
-        response.raise_for_status()  # Проверяем статус ответа
-        data = response.json()
+        status, data = await transport.fetch_json("food", base_url, params=params, timeout=FOOD_TIMEOUT)
+        if status != 200:
+            return {"error": f"Ошибка HTTP {status}", "status": status}
         products = data.get('products', [])
         if not products:
             return {"error": "Продукты не найдены.", "status": 204}
@@ -66,20 +84,25 @@ def get_food(product_name):
             return {"error": "Нет продуктов с данными о калорийности.", "status": 204}
 
         # Сортируем продукты по степени совпадения с запросом
-        valid_products = sorted(
-            valid_products,
-            key=lambda p: SequenceMatcher(None, product_name.lower(), p.get('product_name', '').lower()).ratio(),
-            reverse=True
-        )
-
-        message = ""
-        for idx, product in enumerate(valid_products[:5], 1):
-            product_name = product.get('product_name', 'Неизвестно')
-            calories = product['nutriments']['energy-kcal_100g']
-            message += f"{idx}. {product_name} - {calories} ккал/100г\n"
+        ranked = rank_names(product_name, [p.get('product_name', '') for p in valid_products], limit=5)
+        valid_products = [valid_products[idx] for idx, _ in ranked]
 
+        message = format_food_message(valid_products[:5])
         return {"message": message, "temp": valid_products[:5], "status": 200}  # Возвращаем список продуктов
-    except requests.exceptions.HTTPError as http_err:
-        return {"error": str(http_err), "status": response.status_code}
     except Exception as err:
-        return {"error": f"Ошибка: {err}", "status": 500}
\ No newline at end of file
+        return {"error": f"Ошибка: {err}", "status": 500}
+
+
+def format_food_message(products):
+    """
+    Формирует нумерованный список продуктов с калорийностью для ответа пользователю.
+
+    :param products: Продукты в формате OpenFoodFacts.
+    :return: Текст списка.
+    """
+    message = ""
+    for idx, product in enumerate(products, 1):
+        product_name = product.get('product_name', 'Неизвестно')
+        calories = product['nutriments']['energy-kcal_100g']
+        message += f"{idx}. {product_name} - {calories} ккал/100г\n"
+    return message
\ No newline at end of file
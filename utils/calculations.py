@@ -1,5 +1,8 @@
 # Логика расчёта воды и калорий
 
+# Вес, по которому считается расход калорий, если вес пользователя неизвестен, кг
+REFERENCE_WEIGHT = 70
+
 def calculate_water_norm(weight, activity_minutes, temperature):
     """
     Рассчитывает дневную норму воды в мл.
@@ -55,29 +58,86 @@ def calculate_calories_norm(weight, height, age, gender, activity):
 
     return round(daily_calories, 2)
 
-def calculate_workout(workout_type, duration):
+def calculate_water_norms(weight, activity_minutes, temperature):
+    """
+    Рассчитывает нормы воды сразу для многих пользователей.
+
+    Повторяет calculate_water_norm поэлементно и даёт те же значения.
+
+    :param weight: Массив весов в кг.
+    :param activity_minutes: Массив минут активности.
+    :param temperature: Массив температур в градусах Цельсия.
+    :return: Массив норм воды в мл.
+    """
+    # numpy импортируется только здесь: модуль загружается на старте через обработчики
+    import numpy as np
+
+    weight = np.asarray(weight, dtype=float)
+    activity_minutes = np.asarray(activity_minutes)
+    temperature = np.asarray(temperature, dtype=float)
+
+    # Операции в том же порядке, что и в calculate_water_norm, чтобы совпадало округление
+    water_norms = weight * 30
+    water_norms = water_norms + (activity_minutes // 15) * 250
+    water_norms = water_norms + np.where(temperature > 25, 500, 0)
+    water_norms = water_norms + np.where(temperature > 30, 500, 0)
+    return water_norms
+
+
+def calculate_calories_norms(weight, height, age, gender, activity):
+    """
+    Рассчитывает нормы калорий сразу для многих пользователей.
+
+    Повторяет calculate_calories_norm поэлементно и даёт те же значения,
+    включая округление до сотых.
+
+    :param weight: Массив весов в кг.
+    :param height: Массив ростов в см.
+    :param age: Массив возрастов в годах.
+    :param gender: Массив полов ("male" или "female").
+    :param activity: Массив минут активности.
+    :return: Массив норм калорий в ккал.
+    """
+    import numpy as np
+
+    weight = np.asarray(weight, dtype=float)
+    height = np.asarray(height, dtype=float)
+    age = np.asarray(age, dtype=float)
+    gender = np.asarray(gender)
+    activity = np.asarray(activity, dtype=float)
+
+    male = gender == "male"
+    if not (male | (gender == "female")).all():
+        raise ValueError("Пол должен быть 'male' или 'female'.")
+
+    min_af = 1.2
+    max_af = 1.9
+    activity_level = min_af + (activity / 480) * (max_af - min_af)
+
+    bmr = 10 * weight + 6.25 * height - 5 * age + np.where(male, 5, -161)
+    daily_calories = bmr * activity_level
+
+    # np.round и round расходятся только на значениях у самой середины между сотыми:
+    # их округляем так же, как round в calculate_calories_norm
+    calories_norms = np.round(daily_calories, 2)
+    scaled = daily_calories * 100
+    near_tie = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    calories_norms[near_tie] = [round(value, 2) for value in daily_calories[near_tie].tolist()]
+    return calories_norms
+
+
+def calculate_workout(workout, duration, weight=None):
     """
     Рассчитывает калории и воду в зависимости от типа тренировки и длительности.
 
-    :param workout_type: Тип тренировки.
+    Расход калорий считается по метаболическому эквиваленту (MET):
+    MET × 3,5 × вес / 200 ккал в минуту.
+
+    :param workout: Тренировка из реестра (utils.workouts) с полями "met" и "water_per_30_min".
     :param duration: Длительность тренировки в минутах.
+    :param weight: Вес пользователя в кг (по умолчанию REFERENCE_WEIGHT).
     :return: Кортеж (сожженные калории, дополнительные мл воды).
     """
-    workout_data = {
-        "бег": {"calories_per_minute": 10, "water_per_30_min": 200},
-        "плавание": {"calories_per_minute": 8, "water_per_30_min": 250},
-        "йога": {"calories_per_minute": 3, "water_per_30_min": 100},
-        "велосипед": {"calories_per_minute": 7, "water_per_30_min": 150},
-        "силовая тренировка": {"calories_per_minute": 6, "water_per_30_min": 200},
-        "ходьба": {"calories_per_minute": 4, "water_per_30_min": 100},
-        "Сноуборд": {"calories_per_minute": 8, "water_per_30_min": 200},
-
-    }
-
-    workout = workout_data.get(workout_type.lower())
-    if not workout:
-        return None, None
-
-    calories = workout["calories_per_minute"] * duration
+    calories = workout["met"] * 3.5 * (weight or REFERENCE_WEIGHT) / 200 * duration
     additional_water = (duration / 30) * workout["water_per_30_min"]
     return calories, additional_water
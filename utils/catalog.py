@@ -0,0 +1,320 @@
+# Локальный каталог калорийности продуктов
+import csv
+import json
+import logging
+import math
+import sqlite3
+import sys
+from pathlib import Path
+
+from config import CATALOG_DB, CATALOG_MIN_SCORE
+from utils.api import format_food_message
+from utils.food_cache import food_cache
+from utils.ranking import boost_prefix, fold_text, trigrams
+from utils.text import normalize_text
+
+# Сколько кандидатов отбирать по индексу перед точным ранжированием
+CANDIDATES = 200
+# Сколько записей индекса читать на один запрос: триграммы запроса читаются
+# от редких к частым, пока их записи укладываются в этот бюджет, а записи
+# частой триграммы — начиная с названий, близких к запросу по длине
+MAX_POSTINGS = 5000
+# Размер пачки при импорте дампа
+IMPORT_BATCH = 5000
+# Версия индекса триграмм: при смене способа разбора индекс перестраивается
+INDEX_VERSION = 3
+# Индекс триграмм: записи триграммы упорядочены по числу триграмм названия,
+# а gram_counts хранит, в скольких названиях встречается каждая триграмма
+_INDEX_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS product_trigrams ("
+    "gram TEXT NOT NULL, "
+    "gram_count INTEGER NOT NULL, "
+    "product_id INTEGER NOT NULL, "
+    "PRIMARY KEY (gram, gram_count, product_id)) WITHOUT ROWID",
+    "CREATE TABLE IF NOT EXISTS gram_counts ("
+    "gram TEXT PRIMARY KEY, "
+    "products INTEGER NOT NULL) WITHOUT ROWID",
+    "CREATE TRIGGER IF NOT EXISTS count_gram AFTER INSERT ON product_trigrams BEGIN "
+    "INSERT INTO gram_counts (gram, products) VALUES (new.gram, 1) "
+    "ON CONFLICT(gram) DO UPDATE SET products = products + 1; END",
+)
+
+
+class FoodCatalog:
+    """
+    Каталог продуктов и их калорийности на 100 г в SQLite.
+
+    Для нечёткого поиска хранится индекс триграмм (`product_trigrams`),
+    для поиска по началу названия — индекс по нормализованному названию.
+    База открывается с отображением в память (mmap).
+    """
+
+    def __init__(self, db_path):
+        self.db_path = Path(db_path)
+        self._conn = None
+
+    @property
+    def conn(self):
+        """Соединение с каталогом, открывается при первом обращении."""
+        if self._conn is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(self.db_path, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA mmap_size=268435456")
+            self._conn.executescript(
+                "CREATE TABLE IF NOT EXISTS products ("
+                "id INTEGER PRIMARY KEY, "
+                "name TEXT NOT NULL, "
+                "name_norm TEXT NOT NULL UNIQUE, "
+                "kcal REAL NOT NULL, "
+                "gram_count INTEGER NOT NULL);"
+            )
+            for statement in _INDEX_SCHEMA:
+                self._conn.execute(statement)
+            if self._conn.execute("PRAGMA user_version").fetchone()[0] < INDEX_VERSION:
+                self._rebuild_index()
+        return self._conn
+
+    def add_products(self, products):
+        """
+        Добавляет продукты в каталог (существующие обновляются).
+
+        :param products: Итерируемое пар (название, ккал на 100 г).
+        :return: Количество добавленных или обновлённых продуктов.
+        """
+        count = 0
+        self.conn.execute("BEGIN")
+        try:
+            for name, kcal in products:
+                name = (name or "").strip()
+                name_norm = normalize_text(name)
+                if not name_norm or kcal is None:
+                    continue
+                grams = trigrams(fold_text(name))
+                product_id, gram_count = self.conn.execute(
+                    "INSERT INTO products (name, name_norm, kcal, gram_count) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT(name_norm) DO UPDATE SET name = excluded.name, kcal = excluded.kcal "
+                    "RETURNING id, gram_count",
+                    (name, name_norm, float(kcal), len(grams)),
+                ).fetchone()
+                self.conn.executemany(
+                    "INSERT OR IGNORE INTO product_trigrams (gram, gram_count, product_id) VALUES (?, ?, ?)",
+                    ((gram, gram_count, product_id) for gram in grams),
+                )
+                count += 1
+            self.conn.execute("COMMIT")
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        return count
+
+    def search(self, query, limit=5, min_score=CATALOG_MIN_SCORE):
+        """
+        Ищет продукты по названию.
+
+        Кандидаты отбираются по индексу триграмм и по началу названия, затем
+        ранжируются по коэффициенту Жаккара между множествами триграмм.
+
+        Если в запросе n триграмм, схожести не ниже min_score достигают только
+        названия, у которых не меньше ⌈min_score·n⌉ общих с запросом триграмм и
+        не больше n / min_score своих, а значит, есть хотя бы одна из
+        n − ⌈min_score·n⌉ + 1 самых редких триграмм запроса. По индексу
+        читаются только названия подходящей длины и только эти триграммы, от
+        редких к частым и не больше MAX_POSTINGS записей на запрос (записи
+        одной триграммы — от названий, близких к запросу по длине), поэтому
+        время поиска не зависит от размера каталога. У лучших кандидатов
+        общие триграммы затем считаются поиском по ключу индекса.
+
+        :param query: Название продукта.
+        :param limit: Сколько лучших результатов вернуть.
+        :param min_score: Минимальная схожесть (0..1).
+        :return: Список (схожесть, название, ккал на 100 г) по убыванию схожести.
+        """
+        query_norm = normalize_text(query)
+        query_grams = trigrams(fold_text(query))
+        if not query_grams:
+            return []
+
+        size = len(query_grams)
+        min_shared = max(1, math.ceil(min_score * size))
+        max_count = int(size / min_score) if min_score > 0 else sys.maxsize
+        grams = sorted(query_grams)
+        placeholders = ",".join("?" * size)
+        frequency = dict(self.conn.execute(
+            f"SELECT gram, products FROM gram_counts WHERE gram IN ({placeholders})", grams,
+        ))
+        # Пары (триграмма, сколько её записей прочитать). Триграммы, которых нет
+        # в индексе, тоже самые редкие: из встречающихся хватает на одну больше,
+        # чем их недостаёт до min_shared
+        selected = []
+        budget = MAX_POSTINGS
+        for gram in sorted(frequency, key=frequency.get)[:len(frequency) - min_shared + 1]:
+            if budget <= 0:
+                break
+            selected.append((gram, budget))
+            budget -= frequency[gram]
+
+        candidates = {}
+        if selected:
+            postings = " UNION ALL ".join(
+                "SELECT * FROM (SELECT product_id, gram_count FROM product_trigrams"
+                " WHERE gram = ? AND gram_count BETWEEN ? AND ? ORDER BY gram_count LIMIT ?)"
+                " UNION ALL SELECT * FROM (SELECT product_id, gram_count FROM product_trigrams"
+                " WHERE gram = ? AND gram_count BETWEEN ? AND ? ORDER BY gram_count DESC LIMIT ?)"
+                for _ in selected
+            )
+            rows = self.conn.execute(
+                f"WITH candidates AS ("
+                f"  SELECT product_id, gram_count FROM ({postings}) GROUP BY product_id"
+                f"  ORDER BY COUNT(*) DESC, ABS(gram_count - ?) LIMIT ?"
+                f"), query_grams (gram) AS (VALUES {','.join(['(?)'] * size)})"
+                f" SELECT p.id, p.name, p.name_norm, p.kcal, p.gram_count, m.shared FROM ("
+                f"  SELECT c.product_id, COUNT(*) AS shared FROM candidates AS c"
+                f"  CROSS JOIN query_grams AS q JOIN product_trigrams AS t"
+                f"  ON t.gram = q.gram AND t.gram_count = c.gram_count AND t.product_id = c.product_id"
+                f"  GROUP BY c.product_id"
+                f") AS m JOIN products AS p ON p.id = m.product_id",
+                (
+                    *(value for gram, count in selected for value in (
+                        gram, size, max_count, (count + 1) // 2, gram, min_shared, size - 1, count // 2,
+                    )),
+                    size, CANDIDATES, *grams,
+                ),
+            )
+            for product_id, name, name_norm, kcal, gram_count, shared in rows:
+                candidates[product_id] = (name, name_norm, kcal, gram_count, shared)
+
+        # Продукты, название которых начинается с запроса (индекс по name_norm)
+        rows = self.conn.execute(
+            "SELECT id, name, name_norm, kcal, gram_count FROM products "
+            "WHERE name_norm >= ? AND name_norm < ? LIMIT ?",
+            (query_norm, query_norm + "\uffff", CANDIDATES),
+        )
+        for product_id, name, name_norm, kcal, gram_count in rows:
+            if product_id not in candidates:
+                shared = len(query_grams & trigrams(fold_text(name_norm)))
+                candidates[product_id] = (name, name_norm, kcal, gram_count, shared)
+
+        results = []
+        for name, name_norm, kcal, gram_count, shared in candidates.values():
+            score = shared / (len(query_grams) + gram_count - shared)
+            if name_norm.startswith(query_norm):
+                score = boost_prefix(score)  # совпадение по началу названия
+            if score >= min_score:
+                results.append((score, name, kcal))
+        results.sort(key=lambda item: item[0], reverse=True)
+        return results[:limit]
+
+    def import_dump(self, path):
+        """
+        Импортирует продукты из дампа OpenFoodFacts.
+
+        Поддерживаются CSV/TSV (колонки product_name и energy-kcal_100g)
+        и JSONL (по продукту в строке, калорийность в nutriments).
+
+        :param path: Путь к файлу дампа.
+        :return: Количество импортированных продуктов.
+        """
+        path = Path(path)
+        rows = _read_jsonl(path) if path.suffix in (".jsonl", ".json") else _read_csv(path)
+        total = 0
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= IMPORT_BATCH:
+                total += self.add_products(batch)
+                batch = []
+        return total + self.add_products(batch)
+
+    def _rebuild_index(self):
+        self._conn.execute("BEGIN")
+        self._conn.execute("DROP TABLE product_trigrams")
+        self._conn.execute("DELETE FROM gram_counts")
+        for statement in _INDEX_SCHEMA:
+            self._conn.execute(statement)
+        for product_id, name in self._conn.execute("SELECT id, name FROM products").fetchall():
+            grams = trigrams(fold_text(name))
+            self._conn.execute("UPDATE products SET gram_count = ? WHERE id = ?", (len(grams), product_id))
+            self._conn.executemany(
+                "INSERT INTO product_trigrams (gram, gram_count, product_id) VALUES (?, ?, ?)",
+                ((gram, len(grams), product_id) for gram in grams),
+            )
+        self._conn.execute(f"PRAGMA user_version = {INDEX_VERSION}")
+        self._conn.execute("COMMIT")
+
+    def close(self):
+        """Закрывает каталог."""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+def _parse_kcal(value):
+    try:
+        kcal = float(value)
+    except (TypeError, ValueError):
+        return None
+    return kcal if kcal >= 0 else None
+
+
+def _read_csv(path):
+    csv.field_size_limit(sys.maxsize)
+    with open(path, "r", encoding="utf-8", newline="") as file:
+        dialect = "excel-tab" if "\t" in file.readline() else "excel"
+        file.seek(0)
+        for row in csv.DictReader(file, dialect=dialect):
+            yield row.get("product_name"), _parse_kcal(row.get("energy-kcal_100g"))
+
+
+def _read_jsonl(path):
+    with open(path, "r", encoding="utf-8") as file:
+        for line in file:
+            if not line.strip():
+                continue
+            product = json.loads(line)
+            yield product.get("product_name"), _parse_kcal(product.get("nutriments", {}).get("energy-kcal_100g"))
+
+
+def _as_products(results):
+    # Результаты каталога в формате OpenFoodFacts, как у utils.api.get_food
+    return [{"product_name": name, "nutriments": {"energy-kcal_100g": kcal}} for _, name, kcal in results]
+
+
+async def find_food(product_name):
+    """
+    Ищет продукт сначала в локальном каталоге, затем через OpenFoodFacts.
+
+    Продукты, найденные через API, записываются в каталог, чтобы следующий
+    такой запрос обслуживался локально.
+
+    :param product_name: Название продукта.
+    :return: Словарь в формате utils.api.get_food.
+    """
+    results = catalog.search(product_name)
+    if results:
+        products = _as_products(results)
+        return {"message": format_food_message(products), "temp": products, "status": 200}
+
+    food_data = await food_cache.get_food(product_name)
+    if food_data["status"] == 200:
+        # Ответ уже получен: ошибка записи в каталог не должна срывать поиск
+        try:
+            catalog.add_products(
+                (product.get("product_name"), _parse_kcal(product.get("nutriments", {}).get("energy-kcal_100g")))
+                for product in food_data["temp"]
+            )
+        except Exception as err:
+            logging.warning(f"Не удалось записать продукты «{product_name}» в каталог: {err}")
+    return food_data
+
+
+# Общий каталог продуктов
+catalog = FoodCatalog(CATALOG_DB)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3 or sys.argv[1] != "import":
+        print("Использование: python -m utils.catalog import <дамп.csv|дамп.jsonl>")
+        sys.exit(1)
+    print(f"Импортировано продуктов: {catalog.import_dump(sys.argv[2])}")
+    catalog.close()
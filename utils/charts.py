@@ -0,0 +1,90 @@
+# Кэш готовых графиков прогресса
+from collections import OrderedDict
+
+from config import CHART_CACHE_SIZE, CHART_CACHE_FILE_ID
+from utils.metrics import CHART_CACHE_LOOKUPS, CHART_RENDER_LATENCY
+from utils.render_pool import render_pool
+
+
+def progress_percent(logged, norm):
+    """
+    Доля выполнения нормы в целых процентах от 0 до 100.
+
+    На графике перевыполненная норма выглядит так же, как выполненная,
+    поэтому значение ограничивается сотней.
+    """
+    if norm <= 0:
+        return 100 if logged > 0 else 0
+    return max(0, min(100, round(100 * logged / norm)))
+
+
+class ChartCache:
+    """
+    LRU-кэш графиков прогресса.
+
+    Ключ — доли выполнения норм воды и калорий с шагом 1%, поэтому повторный
+    /progress с теми же цифрами не перерисовывает график. Дополнительно
+    запоминается file_id уже загруженного в Telegram изображения, чтобы
+    отправлять его повторно без загрузки.
+    """
+
+    def __init__(self, max_size=CHART_CACHE_SIZE, cache_file_id=CHART_CACHE_FILE_ID):
+        self.max_size = max_size
+        self.cache_file_id = cache_file_id
+        self._images = OrderedDict()
+        self._file_ids = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        CHART_CACHE_LOOKUPS.labels(result="hit").set_function(lambda: self.hits)
+        CHART_CACHE_LOOKUPS.labels(result="miss").set_function(lambda: self.misses)
+
+    @staticmethod
+    def key(water_logged, water_norm, calories_logged, calories_norm):
+        """Ключ кэша для значений прогресса."""
+        return progress_percent(water_logged, water_norm), progress_percent(calories_logged, calories_norm)
+
+    def get_file_id(self, key):
+        """Возвращает file_id ранее отправленного графика, либо None."""
+        if not self.cache_file_id:
+            return None
+        file_id = self._file_ids.get(key)
+        if file_id is not None:
+            self._file_ids.move_to_end(key)
+            self.hits += 1
+        return file_id
+
+    def remember_file_id(self, key, file_id):
+        """Запоминает file_id отправленного графика."""
+        if self.cache_file_id:
+            self._put(self._file_ids, key, file_id)
+
+    async def render(self, key):
+        """
+        Возвращает PNG-график для ключа, отрисовывая его только при промахе.
+
+        :param key: Ключ из ChartCache.key.
+        :return: Изображение в байтах.
+        """
+        image = self._images.get(key)
+        if image is not None:
+            self._images.move_to_end(key)
+            self.hits += 1
+            CHART_RENDER_LATENCY.labels(result="cached").observe(0)
+            return image
+
+        self.misses += 1
+        water_percent, calories_percent = key
+        with CHART_RENDER_LATENCY.labels(result="rendered").time():
+            image = await render_pool.render_progress_chart(water_percent, 100, calories_percent, 100)
+        self._put(self._images, key, image)
+        return image
+
+    def _put(self, cache, key, value):
+        cache[key] = value
+        cache.move_to_end(key)
+        while len(cache) > self.max_size:
+            cache.popitem(last=False)
+
+
+# Общий кэш графиков
+chart_cache = ChartCache()
@@ -0,0 +1,262 @@
+# Смена дня у пользователей и пересчёт норм
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+
+from config import DAILY_FETCH_CONCURRENCY, DEFAULT_UTC_OFFSET
+from utils.calculations import calculate_calories_norms, calculate_water_norms
+from utils.helpers import reset_daily_counters, update_daily_goals
+from utils.text import normalize_text
+
+# Поля профиля, без которых норму не пересчитать
+PROFILE_FIELDS = ("weight", "height", "age", "gender", "activity", "city")
+# Числовые поля профиля, которые идут в массивы пакетного расчёта
+NUMERIC_PROFILE_FIELDS = ("weight", "height", "age", "activity")
+
+
+def local_day(user_data, now=None):
+    """
+    Возвращает текущую дату в часовом поясе пользователя.
+
+    :param user_data: Данные пользователя (поле "timezone" — смещение от UTC в секундах).
+    :param now: Момент времени в UTC (по умолчанию — сейчас).
+    :return: Дата в формате ISO, например "2024-12-31".
+    """
+    now = now or datetime.now(timezone.utc)
+    offset = user_data.get("timezone", DEFAULT_UTC_OFFSET)
+    return (now + timedelta(seconds=offset)).date().isoformat()
+
+
+def needs_rollover(user_data, now=None):
+    """Проверяет, наступил ли у пользователя новый день с момента последней записи."""
+    return user_data.get("day") != local_day(user_data, now)
+
+
+def has_profile(user_data):
+    """Проверяет, заполнен ли профиль пользователя для расчёта норм."""
+    return all(field in user_data for field in PROFILE_FIELDS)
+
+
+def batch_ready(user_data):
+    """Проверяет, можно ли посчитать нормы пользователя в общем массиве: пол известен, числа — числа."""
+    return user_data["gender"] in ("male", "female") and all(
+        isinstance(user_data[field], (int, float)) and not isinstance(user_data[field], bool)
+        for field in NUMERIC_PROFILE_FIELDS
+    )
+
+
+def apply_rollover(user_data, temperature, now=None):
+    """
+    Начинает у пользователя новый день.
+
+    Счётчики обнуляются, нормы пересчитываются, если известна температура
+    и заполнен профиль; иначе остаются прежними, только из нормы воды
+    вычитается прибавка за вчерашние тренировки. Записи без отметки дня
+    (созданные до появления этого поля) только получают отметку.
+
+    :param user_data: Данные пользователя, изменяются на месте.
+    :param temperature: Температура в городе пользователя либо None.
+    :param now: Момент времени в UTC (по умолчанию — сейчас).
+    :return: True, если нормы были пересчитаны.
+    """
+    first_stamp = "day" not in user_data
+    user_data["day"] = local_day(user_data, now)
+    if first_stamp:
+        return False
+
+    if temperature is not None and has_profile(user_data):
+        update_daily_goals(user_data, temperature)
+        return True
+
+    reset_daily_counters(user_data)
+    return False
+
+
+def apply_rollovers(users, temperatures, now=None):
+    """
+    Начинает новый день сразу у многих пользователей.
+
+    Результат тот же, что у apply_rollover для каждого пользователя, но
+    нормы считаются одним проходом по массивам NumPy. Профили, которые
+    нельзя положить в массив (неизвестный пол, не числа), считаются по
+    одному; если не выходит и так, у пользователя только обнуляются
+    счётчики, а остальная пачка считается как обычно.
+
+    :param users: Словарь {ID пользователя: данные}, данные изменяются на месте.
+    :param temperatures: Словарь {ID пользователя: температура либо None}.
+    :param now: Момент времени в UTC (по умолчанию — сейчас).
+    :return: Количество пользователей, у которых нормы были пересчитаны.
+    """
+    recalculated = []
+    recalculated_temperatures = []
+    recalculated_one_by_one = 0
+    for user_id, user_data in users.items():
+        first_stamp = "day" not in user_data
+        user_data["day"] = local_day(user_data, now)
+        if first_stamp:
+            continue
+
+        reset_daily_counters(user_data)
+        temperature = temperatures.get(user_id)
+        if temperature is None or not has_profile(user_data):
+            continue
+        if batch_ready(user_data):
+            recalculated.append(user_data)
+            recalculated_temperatures.append(temperature)
+            continue
+        try:
+            update_daily_goals(user_data, temperature)
+        except (TypeError, ValueError) as err:
+            logging.warning(f"Нормы пользователя {user_id} не пересчитаны, профиль некорректен: {err}")
+        else:
+            recalculated_one_by_one += 1
+
+    if recalculated:
+        weight, height, age, gender, activity = (
+            [user_data[field] for user_data in recalculated]
+            for field in ("weight", "height", "age", "gender", "activity")
+        )
+        calories_norms = calculate_calories_norms(weight, height, age, gender, activity).tolist()
+        water_norms = calculate_water_norms(weight, activity, recalculated_temperatures).tolist()
+        for user_data, calories_norm, water_norm in zip(recalculated, calories_norms, water_norms):
+            user_data["calories_norm"] = calories_norm
+            user_data["water_norm"] = water_norm
+    return len(recalculated) + recalculated_one_by_one
+
+
+async def rollover_user(user_id, storage, weather_cache):
+    """
+    Лениво начинает новый день при первом обращении пользователя в этот день.
+
+    :param user_id: Идентификатор пользователя.
+    :param storage: Хранилище пользователей.
+    :param weather_cache: Кэш погоды.
+    :return: True, если день был сменён.
+    """
+    user_data = storage.get_user(user_id)
+    if user_data is None or not needs_rollover(user_data):
+        return False
+
+    temperature = None
+    if has_profile(user_data) and "day" in user_data:
+        response = await weather_cache.get_temp(user_data["city"])
+        if response.get("status") == 200:
+            temperature = response["temp"]
+
+    apply_rollover(user_data, temperature)
+    storage.update_user(user_id, user_data)
+    return True
+
+
+async def fetch_temperatures(cities, weather_cache, concurrency=DAILY_FETCH_CONCURRENCY):
+    """
+    Параллельно получает температуру для набора городов.
+
+    :param cities: Словарь {нормализованное название: исходное название}.
+    :param weather_cache: Кэш погоды.
+    :param concurrency: Максимум одновременных запросов.
+    :return: Словарь {нормализованное название: температура}; города с ошибкой пропускаются.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def fetch(city):
+        async with semaphore:
+            return await weather_cache.get_temp(city)
+
+    names = list(cities)
+    responses = await asyncio.gather(*(fetch(cities[name]) for name in names), return_exceptions=True)
+
+    temperatures = {}
+    for name, response in zip(names, responses):
+        if isinstance(response, Exception):
+            logging.warning(f"Не удалось получить погоду для '{cities[name]}': {response}")
+        elif response.get("status") != 200:
+            logging.warning(f"Не удалось получить погоду для '{cities[name]}': {response.get('error')}")
+        else:
+            temperatures[name] = response["temp"]
+    return temperatures
+
+
+async def run_daily_update(storage, weather_cache, owns=None):
+    """
+    Сменяет день у всех пользователей, у которых он уже наступил.
+
+    Обычно день сменяется лениво (`rollover_user`); этот проход нужен,
+    чтобы разом обработать всех, например по расписанию. Выполняется
+    в несколько этапов:
+
+    1. Собирает пользователей, у которых наступил новый день, и их города.
+    2. Параллельно получает температуру для каждого города один раз.
+    3. Перечитывает пользователей (пока шли запросы погоды, их могли изменить),
+       пересчитывает нормы всех разом (`apply_rollovers`) и записывает их
+       одной транзакцией. Тех, у кого день уже сменился лениво, пропускает.
+
+    Ошибка по одному городу не прерывает обновление: у его пользователей
+    обнуляются счётчики, а нормы остаются прежними.
+
+    :param owns: Проверка ID пользователя: если задана, обрабатываются только
+        пользователи, для которых она истинна (пользователи своего процесса).
+    :return: Словарь со статистикой по этапам.
+    """
+    stats = {}
+    started = time.perf_counter()
+    now = datetime.now(timezone.utc)
+
+    # Этап 1: собираем пользователей с наступившим днём и их города
+    due_users = {}
+    cities = {}
+    total = 0
+    for user_id, user_data in storage.iter_users():
+        if owns is not None and not owns(user_id):
+            continue
+        total += 1
+        if not needs_rollover(user_data, now):
+            continue
+        due_users[user_id] = user_data
+        if has_profile(user_data):
+            cities.setdefault(normalize_text(user_data["city"]), user_data["city"])
+    stats["users"] = total
+    stats["due"] = len(due_users)
+    stats["cities"] = len(cities)
+    stats["collect_sec"] = time.perf_counter() - started
+
+    # Этап 2: получаем температуру по городам
+    stage_started = time.perf_counter()
+    temperatures = await fetch_temperatures(cities, weather_cache)
+    stats["cities_failed"] = len(cities) - len(temperatures)
+    stats["fetch_sec"] = time.perf_counter() - stage_started
+
+    # Этап 3: пересчитываем нормы и сохраняем одной записью.
+    # Пока ждали погоду, обработчики могли изменить пользователей или уже сменить
+    # им день лениво, поэтому изменения применяются к свежим записям, а не к копиям
+    # из этапа 1. Между чтением и записью нет await, так что новых изменений не будет.
+    stage_started = time.perf_counter()
+    fresh_users = {}
+    for user_id in due_users:
+        user_data = storage.get_user(user_id)
+        if user_data is not None and needs_rollover(user_data, now):
+            fresh_users[user_id] = user_data
+    due_users = fresh_users
+    user_temperatures = {
+        user_id: temperatures.get(normalize_text(user_data["city"]))
+        for user_id, user_data in due_users.items()
+        if has_profile(user_data)
+    }
+    updated = apply_rollovers(due_users, user_temperatures, now)
+    storage.save_users(due_users)
+    stats["updated"] = updated
+    stats["skipped"] = len(due_users) - updated
+    stats["rolled_meanwhile"] = stats["due"] - len(due_users)
+    stats["commit_sec"] = time.perf_counter() - stage_started
+    stats["total_sec"] = time.perf_counter() - started
+
+    logging.info(
+        f"Смена дня: пользователей {stats['users']}, новый день у {stats['due']}, "
+        f"нормы пересчитаны у {updated}, без пересчёта {stats['skipped']}, "
+        f"сменили день сами за время прохода {stats['rolled_meanwhile']}; "
+        f"городов {stats['cities']}, с ошибкой {stats['cities_failed']}; "
+        f"сбор {stats['collect_sec']:.2f} с, погода {stats['fetch_sec']:.2f} с, "
+        f"запись {stats['commit_sec']:.2f} с, всего {stats['total_sec']:.2f} с"
+    )
+    return stats
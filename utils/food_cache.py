@@ -0,0 +1,128 @@
+# Кэш результатов поиска продуктов
+import json
+import sqlite3
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+from config import FOOD_CACHE_DB, FOOD_CACHE_SIZE, FOOD_CACHE_TTL, FOOD_NEGATIVE_TTL
+from utils.api import get_food
+from utils.metrics import FOOD_CACHE_COALESCED, FOOD_CACHE_ENTRIES, FOOD_CACHE_LOOKUPS, FOOD_CACHE_UPSTREAM
+from utils.singleflight import SingleFlight
+from utils.text import normalize_text
+
+
+class FoodCache:
+    """
+    Двухуровневый кэш поиска продуктов: LRU в памяти и SQLite на диске.
+
+    Запросы нормализуются («Гречка » и «гречка» — один ключ). Найденные
+    продукты хранятся `ttl` секунд, ответ «продукты не найдены» (статус 204) —
+    `negative_ttl` секунд. Ошибки API не кэшируются. Одновременные
+    одинаковые запросы объединяются в один запрос к OpenFoodFacts.
+    """
+
+    def __init__(self, db_path, max_size=FOOD_CACHE_SIZE, ttl=FOOD_CACHE_TTL, negative_ttl=FOOD_NEGATIVE_TTL):
+        self.db_path = Path(db_path)
+        self.max_size = max_size
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._memory = OrderedDict()  # ключ -> (результат, истекает)
+        self._inflight = SingleFlight()
+        self._conn = None
+        self.counters = {"memory_hits": 0, "disk_hits": 0, "negative_hits": 0, "misses": 0, "upstream_requests": 0}
+        for result in ("memory_hits", "disk_hits", "negative_hits", "misses"):
+            FOOD_CACHE_LOOKUPS.labels(result=result).set_function(lambda result=result: self.counters[result])
+        FOOD_CACHE_UPSTREAM.set_function(lambda: self.counters["upstream_requests"])
+        FOOD_CACHE_COALESCED.set_function(lambda: self._inflight.coalesced)
+        FOOD_CACHE_ENTRIES.set_function(lambda: len(self._memory))
+
+    @property
+    def conn(self):
+        """Соединение с базой кэша, открывается при первом обращении."""
+        if self._conn is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(self.db_path, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS food_cache ("
+                "query TEXT PRIMARY KEY, "
+                "result TEXT NOT NULL, "
+                "expires_at REAL NOT NULL)"
+            )
+        return self._conn
+
+    async def get_food(self, product_name):
+        """
+        Ищет продукт, по возможности без запроса к OpenFoodFacts.
+
+        :param product_name: Название продукта.
+        :return: Словарь в формате utils.api.get_food.
+        """
+        key = normalize_text(product_name)
+        result = self._lookup(key)
+        if result is not None:
+            if result["status"] != 200:
+                self.counters["negative_hits"] += 1
+            return result
+
+        self.counters["misses"] += 1
+        return await self._inflight.do(key, self._fetch, key, product_name)
+
+    def stats(self):
+        """Счётчики попаданий и промахов кэша."""
+        return dict(self.counters, coalesced=self._inflight.coalesced, memory_size=len(self._memory))
+
+    def close(self):
+        """Закрывает базу кэша."""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def _lookup(self, key):
+        now = time.time()
+        cached = self._memory.get(key)
+        if cached is not None:
+            result, expires_at = cached
+            if expires_at > now:
+                self._memory.move_to_end(key)
+                self.counters["memory_hits"] += 1
+                return result
+            del self._memory[key]
+
+        row = self.conn.execute(
+            "SELECT result, expires_at FROM food_cache WHERE query = ?", (key,)
+        ).fetchone()
+        if row is None or row[1] <= now:
+            return None
+        result = json.loads(row[0])
+        self._remember(key, result, row[1])
+        self.counters["disk_hits"] += 1
+        return result
+
+    async def _fetch(self, key, product_name):
+        self.counters["upstream_requests"] += 1
+        result = await get_food(product_name)
+        if result["status"] == 200:
+            expires_at = time.time() + self.ttl
+        elif result["status"] == 204:
+            expires_at = time.time() + self.negative_ttl
+        else:
+            return result
+
+        self._remember(key, result, expires_at)
+        self.conn.execute(
+            "INSERT OR REPLACE INTO food_cache (query, result, expires_at) VALUES (?, ?, ?)",
+            (key, json.dumps(result, ensure_ascii=False), expires_at),
+        )
+        return result
+
+    def _remember(self, key, result, expires_at):
+        self._memory[key] = (result, expires_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_size:
+            self._memory.popitem(last=False)
+
+
+# Общий кэш поиска продуктов
+food_cache = FoodCache(FOOD_CACHE_DB)
@@ -0,0 +1,108 @@
+# Хранилище состояний FSM на SQLite
+import json
+import sqlite3
+import time
+from pathlib import Path
+
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage
+
+from config import FSM_DB, FSM_TTL
+
+# Как часто удалять просроченные диалоги, сек
+PURGE_INTERVAL = 600
+
+
+class SQLiteStorage(BaseStorage):
+    """
+    Хранилище состояний и данных FSM в SQLite.
+
+    Незавершённые диалоги переживают перезапуск бота и не занимают память.
+    Диалог, который не менялся дольше `ttl` секунд, считается брошенным:
+    он не возвращается при чтении и периодически удаляется из базы.
+    """
+
+    def __init__(self, db_path=FSM_DB, ttl=FSM_TTL):
+        self.db_path = Path(db_path)
+        self.ttl = ttl
+        self._conn = None
+        self._purged_at = 0.0
+
+    @property
+    def conn(self):
+        """Соединение с базой, открывается при первом обращении."""
+        if self._conn is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(self.db_path, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS fsm ("
+                "key TEXT PRIMARY KEY, "
+                "state TEXT, "
+                "data TEXT NOT NULL, "
+                "updated_at REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS fsm_updated_at ON fsm (updated_at)")
+        return self._conn
+
+    async def set_state(self, key, state=None):
+        state = state.state if isinstance(state, State) else state
+        self._write(key, state=state)
+
+    async def get_state(self, key):
+        row = self._read(key)
+        return row[0] if row else None
+
+    async def set_data(self, key, data):
+        self._write(key, data=data)
+
+    async def get_data(self, key):
+        row = self._read(key)
+        return json.loads(row[1]) if row else {}
+
+    async def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def purge_expired(self):
+        """
+        Удаляет диалоги, не менявшиеся дольше ttl.
+
+        :return: Количество удалённых диалогов.
+        """
+        self._purged_at = time.time()
+        return self.conn.execute(
+            "DELETE FROM fsm WHERE updated_at < ?", (self._purged_at - self.ttl,)
+        ).rowcount
+
+    @staticmethod
+    def _key(key):
+        return ":".join(str(part) for part in (
+            key.bot_id, key.chat_id, key.user_id, key.thread_id, key.business_connection_id, key.destiny,
+        ))
+
+    def _read(self, key):
+        return self.conn.execute(
+            "SELECT state, data FROM fsm WHERE key = ? AND updated_at >= ?",
+            (self._key(key), time.time() - self.ttl),
+        ).fetchone()
+
+    def _write(self, key, **fields):
+        now = time.time()
+        row = self._read(key)
+        state = fields.get("state", row[0] if row else None)
+        data = fields.get("data", json.loads(row[1]) if row else {})
+
+        if state is None and not data:
+            # Пустой диалог не храним
+            self.conn.execute("DELETE FROM fsm WHERE key = ?", (self._key(key),))
+        else:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO fsm (key, state, data, updated_at) VALUES (?, ?, ?, ?)",
+                (self._key(key), state, json.dumps(data, ensure_ascii=False), now),
+            )
+
+        if now - self._purged_at > PURGE_INTERVAL:
+            self.purge_expired()
@@ -1,10 +1,11 @@
 # Утилитарные функции (например, парсинг)
-import matplotlib.pyplot as plt
+import io
 import json
+import os
+import tempfile
 from pathlib import Path
 
 from utils.calculations import calculate_calories_norm, calculate_water_norm
-from utils.api import get_temp
 
 
 def load_data(STORAGE_FILE):
@@ -16,13 +17,26 @@ def load_data(STORAGE_FILE):
 
 
 def save_data(STORAGE_FILE, data):
-    """Сохранение данных в файл JSON."""
-    STORAGE_FILE.parent.mkdir(parents=True, exist_ok=True)
-    with open(STORAGE_FILE, "w", encoding="utf-8") as file:
-        json.dump(data, file, ensure_ascii=False, indent=4)
-
+    """
+    Сохранение данных в файл JSON.
 
-def create_combined_progress_chart(water_logged, water_norm, calories_logged, calories_norm, file_path):
+    Данные пишутся во временный файл рядом с целевым, который затем атомарно
+    переименовывается, поэтому сбой во время записи не обрезает старый файл.
+    """
+    STORAGE_FILE.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=STORAGE_FILE.parent, prefix=f".{STORAGE_FILE.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as file:
+            json.dump(data, file, ensure_ascii=False)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp_path, STORAGE_FILE)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def create_combined_progress_chart(water_logged, water_norm, calories_logged, calories_norm, file_path=None):
     """
     Создаёт объединённую кольцевую диаграмму с прогрессом по воде и калориям.
 
@@ -30,8 +44,14 @@ def create_combined_progress_chart(water_logged, water_norm, calories_logged, ca
     :param water_norm: Норма воды.
     :param calories_logged: Потреблённые калории.
     :param calories_norm: Норма калорий.
-    :param file_path: Путь для сохранения изображения.
+    :param file_path: Путь для сохранения изображения; если не указан, изображение возвращается.
+    :return: PNG-изображение в байтах, если file_path не указан.
     """
+    # matplotlib импортируется только при отрисовке: это больше секунды на старте
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
     fig, ax = plt.subplots(figsize=(6, 6))
 
     # Данные для воды
@@ -83,24 +103,105 @@ def create_combined_progress_chart(water_logged, water_norm, calories_logged, ca
     ax.set_title("Ваш прогресс: Вода и Калории", fontsize=16)
 
     # Сохранение изображения
-    plt.savefig(file_path)
+    if file_path is not None:
+        plt.savefig(file_path)
+        plt.close(fig)
+        return None
+
+    buffer = io.BytesIO()
+    plt.savefig(buffer, format="png")
     plt.close(fig)
+    return buffer.getvalue()
+
 
+def create_trend_chart(days, water, water_avg, water_norm, net, net_avg, calories_norm, file_path=None):
+    """
+    Создаёт график трендов по дням: вода и чистые калории со скользящим средним.
+
+    :param days: Подписи дней.
+    :param water: Выпитая вода по дням.
+    :param water_avg: Скользящее среднее воды.
+    :param water_norm: Норма воды по дням.
+    :param net: Потреблённые калории за вычетом сожжённых по дням.
+    :param net_avg: Скользящее среднее чистых калорий.
+    :param calories_norm: Норма калорий по дням.
+    :param file_path: Путь для сохранения изображения; если не указан, изображение возвращается.
+    :return: PNG-изображение в байтах, если file_path не указан.
+    """
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    fig, (ax_water, ax_calories) = plt.subplots(2, 1, figsize=(8, 6), sharex=True)
+    positions = range(len(days))
+
+    # Вода
+    ax_water.bar(positions, water, color="#A5D6A7", label="Вода, мл")
+    ax_water.plot(positions, water_avg, color="#4CAF50", linewidth=2, label="Среднее за 7 дней")
+    ax_water.step(positions, water_norm, where="mid", color="gray", linestyle="--", label="Норма")
+    ax_water.set_title("Вода", fontsize=12)
+    ax_water.legend(fontsize=8, loc="upper left")
+
+    # Калории
+    ax_calories.bar(positions, net, color="#FFAB91", label="Калории за вычетом сожжённых")
+    ax_calories.plot(positions, net_avg, color="#FF5733", linewidth=2, label="Среднее за 7 дней")
+    ax_calories.step(positions, calories_norm, where="mid", color="gray", linestyle="--", label="Норма")
+    ax_calories.set_title("Калории", fontsize=12)
+    ax_calories.legend(fontsize=8, loc="upper left")
+
+    # Подписываем не больше десятка дней, чтобы подписи не слипались
+    step = max(1, len(days) // 10)
+    ax_calories.set_xticks(list(positions)[::step])
+    ax_calories.set_xticklabels(list(days)[::step], rotation=45, ha="right", fontsize=8)
+
+    fig.suptitle("Ваши тренды", fontsize=16)
+    fig.tight_layout()
+
+    if file_path is not None:
+        plt.savefig(file_path)
+        plt.close(fig)
+        return None
+
+    buffer = io.BytesIO()
+    plt.savefig(buffer, format="png")
+    plt.close(fig)
+    return buffer.getvalue()
 
-def update_daily_goals(user_data):
-    """Обновляет ежедневные нормы пользователя."""
 
-    # Обновляем общее количество сожженых калорий
+def reset_daily_counters(user_data):
+    """
+    Обнуляет дневные счётчики пользователя.
+
+    Прибавка к норме воды за тренировки (поле "workout_water") относится
+    только к прошедшему дню и вычитается из нормы.
+
+    :param user_data: Данные пользователя, изменяются на месте.
+    """
     user_data["water_logged"] = 0
     user_data["calories_logged"] = 0
     user_data["burned_calories"] = 0
 
+    workout_water = user_data.pop("workout_water", 0)
+    if workout_water and "water_norm" in user_data:
+        user_data["water_norm"] -= workout_water
+
+
+def update_daily_goals(user_data, temperature):
+    """
+    Обновляет ежедневные нормы пользователя.
+
+    :param user_data: Данные пользователя.
+    :param temperature: Текущая температура в городе пользователя.
+    """
+
+    # Обновляем общее количество сожженых калорий
+    reset_daily_counters(user_data)
+
     weight = user_data["weight"]
     height = user_data["height"]
     age = user_data["age"]
     gender = user_data["gender"]
     activity = user_data["activity"]
-    temperature = get_temp(user_data["city"])["temp"]
 
     user_data["calories_norm"] = calculate_calories_norm(weight, height, age, gender, activity)
     user_data["water_norm"] = calculate_water_norm(weight, activity, temperature)
@@ -0,0 +1,256 @@
+# История записей воды, еды и тренировок
+import sqlite3
+import struct
+import sys
+from datetime import date, datetime, timezone
+from pathlib import Path
+
+from config import HISTORY_DIR, HISTORY_DB, STORAGE_FLUSH_MAX_DIRTY
+from utils.daily import local_day
+
+# Виды записей
+WATER = 1
+FOOD = 2
+WORKOUT = 3
+
+# Запись журнала: user_id, время (unix), локальный день (порядковый номер даты), вид, количество
+RECORD = struct.Struct("<qIIBf")
+
+# Какое поле итогов (номер в списке water, calories, burned) увеличивает запись каждого вида
+_TOTAL_FIELDS = {WATER: 0, FOOD: 1, WORKOUT: 2}
+
+
+def period_keys(day):
+    """
+    Ключи итогов за день, неделю и месяц, в которые попадает дата.
+
+    :param day: Дата (date).
+    :return: Кортеж ("d:2024-12-31", "w:2025-W01", "m:2024-12").
+    """
+    year, week, _ = day.isocalendar()
+    return f"d:{day.isoformat()}", f"w:{year}-W{week:02d}", f"m:{day:%Y-%m}"
+
+
+class HistoryLog:
+    """
+    Журнал записей пользователей с готовыми итогами.
+
+    Каждая запись дописывается в конец файла месяца (`2024-12.log`) записью
+    фиксированной длины, журнал только растёт. Одновременно итоги за день,
+    неделю и месяц увеличиваются в SQLite, поэтому для ответа на /history
+    журнал читать не нужно. Дневные итоги хранят и нормы пользователя на
+    этот день. Итоги можно пересчитать по журналу (`rebuild`).
+
+    Записи и приращения итогов копятся в памяти и сбрасываются (`flush`)
+    вместе с записями пользователей (CachedUserStorage.run_flusher), при
+    `max_pending` накопленных записях и перед чтением итогов: серия записей
+    стоит одного дописывания в файл месяца и одной транзакции.
+    """
+
+    def __init__(self, log_dir, db_path, max_pending=STORAGE_FLUSH_MAX_DIRTY):
+        self.log_dir = Path(log_dir)
+        self.db_path = Path(db_path)
+        self.max_pending = max_pending
+        self._conn = None
+        self._segments = {}  # месяц -> открытый файл
+        self._records = {}  # месяц -> упакованные записи, ещё не дописанные в журнал
+        self._totals = {}  # (user_id, период) -> [water, calories, burned, entries, water_norm, calories_norm]
+        self.pending = 0
+
+    @property
+    def conn(self):
+        """Соединение с базой итогов, открывается при первом обращении."""
+        if self._conn is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(self.db_path, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS rollups ("
+                "user_id TEXT NOT NULL, "
+                "period TEXT NOT NULL, "
+                "water REAL NOT NULL DEFAULT 0, "
+                "calories REAL NOT NULL DEFAULT 0, "
+                "burned REAL NOT NULL DEFAULT 0, "
+                "entries INTEGER NOT NULL DEFAULT 0, "
+                "water_norm REAL, "
+                "calories_norm REAL, "
+                "PRIMARY KEY (user_id, period)) WITHOUT ROWID"
+            )
+        return self._conn
+
+    def record(self, user_id, kind, amount, user_data, now=None):
+        """
+        Добавляет запись в журнал и в итоги (на диск — при следующем сбросе).
+
+        :param user_id: Идентификатор пользователя.
+        :param kind: Вид записи: WATER (мл), FOOD (ккал) или WORKOUT (сожжённые ккал).
+        :param amount: Количество.
+        :param user_data: Данные пользователя после записи (часовой пояс и нормы).
+        :param now: Момент времени в UTC (по умолчанию — сейчас).
+        """
+        now = now or datetime.now(timezone.utc)
+        day = date.fromisoformat(local_day(user_data, now))
+        records = self._records.setdefault(f"{day:%Y-%m}", bytearray())
+        records += RECORD.pack(int(user_id), int(now.timestamp()), day.toordinal(), kind, amount)
+        _accumulate(self._totals, str(user_id), day, kind, amount, user_data.get("water_norm"), user_data.get("calories_norm"))
+        self.pending += 1
+        if self.pending >= self.max_pending:
+            self.flush()
+
+    def flush(self):
+        """
+        Дописывает накопленные записи в журнал и итоги.
+
+        Записи каждого месяца уходят в файл одним вызовом write, приращения
+        итогов — одной транзакцией.
+
+        :return: Количество сброшенных записей.
+        """
+        if not self.pending:
+            return 0
+        records, totals, count = self._records, self._totals, self.pending
+        self._records, self._totals, self.pending = {}, {}, 0
+        for month, data in records.items():
+            self._segment(month).write(data)
+        self.conn.execute("BEGIN")
+        try:
+            self._write_totals(totals)
+            self.conn.execute("COMMIT")
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        return count
+
+    def totals(self, user_id, day):
+        """
+        Итоги пользователя за день, неделю и месяц, в которые попадает дата.
+
+        :param user_id: Идентификатор пользователя.
+        :param day: Дата (date).
+        :return: Словарь {"day"|"week"|"month": {"water", "calories", "burned", "entries", ...} либо None}.
+        """
+        self.flush()
+        keys = period_keys(day)
+        rows = self.conn.execute(
+            "SELECT period, water, calories, burned, entries, water_norm, calories_norm FROM rollups "
+            "WHERE user_id = ? AND period IN (?, ?, ?)",
+            (str(user_id), *keys),
+        ).fetchall()
+        found = {
+            row[0]: dict(zip(("water", "calories", "burned", "entries", "water_norm", "calories_norm"), row[1:]))
+            for row in rows
+        }
+        return {name: found.get(key) for name, key in zip(("day", "week", "month"), keys)}
+
+    def daily(self, user_id, first_day, last_day):
+        """
+        Дневные итоги пользователя за период (дни без записей пропущены).
+
+        :return: Список (дата, water, calories, burned, water_norm, calories_norm) по возрастанию даты.
+        """
+        self.flush()
+        rows = self.conn.execute(
+            "SELECT period, water, calories, burned, water_norm, calories_norm FROM rollups "
+            "WHERE user_id = ? AND period BETWEEN ? AND ? ORDER BY period",
+            (str(user_id), f"d:{first_day.isoformat()}", f"d:{last_day.isoformat()}"),
+        )
+        return [(date.fromisoformat(period[2:]), *values) for period, *values in rows]
+
+    def iter_records(self):
+        """Перебирает все записи журнала: (user_id, время, день, вид, количество)."""
+        self.flush()
+        for path in sorted(self.log_dir.glob("*.log")):
+            data = path.read_bytes()
+            # Недописанная последняя запись (сбой во время записи) пропускается
+            usable = len(data) - len(data) % RECORD.size
+            yield from RECORD.iter_unpack(data[:usable])
+
+    def rebuild(self):
+        """
+        Пересчитывает итоги заново по журналу.
+
+        Нормы в журнал не пишутся, поэтому сохраняются из прежних дневных итогов.
+
+        :return: Количество обработанных записей.
+        """
+        self.flush()
+        norms = {
+            (user_id, period): (water_norm, calories_norm)
+            for user_id, period, water_norm, calories_norm in self.conn.execute(
+                "SELECT user_id, period, water_norm, calories_norm FROM rollups WHERE period LIKE 'd:%'"
+            )
+        }
+        totals = {}
+        count = 0
+        for user_id, _, ordinal, kind, amount in self.iter_records():
+            user_id, day = str(user_id), date.fromordinal(ordinal)
+            water_norm, calories_norm = norms.get((user_id, period_keys(day)[0]), (None, None))
+            _accumulate(totals, user_id, day, kind, amount, water_norm, calories_norm)
+            count += 1
+        self.conn.execute("BEGIN")
+        try:
+            self.conn.execute("DELETE FROM rollups")
+            self._write_totals(totals)
+            self.conn.execute("COMMIT")
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        return count
+
+    def close(self):
+        """Сбрасывает накопленные записи, закрывает файлы журнала и базу итогов."""
+        self.flush()
+        for segment in self._segments.values():
+            segment.close()
+        self._segments.clear()
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def _segment(self, month):
+        segment = self._segments.get(month)
+        if segment is None:
+            self.log_dir.mkdir(parents=True, exist_ok=True)
+            # Без буфера: накопленные записи уходят одним вызовом write в режиме дозаписи,
+            # поэтому записи нескольких процессов не перемешиваются
+            segment = self._segments[month] = open(self.log_dir / f"{month}.log", "ab", buffering=0)
+        return segment
+
+    def _write_totals(self, totals):
+        self.conn.executemany(
+            "INSERT INTO rollups (user_id, period, water, calories, burned, entries, water_norm, calories_norm) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(user_id, period) DO UPDATE SET "
+            "water = water + excluded.water, calories = calories + excluded.calories, "
+            "burned = burned + excluded.burned, entries = entries + excluded.entries, "
+            "water_norm = coalesce(excluded.water_norm, water_norm), "
+            "calories_norm = coalesce(excluded.calories_norm, calories_norm)",
+            ((user_id, period, *values) for (user_id, period), values in totals.items()),
+        )
+
+
+def _accumulate(totals, user_id, day, kind, amount, water_norm, calories_norm):
+    # Приращения итогов за день, неделю и месяц; нормы хранятся только в дневных
+    day_key, week_key, month_key = period_keys(day)
+    for key in (day_key, week_key, month_key):
+        values = totals.setdefault((user_id, key), [0, 0, 0, 0, None, None])
+        values[_TOTAL_FIELDS[kind]] += amount
+        values[3] += 1
+    values = totals[(user_id, day_key)]
+    if water_norm is not None:
+        values[4] = water_norm
+    if calories_norm is not None:
+        values[5] = calories_norm
+
+
+# Общий журнал истории
+history = HistoryLog(HISTORY_DIR, HISTORY_DB)
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] != ["rebuild"]:
+        print("Использование: python -m utils.history rebuild")
+        sys.exit(1)
+    print(f"Итоги пересчитаны, записей: {history.rebuild()}")
+    history.close()
@@ -0,0 +1,69 @@
+# Общий асинхронный HTTP-клиент для внешних API
+import asyncio
+import random
+
+import aiohttp
+
+from config import HTTP_POOL_SIZE, HTTP_TIMEOUT, HTTP_RETRIES, HTTP_BACKOFF, HTTP_DNS_TTL
+
+# Статусы, при которых имеет смысл повторить запрос
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+_session = None
+
+
+def get_session():
+    """
+    Возвращает общую сессию aiohttp, создавая её при первом обращении.
+
+    Сессия держит пул keep-alive соединений и кэширует DNS-ответы,
+    поэтому повторные запросы к одному API не открывают новых соединений.
+    """
+    global _session
+    if _session is None or _session.closed:
+        connector = aiohttp.TCPConnector(
+            limit=HTTP_POOL_SIZE,
+            ttl_dns_cache=HTTP_DNS_TTL,
+            keepalive_timeout=30,
+        )
+        _session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=HTTP_TIMEOUT),
+        )
+    return _session
+
+
+async def close_session():
+    """Закрывает общую сессию при остановке бота."""
+    global _session
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
+
+
+async def fetch_json(url, params=None, timeout=None, retries=HTTP_RETRIES):
+    """
+    Выполняет GET-запрос и разбирает JSON-ответ.
+
+    Сетевые ошибки, таймауты и статусы из RETRY_STATUSES повторяются
+    с экспоненциальной задержкой и случайным разбросом (full jitter).
+
+    :param url: Адрес запроса.
+    :param params: Параметры строки запроса.
+    :param timeout: Таймаут одного запроса в секундах.
+    :param retries: Количество повторов после первой попытки.
+    :return: Кортеж (HTTP-статус, разобранный JSON либо None).
+    """
+    request_timeout = aiohttp.ClientTimeout(total=timeout) if timeout else None
+    for attempt in range(retries + 1):
+        last_attempt = attempt == retries
+        try:
+            async with get_session().get(url, params=params, timeout=request_timeout) as response:
+                if response.status not in RETRY_STATUSES or last_attempt:
+                    if response.status >= 400:
+                        return response.status, None
+                    return response.status, await response.json(content_type=None)
+        except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+            if last_attempt:
+                raise
+        await asyncio.sleep(random.uniform(0, HTTP_BACKOFF * 2 ** attempt))
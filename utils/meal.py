@@ -0,0 +1,149 @@
+# Разбор и поиск нескольких продуктов из одного сообщения
+import asyncio
+import re
+
+from config import FOOD_AUTO_SCORE
+from utils.catalog import find_food
+from utils.ranking import match_score
+from utils.text import normalize_text
+
+# Запятая между цифрами — десятичная («1,5 кг»), остальные запятые, точки с запятой и переводы строк разделяют продукты
+_ITEM_SEPARATORS = re.compile(r"(?<!\d),|,(?!\d)|[;\n]")
+_NUMBER = r"(?P<{0}>\d+(?:[.,]\d+)?)"
+_UNIT = r"(?:\s*(?P<{0}>кг|гр|граммов|грамма|грамм|г|мл|л|штуки|штук|шт)\.?)?(?!\w)"
+# Количество перед названием («150г гречка») или после него («гречка 150 г»); единицы — в любом регистре
+_QUANTITY_FIRST = re.compile(rf"^{_NUMBER.format('amount')}{_UNIT.format('unit')}\s*(?P<name>.+)$", re.IGNORECASE)
+_QUANTITY_LAST = re.compile(rf"^(?P<name>.+?)\s+{_NUMBER.format('amount')}{_UNIT.format('unit')}$", re.IGNORECASE)
+
+# Граммов в единице; мл и л считаются по плотности воды
+_UNIT_GRAMS = {
+    "г": 1, "гр": 1, "грамм": 1, "грамма": 1, "граммов": 1,
+    "кг": 1000, "мл": 1, "л": 1000,
+}
+# Продукты со схожестью не ниже лучшей минус AUTO_MARGIN считаются равноценными кандидатами
+AUTO_MARGIN = 0.05
+# Допустимое отличие калорийности равноценных кандидатов от лучшего, доля
+KCAL_TOLERANCE = 0.1
+# Средний вес одной штуки, г; ключ — начало названия
+PIECE_GRAMS = {
+    "банан": 120, "яблок": 180, "груш": 170, "апельсин": 150, "мандарин": 80, "персик": 150,
+    "киви": 75, "яйц": 55, "яиц": 55, "помидор": 120, "огур": 100,
+}
+
+
+def piece_grams(name):
+    """
+    Вес одной штуки продукта.
+
+    :param name: Название продукта.
+    :return: Вес в граммах либо None, если он неизвестен.
+    """
+    words = normalize_text(name).split()
+    if not words:
+        return None
+    for stem, grams in PIECE_GRAMS.items():
+        if words[0].startswith(stem):
+            return grams
+    return None
+
+
+def parse_item(text):
+    """
+    Разбирает один продукт: «150г гречка», «гречка 0,2 кг», «1 банан», «курица».
+
+    Количество без единиц измерения или в штуках переводится в граммы по
+    среднему весу штуки; если он неизвестен или количество не указано,
+    граммы остаются None.
+
+    :param text: Текст продукта.
+    :return: Словарь {"name", "grams"} либо None для пустого текста.
+    """
+    text = text.strip()
+    if not text:
+        return None
+
+    match = _QUANTITY_FIRST.match(text) or _QUANTITY_LAST.match(text)
+    if match is None:
+        return {"name": text, "grams": None}
+
+    name = match["name"].strip()
+    amount = float(match["amount"].replace(",", "."))
+    unit = (match["unit"] or "").casefold()
+    if unit in _UNIT_GRAMS:
+        grams = amount * _UNIT_GRAMS[unit]
+    else:
+        weight = piece_grams(name)
+        grams = amount * weight if weight is not None else None
+    return {"name": name, "grams": grams if grams is None or grams > 0 else None}
+
+
+def parse_meal(text):
+    """
+    Разбирает список продуктов через запятую, точку с запятой или с новой строки.
+
+    :param text: Текст вида «150г гречка, 200г курица, 1 банан».
+    :return: Список словарей {"name", "grams"} (см. parse_item).
+    """
+    items = (parse_item(part) for part in _ITEM_SEPARATORS.split(text))
+    return [item for item in items if item is not None]
+
+
+def food_options(food_data):
+    """Название и калорийность найденных продуктов в том виде, в каком они хранятся в состоянии диалога."""
+    return [
+        {"name": product.get("product_name", "Неизвестно"), "kcal": product["nutriments"]["energy-kcal_100g"]}
+        for product in food_data["temp"]
+    ]
+
+
+def best_option(name, options, min_score=FOOD_AUTO_SCORE):
+    """
+    Самый похожий на запрос продукт, если его можно выбрать без вопроса.
+
+    Схожесть должна быть не ниже min_score, а почти так же похожие продукты
+    не должны заметно отличаться по калорийности (например, «Курица филе»
+    и «Курица гриль» на запрос «курица» требуют выбора).
+
+    :param name: Название из сообщения пользователя.
+    :param options: Найденные продукты (food_options).
+    :param min_score: Минимальная схожесть (0..1).
+    :return: Продукт либо None.
+    """
+    scored = [(match_score(name, option["name"]), option) for option in options]
+    if not scored:
+        return None
+    score, best = max(scored, key=lambda item: item[0])
+    if score < min_score:
+        return None
+    for other_score, option in scored:
+        if other_score >= score - AUTO_MARGIN and abs(option["kcal"] - best["kcal"]) > KCAL_TOLERANCE * best["kcal"]:
+            return None
+    return best
+
+
+async def resolve_meal(items):
+    """
+    Ищет все продукты сразу и выбирает подходящие без участия пользователя.
+
+    Продукт выбирается автоматически, если найден достаточно похожий и
+    известен его вес; остальные требуют выбора или ввода граммов.
+
+    :param items: Продукты из parse_meal.
+    :return: Кортеж (выбранные, требующие уточнения, не найденные). Выбранные
+        дополнены полями "product" и "calories", требующие уточнения — "options"
+        и "message", не найденные — "error".
+    """
+    results = await asyncio.gather(*(find_food(item["name"]) for item in items))
+
+    resolved, ambiguous, missing = [], [], []
+    for item, food_data in zip(items, results):
+        if food_data["status"] != 200:
+            missing.append(dict(item, error=food_data.get("error", "Ошибка при поиске продукта.")))
+            continue
+        options = food_options(food_data)
+        product = best_option(item["name"], options)
+        if product is not None and item["grams"] is not None:
+            resolved.append(dict(item, product=product, calories=product["kcal"] / 100 * item["grams"]))
+        else:
+            ambiguous.append(dict(item, options=options, message=food_data["message"]))
+    return resolved, ambiguous, missing
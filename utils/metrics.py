@@ -0,0 +1,275 @@
+# Метрики работы бота в формате Prometheus
+import functools
+import time
+from bisect import bisect_left
+
+# Границы корзин гистограмм задержек по умолчанию, сек
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class _Metric:
+    """
+    Общая часть метрик: имя, описание и дочерние метрики по значениям меток.
+
+    Метрика без меток сама является своей единственной дочерней метрикой.
+    """
+
+    type = None
+
+    def __init__(self, name, documentation, labelnames=(), registry=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        if not self.labelnames:
+            self.labels()
+        (REGISTRY if registry is None else registry).append(self)
+
+    def labels(self, **labels):
+        """
+        Дочерняя метрика для набора значений меток.
+
+        На горячем пути дочернюю метрику лучше получить один раз и сохранить.
+        """
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        child = self._children.get(key)
+        if child is None:
+            child = self._children[key] = self._new_child()
+        return child
+
+    def _own(self):
+        # Метрика без меток хранит значение в дочерней метрике с пустым ключом
+        return self.labels()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def _label_text(self, key, extra=()):
+        pairs = [*zip(self.labelnames, key), *extra]
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+    def collect(self):
+        """Строки метрики в текстовом формате Prometheus."""
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        for key, child in sorted(self._children.items()):
+            lines.extend(self._sample_lines(key, child))
+        return lines
+
+    def _sample_lines(self, key, child):
+        yield f"{self.name}{self._label_text(key)} {_number(child.value)}"
+
+
+class _CounterChild:
+    __slots__ = ("_value", "function")
+
+    def __init__(self):
+        self._value = 0.0
+        self.function = None
+
+    @property
+    def value(self):
+        return self.function() if self.function is not None else self._value
+
+    def inc(self, amount=1):
+        self._value += amount
+
+    def set_function(self, function):
+        self.function = function
+
+
+class Counter(_Metric):
+    """
+    Счётчик, который только растёт.
+
+    Значение можно брать из уже существующего счётчика (set_function),
+    например из счётчиков попаданий кэша.
+    """
+
+    type = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount=1):
+        self._own().inc(amount)
+
+    def set_function(self, function):
+        self._own().set_function(function)
+
+
+class _GaugeChild:
+    __slots__ = ("_value", "function")
+
+    def __init__(self):
+        self._value = 0.0
+        self.function = None
+
+    @property
+    def value(self):
+        return self.function() if self.function is not None else self._value
+
+    def set(self, value):
+        self._value = value
+
+    def set_function(self, function):
+        self.function = function
+
+
+class Gauge(_Metric):
+    """Текущее значение; может браться из функции в момент сбора метрик."""
+
+    type = "gauge"
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def set(self, value):
+        self._own().set(value)
+
+    def set_function(self, function):
+        self._own().set_function(function)
+
+
+class _HistogramChild:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def time(self):
+        """Контекст, который записывает длительность своего блока."""
+        return _Timer(self)
+
+
+class _Timer:
+    __slots__ = ("child", "started")
+
+    def __init__(self, child):
+        self.child = child
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.child.observe(time.perf_counter() - self.started)
+
+
+class Histogram(_Metric):
+    """Распределение значений (обычно задержек) по корзинам."""
+
+    type = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS, registry=None):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value):
+        self._own().observe(value)
+
+    def time(self):
+        return self._own().time()
+
+    def _sample_lines(self, key, child):
+        cumulative = 0
+        for bound, count in zip((*self.buckets, float("inf")), child.counts):
+            cumulative += count
+            le = (("le", "+Inf" if bound == float("inf") else _number(bound)),)
+            yield f"{self.name}_bucket{self._label_text(key, le)} {cumulative}"
+        yield f"{self.name}_sum{self._label_text(key)} {_number(child.sum)}"
+        yield f"{self.name}_count{self._label_text(key)} {child.count}"
+
+
+def track_status(histogram, call):
+    """
+    Декоратор асинхронной функции, которая возвращает словарь со статусом.
+
+    Записывает время вызова в гистограмму с метками call и status
+    (status — поле "status" результата).
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            result = await func(*args, **kwargs)
+            histogram.labels(call=call, status=result.get("status")).observe(time.perf_counter() - started)
+            return result
+        return wrapper
+    return decorator
+
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _number(value):
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+def render(registry=None):
+    """
+    Все метрики реестра в текстовом формате Prometheus.
+
+    :param registry: Список метрик, по умолчанию общий реестр.
+    :return: Текст для ответа на /metrics.
+    """
+    lines = []
+    for metric in REGISTRY if registry is None else registry:
+        lines.extend(metric.collect())
+    return "\n".join(lines) + "\n"
+
+
+async def metrics_handler(request):
+    """Обработчик aiohttp для /metrics."""
+    from aiohttp import web
+
+    return web.Response(text=render(), content_type="text/plain", charset="utf-8",
+                        headers={"X-Prometheus-Format": "0.0.4"})
+
+
+# Общий реестр метрик процесса
+REGISTRY = []
+
+HANDLER_LATENCY = Histogram(
+    "bot_handler_duration_seconds", "Время работы обработчиков обновлений", ("router", "handler")
+)
+HANDLER_ERRORS = Counter(
+    "bot_handler_errors_total", "Исключения в обработчиках обновлений", ("router", "handler")
+)
+EXTERNAL_LATENCY = Histogram(
+    "bot_external_call_duration_seconds", "Время запросов к внешним API", ("call", "status")
+)
+STORAGE_LATENCY = Histogram(
+    "bot_storage_duration_seconds", "Время чтения и записи пользователей в базу", ("op",),
+    buckets=(0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5),
+)
+CHART_RENDER_LATENCY = Histogram(
+    "bot_chart_render_duration_seconds", "Время отрисовки графиков прогресса", ("result",)
+)
+UPDATES_ACTIVE = Gauge("bot_updates_active", "Обновлений в обработке")
+UPDATES_WAITING = Gauge("bot_updates_waiting", "Обновлений в очереди на обработку")
+UPDATES_DROPPED = Counter("bot_updates_dropped_total", "Обновлений, отброшенных из-за переполненной очереди чата")
+FOOD_CACHE_LOOKUPS = Counter(
+    "bot_food_cache_lookups_total", "Поиски продуктов в кэше по результату", ("result",)
+)
+FOOD_CACHE_UPSTREAM = Counter("bot_food_cache_upstream_requests_total", "Запросов кэша продуктов к OpenFoodFacts")
+FOOD_CACHE_COALESCED = Counter(
+    "bot_food_cache_coalesced_total", "Поисков продуктов, присоединившихся к уже идущему запросу"
+)
+FOOD_CACHE_ENTRIES = Gauge("bot_food_cache_memory_entries", "Запросов продуктов в памяти кэша")
+CHART_CACHE_LOOKUPS = Counter(
+    "bot_chart_cache_lookups_total", "Обращения к кэшу графиков прогресса по результату", ("result",)
+)
@@ -0,0 +1,146 @@
+# Промежуточные обработчики (middleware) для диспетчера
+import asyncio
+import logging
+import time
+
+from aiogram import BaseMiddleware
+
+from config import UPDATE_CONCURRENCY, CHAT_QUEUE_LIMIT
+from utils.metrics import HANDLER_LATENCY, HANDLER_ERRORS, UPDATES_ACTIVE, UPDATES_WAITING, UPDATES_DROPPED
+from utils.daily import local_day, rollover_user
+from utils.storage import storage
+from utils.weather import weather_cache
+
+
+class DayRolloverMiddleware(BaseMiddleware):
+    """
+    Сменяет день пользователя при первом обращении в новые локальные сутки.
+
+    Перед обработчиком обнуляет счётчики и пересчитывает нормы, если у
+    пользователя наступил новый день. После обработчика ставит отметку дня
+    записям, которые обработчик только что создал.
+    """
+
+    async def __call__(self, handler, event, data):
+        user = data.get("event_from_user")
+        if user is None:
+            return await handler(event, data)
+
+        user_id = str(user.id)
+        await rollover_user(user_id, storage, weather_cache)
+        result = await handler(event, data)
+
+        user_data = storage.get_user(user_id)
+        if user_data is not None and "day" not in user_data:
+            storage.update_user(user_id, {"day": local_day(user_data)})
+        return result
+
+
+class ChatOrderMiddleware(BaseMiddleware):
+    """
+    Ограничивает число одновременно обрабатываемых обновлений и длину очереди чата.
+
+    Порядок обновлений одного чата обеспечивает изоляция событий FSM
+    (SimpleEventIsolation в диспетчере): состояние читается уже под
+    блокировкой чата, поэтому следующее обновление видит состояние,
+    поставленное предыдущим. Сам middleware регистрируется дважды вокруг
+    FSMContextMiddleware: до него — учёт очереди чата (если у чата уже
+    `chat_queue_limit` обновлений, новые отбрасываются), после него —
+    слот обработки (`run`): одновременно выполняется не больше
+    `concurrency` обновлений, и ожидающие блокировку чата слот не занимают.
+
+    SimpleEventIsolation хранит по asyncio.Lock на каждый ключ чата и не
+    удаляет их, поэтому память под блокировки растёт с числом чатов,
+    писавших боту с момента запуска (собственные блокировки этого
+    middleware удалялись, когда очередь чата пустела).
+    """
+
+    def __init__(self, concurrency=UPDATE_CONCURRENCY, chat_queue_limit=CHAT_QUEUE_LIMIT):
+        self.concurrency = concurrency
+        self.chat_queue_limit = chat_queue_limit
+        self._slots = asyncio.Semaphore(concurrency)
+        self._depth = {}  # чат -> обновлений в работе и в очереди
+        self.pending = 0  # обновлений в работе и в очереди
+        self.active = 0
+        self.max_waiting = 0
+        self.dropped = 0
+        UPDATES_ACTIVE.set_function(lambda: self.active)
+        UPDATES_WAITING.set_function(lambda: self.waiting)
+
+    async def __call__(self, handler, event, data):
+        chat = data.get("event_chat") or data.get("event_from_user")
+        key = chat.id if chat is not None else None
+        depth = self._depth.get(key, 0)
+        if key is not None and depth >= self.chat_queue_limit:
+            self.dropped += 1
+            UPDATES_DROPPED.inc()
+            logging.warning(f"Очередь чата {key} переполнена ({depth}), обновление пропущено")
+            return None
+
+        self.pending += 1
+        self.max_waiting = max(self.max_waiting, self.waiting)
+        if key is not None:
+            self._depth[key] = depth + 1
+        try:
+            return await handler(event, data)
+        finally:
+            self.pending -= 1
+            if key is not None:
+                self._depth[key] -= 1
+                if not self._depth[key]:
+                    del self._depth[key]
+
+    async def run(self, handler, event, data):
+        """Выполняет обновление, заняв один из `concurrency` слотов обработки."""
+        async with self._slots:
+            self.active += 1
+            try:
+                return await handler(event, data)
+            finally:
+                self.active -= 1
+
+    @property
+    def waiting(self):
+        """Сколько обновлений ждут своей очереди."""
+        return self.pending - self.active
+
+    def stats(self):
+        """Глубина очереди и число обрабатываемых обновлений."""
+        return {
+            "active": self.active,
+            "waiting": self.waiting,
+            "max_waiting": self.max_waiting,
+            "chats": len(self._depth),
+            "max_chat_depth": max(self._depth.values(), default=0),
+            "dropped": self.dropped,
+        }
+
+
+class HandlerMetricsMiddleware(BaseMiddleware):
+    """
+    Записывает время работы каждого обработчика и число ошибок в нём.
+
+    Регистрируется как внутренний middleware, поэтому срабатывает только
+    для обновлений, нашедших обработчик. Метки — модуль обработчиков
+    (роутер) и имя функции-обработчика.
+    """
+
+    def __init__(self):
+        self._metrics = {}  # функция-обработчик -> (гистограмма, счётчик ошибок)
+
+    async def __call__(self, handler, event, data):
+        callback = data["handler"].callback
+        metrics = self._metrics.get(callback)
+        if metrics is None:
+            labels = {"router": callback.__module__.rsplit(".", 1)[-1], "handler": callback.__name__}
+            metrics = self._metrics[callback] = HANDLER_LATENCY.labels(**labels), HANDLER_ERRORS.labels(**labels)
+
+        latency, errors = metrics
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        except Exception:
+            errors.inc()
+            raise
+        finally:
+            latency.observe(time.perf_counter() - started)
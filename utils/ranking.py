@@ -0,0 +1,131 @@
+# Ранжирование названий продуктов по схожести с запросом
+from utils.text import normalize_text
+
+# Кириллица переводится в латиницу, чтобы «moloko» и «молоко» совпадали
+_TRANSLIT = str.maketrans({
+    "а": "a", "б": "b", "в": "v", "г": "g", "д": "d", "е": "e", "ж": "zh", "з": "z",
+    "и": "i", "й": "i", "к": "k", "л": "l", "м": "m", "н": "n", "о": "o", "п": "p",
+    "р": "r", "с": "s", "т": "t", "у": "u", "ф": "f", "х": "h", "ц": "c", "ч": "ch",
+    "ш": "sh", "щ": "sch", "ъ": "", "ы": "y", "ь": "", "э": "e", "ю": "yu", "я": "ya",
+})
+
+
+def fold_text(text):
+    """
+    Приводит строку к форме для нечёткого сравнения.
+
+    Поверх normalize_text (регистр, ё→е, пунктуация) кириллица
+    транслитерируется в латиницу, поэтому одно и то же название в разных
+    алфавитах даёт одну и ту же строку.
+    """
+    return normalize_text(text).translate(_TRANSLIT)
+
+
+def trigrams(text):
+    """
+    Множество триграмм сложенной (fold_text) строки.
+
+    Каждое слово дополняется пробелами по краям, чтобы начало и конец слова
+    давали собственные триграммы и сильнее влияли на совпадение.
+    """
+    grams = set()
+    for word in text.split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class TrigramIndex:
+    """
+    Индекс триграмм для пакетного ранжирования набора названий.
+
+    Названия разбираются на триграммы один раз при построении индекса;
+    схожесть запроса со всеми названиями (коэффициент Жаккара) считается
+    одним проходом NumPy по разреженному представлению.
+    """
+
+    def __init__(self, names):
+        # numpy импортируется только при ранжировании: модуль загружается на старте через utils.api
+        import numpy as np
+
+        self.names = list(names)
+        vocabulary = {}
+        gram_ids = []
+        owners = []
+        counts = np.zeros(len(self.names), dtype=np.int32)
+        for idx, name in enumerate(self.names):
+            grams = trigrams(fold_text(name or ""))
+            counts[idx] = len(grams)
+            for gram in grams:
+                gram_ids.append(vocabulary.setdefault(gram, len(vocabulary)))
+                owners.append(idx)
+        self._vocabulary = vocabulary
+        self._gram_ids = np.asarray(gram_ids, dtype=np.int32)
+        self._owners = np.asarray(owners, dtype=np.int32)
+        self._counts = counts
+
+    def scores(self, query):
+        """
+        Схожесть запроса с каждым названием индекса.
+
+        :param query: Строка запроса.
+        :return: Массив коэффициентов Жаккара (0..1) в порядке названий.
+        """
+        import numpy as np
+
+        query_grams = trigrams(fold_text(query))
+        if not query_grams or not self.names:
+            return np.zeros(len(self.names))
+
+        query_ids = np.fromiter(
+            (self._vocabulary[gram] for gram in query_grams if gram in self._vocabulary), dtype=np.int32
+        )
+        mask = np.isin(self._gram_ids, query_ids)
+        shared = np.bincount(self._owners[mask], minlength=len(self.names))
+        union = len(query_grams) + self._counts - shared
+        return np.divide(shared, union, out=np.zeros(len(self.names)), where=union > 0)
+
+    def rank(self, query, limit=None):
+        """
+        Индексы названий по убыванию схожести с запросом.
+
+        :param query: Строка запроса.
+        :param limit: Сколько лучших вернуть (по умолчанию все).
+        :return: Список пар (индекс, схожесть).
+        """
+        import numpy as np
+
+        scores = self.scores(query)
+        # Устойчивая сортировка: при равной схожести сохраняется исходный порядок
+        order = np.argsort(-scores, kind="stable")[:limit]
+        return [(int(idx), float(scores[idx])) for idx in order]
+
+
+def rank_names(query, names, limit=None):
+    """Ранжирует названия по схожести с запросом (см. TrigramIndex.rank)."""
+    return TrigramIndex(names).rank(query, limit)
+
+
+def boost_prefix(score):
+    """Поднимает схожесть названия, которое начинается с запроса."""
+    return 0.5 + score / 2
+
+
+def match_score(query, name):
+    """
+    Схожесть одного названия с запросом, как при поиске по каталогу.
+
+    Коэффициент Жаккара по триграммам; если название начинается с запроса,
+    схожесть поднимается (boost_prefix).
+
+    :return: Число от 0 до 1.
+    """
+    query_grams = trigrams(fold_text(query))
+    name_grams = trigrams(fold_text(name or ""))
+    if not query_grams or not name_grams:
+        return 0.0
+    shared = len(query_grams & name_grams)
+    score = shared / (len(query_grams) + len(name_grams) - shared)
+    if normalize_text(name).startswith(normalize_text(query)):
+        score = boost_prefix(score)
+    return score
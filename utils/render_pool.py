@@ -0,0 +1,115 @@
+# Пул процессов для отрисовки графиков
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from config import BOT_WORKERS, CHART_WORKERS, CHART_QUEUE_SIZE, CHART_QUEUE_TIMEOUT, CHART_BACKEND
+
+
+class RenderQueueFull(Exception):
+    """Очередь отрисовки переполнена, задача не принята."""
+
+
+def _init_worker():
+    """Прогревает процесс: заранее импортирует модули выбранного бэкенда отрисовки."""
+    if CHART_BACKEND == "pillow":
+        import utils.ring_chart  # noqa: F401
+        return
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot  # noqa: F401
+    import utils.helpers  # noqa: F401
+
+
+def _warm_up():
+    return True
+
+
+def _render_progress_chart(*args):
+    if CHART_BACKEND == "pillow":
+        from utils.ring_chart import create_combined_progress_chart
+    else:
+        from utils.helpers import create_combined_progress_chart
+    return create_combined_progress_chart(*args)
+
+
+def _render_trend_chart(*args):
+    from utils.helpers import create_trend_chart
+    return create_trend_chart(*args)
+
+
+class RenderPool:
+    """
+    Пул процессов с прогретым matplotlib для отрисовки графиков.
+
+    Одновременно принимается не больше `workers + queue_size` задач;
+    остальные ждут свободного места не дольше `queue_timeout` секунд,
+    после чего получают RenderQueueFull.
+    """
+
+    def __init__(self, workers=CHART_WORKERS, queue_size=CHART_QUEUE_SIZE, queue_timeout=CHART_QUEUE_TIMEOUT):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self._executor = None
+        self._slots = None
+        self._starting = None
+        self.pending = 0
+
+    async def start(self):
+        """Запускает процессы и дожидается, пока каждый из них прогреется."""
+        if self._starting is None:
+            self._starting = asyncio.ensure_future(self._start())
+        await asyncio.shield(self._starting)
+
+    async def _start(self):
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+        )
+        self._slots = asyncio.Semaphore(self.workers + self.queue_size)
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(self._executor, _warm_up) for _ in range(self.workers)))
+
+    async def submit(self, func, *args):
+        """
+        Выполняет функцию в пуле и возвращает её результат.
+
+        :param func: Функция уровня модуля (должна сериализоваться pickle).
+        :param args: Аргументы функции.
+        :raises RenderQueueFull: Если место в очереди не освободилось вовремя.
+        """
+        await self.start()
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            raise RenderQueueFull(f"В очереди отрисовки уже {self.pending} задач")
+
+        self.pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, func, *args)
+        finally:
+            self.pending -= 1
+            self._slots.release()
+
+    async def render_progress_chart(self, water_logged, water_norm, calories_logged, calories_norm):
+        """Отрисовывает график прогресса (см. create_combined_progress_chart) в пуле и возвращает PNG."""
+        return await self.submit(_render_progress_chart, water_logged, water_norm, calories_logged, calories_norm)
+
+    async def render_trend_chart(self, *args):
+        """Отрисовывает график трендов (см. utils.helpers.create_trend_chart) в пуле и возвращает PNG."""
+        return await self.submit(_render_trend_chart, *args)
+
+    def shutdown(self):
+        """Останавливает процессы пула."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        self._starting = None
+
+
+# Общий пул отрисовки. CHART_WORKERS — процессов на весь бот: при BOT_WORKERS > 1
+# у каждого рабочего процесса свой пул, и процессы отрисовки делятся между ними
+render_pool = RenderPool(workers=max(1, CHART_WORKERS // BOT_WORKERS))
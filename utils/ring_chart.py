@@ -0,0 +1,131 @@
+# Лёгкая отрисовка кольцевого графика прогресса на Pillow
+import io
+import math
+from functools import lru_cache
+
+from PIL import Image, ImageDraw, ImageFont
+
+from config import CHART_FONT, CHART_FONT_BOLD
+
+# Размер изображения как у графика matplotlib (6x6 дюймов при 100 dpi)
+SIZE = 600
+# Рисуем с запасом и уменьшаем — так края колец сглаживаются
+SCALE = 2
+# Быстрое сжатие PNG: файл чуть больше, зато кодирование в разы быстрее
+PNG_COMPRESS_LEVEL = 3
+
+CENTER_X = 0.5
+CENTER_Y = 0.505
+OUTER_RADIUS = 0.31  # доля ширины изображения
+RING_WIDTH = 0.3  # доля радиуса внешнего кольца, как wedgeprops width в matplotlib
+
+WATER_COLORS = ("#4CAF50", "#D3D3D3")
+CALORIES_COLORS = ("#FF5733", "#D3D3D3")
+BACKGROUND = "white"
+
+
+@lru_cache(maxsize=None)
+def _font(size, bold=False):
+    path = CHART_FONT_BOLD if bold else CHART_FONT
+    try:
+        return ImageFont.truetype(path, size * SCALE)
+    except OSError:
+        return ImageFont.load_default(size * SCALE)
+
+
+def _points(pt):
+    # Размер шрифта в пунктах -> пиксели при 100 dpi
+    return round(pt * 100 / 72)
+
+
+def _percents(logged, norm):
+    values = [logged, max(0, norm - logged)]
+    total = sum(values)
+    if total <= 0:
+        return [0.0, 0.0]
+    return [100 * value / total for value in values]
+
+
+def _draw_ring(draw, cx, cy, radius, width, percents, colors, pct_distance):
+    """
+    Рисует кольцо из секторов, начиная с 12 часов против часовой стрелки,
+    как ax.pie(startangle=90) в matplotlib.
+    """
+    box = (cx - radius, cy - radius, cx + radius, cy + radius)
+    angle = 90.0  # угол в системе matplotlib: против часовой стрелки от оси X
+    labels = []
+    for percent, color in zip(percents, colors):
+        if percent <= 0:
+            continue
+        sweep = 360 * percent / 100
+        if sweep >= 360:
+            draw.ellipse(box, fill=color)
+        else:
+            # В Pillow углы идут по часовой стрелке, поэтому меняем знак
+            draw.pieslice(box, -(angle + sweep), -angle, fill=color)
+        middle = math.radians(angle + sweep / 2)
+        labels.append((middle, f"{percent:.0f}%"))
+        angle += sweep
+
+    # Белые границы между секторами
+    angle = 90.0
+    for percent in percents:
+        if 0 < percent < 100:
+            edge = math.radians(angle)
+            draw.line(
+                (cx, cy, cx + radius * math.cos(edge), cy - radius * math.sin(edge)),
+                fill=BACKGROUND,
+                width=2 * SCALE,
+            )
+        angle += 360 * percent / 100
+
+    # Вырезаем центр кольца
+    inner = radius - width
+    draw.ellipse((cx - inner, cy - inner, cx + inner, cy + inner), fill=BACKGROUND)
+
+    font = _font(_points(11), bold=True)
+    for middle, text in labels:
+        x = cx + pct_distance * radius * math.cos(middle)
+        y = cy - pct_distance * radius * math.sin(middle)
+        draw.text((x, y), text, fill="white", font=font, anchor="mm")
+
+
+def create_combined_progress_chart(water_logged, water_norm, calories_logged, calories_norm, file_path=None):
+    """
+    Создаёт объединённую кольцевую диаграмму с прогрессом по воде и калориям.
+
+    Повторяет внешний вид графика matplotlib из utils.helpers, но рисует его
+    напрямую в растровое изображение без тяжёлых зависимостей.
+
+    :param water_logged: Выпитое количество воды.
+    :param water_norm: Норма воды.
+    :param calories_logged: Потреблённые калории.
+    :param calories_norm: Норма калорий.
+    :param file_path: Путь для сохранения изображения; если не указан, изображение возвращается.
+    :return: PNG-изображение в байтах, если file_path не указан.
+    """
+    size = SIZE * SCALE
+    image = Image.new("RGB", (size, size), BACKGROUND)
+    draw = ImageDraw.Draw(image)
+
+    cx, cy = CENTER_X * size, CENTER_Y * size
+    outer = OUTER_RADIUS * size
+    width = RING_WIDTH * outer
+
+    # Внешнее кольцо - калории, внутреннее - вода
+    _draw_ring(draw, cx, cy, outer, width, _percents(calories_logged, calories_norm), CALORIES_COLORS, 0.85)
+    _draw_ring(draw, cx, cy, 0.7 * outer, width, _percents(water_logged, water_norm), WATER_COLORS, 0.80)
+
+    # Подписи колец и заголовок
+    draw.text((cx, cy - 1.1 * outer), "Калории", fill=CALORIES_COLORS[0], font=_font(_points(14), bold=True), anchor="ms")
+    draw.text((cx, cy - 0.2 * outer), "Вода", fill=WATER_COLORS[0], font=_font(_points(14), bold=True), anchor="ms")
+    draw.text((size / 2, 0.093 * size), "Ваш прогресс: Вода и Калории", fill="black", font=_font(_points(16)), anchor="mm")
+
+    image = image.reduce(SCALE)
+    if file_path is not None:
+        image.save(file_path, format="PNG", compress_level=PNG_COMPRESS_LEVEL)
+        return None
+
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG", compress_level=PNG_COMPRESS_LEVEL)
+    return buffer.getvalue()
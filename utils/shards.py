@@ -0,0 +1,40 @@
+# Распределение пользователей между рабочими процессами
+import logging
+
+from aiogram import BaseMiddleware
+
+from utils.metrics import Counter
+
+UPDATES_ROUTED = Counter("bot_updates_routed_total", "Обновлений, переданных рабочим процессам", ("worker",))
+
+
+def shard_of(user_id, shards):
+    """
+    Номер процесса, который обслуживает пользователя.
+
+    :param user_id: ID пользователя (строка или число).
+    :param shards: Количество рабочих процессов.
+    :return: Номер процесса от 0 до shards - 1.
+    """
+    return int(user_id) % shards
+
+
+class ShardRouterMiddleware(BaseMiddleware):
+    """
+    Пересылает обновления рабочим процессам вместо того, чтобы обрабатывать их.
+
+    Все обновления одного пользователя попадают в один и тот же процесс,
+    поэтому его запись в хранилище меняет только этот процесс. Обновления
+    без пользователя уходят в процесс с номером 0.
+    """
+
+    def __init__(self, queues):
+        self.queues = queues
+        self._routed = [UPDATES_ROUTED.labels(worker=shard) for shard in range(len(queues))]
+
+    async def __call__(self, handler, event, data):
+        user = data.get("event_from_user")
+        shard = shard_of(user.id, len(self.queues)) if user is not None else 0
+        self.queues[shard].put(("update", event.model_dump(mode="json", exclude_unset=True)))
+        self._routed[shard].inc()
+        logging.debug(f"Обновление {event.update_id} передано процессу {shard}")
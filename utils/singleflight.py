@@ -0,0 +1,36 @@
+# Объединение одновременных одинаковых запросов
+import asyncio
+
+
+class SingleFlight:
+    """
+    Выполняет не больше одного запроса на ключ одновременно.
+
+    Пока запрос по ключу выполняется, остальные вызовы с тем же ключом
+    не запускают свой, а дожидаются результата первого.
+    """
+
+    def __init__(self):
+        self._inflight = {}
+        self.coalesced = 0
+
+    def __contains__(self, key):
+        return key in self._inflight
+
+    async def do(self, key, func, *args, **kwargs):
+        """
+        Вызывает асинхронную функцию или присоединяется к уже идущему вызову.
+
+        :param key: Ключ запроса.
+        :param func: Асинхронная функция.
+        :return: Результат функции.
+        """
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(func(*args, **kwargs))
+            self._inflight[key] = future
+            future.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            self.coalesced += 1
+        # shield: отмена одного ожидающего не отменяет запрос для остальных
+        return await asyncio.shield(future)
@@ -0,0 +1,75 @@
+# Замеры времени запуска бота
+import logging
+import os
+import subprocess
+import sys
+import time
+
+# Запасной отсчёт, если время старта процесса недоступно (не Linux)
+_IMPORTED_AT = time.perf_counter()
+
+
+def process_uptime_ms():
+    """
+    Время с момента запуска процесса в миллисекундах.
+
+    На Linux берётся из /proc и включает запуск интерпретатора; на других
+    системах отсчитывается от импорта этого модуля.
+    """
+    try:
+        with open("/proc/self/stat", "r") as file:
+            # Имя процесса в скобках может содержать пробелы, поэтому режем по ")"
+            fields = file.read().rsplit(")", 1)[1].split()
+        start_ticks = int(fields[19])
+        with open("/proc/uptime", "r") as file:
+            uptime = float(file.read().split()[0])
+        return (uptime - start_ticks / os.sysconf("SC_CLK_TCK")) * 1000
+    except (OSError, IndexError, ValueError):
+        return (time.perf_counter() - _IMPORTED_AT) * 1000
+
+
+def check_budget(name, elapsed_ms, budget_ms):
+    """
+    Сравнивает замер с бюджетом и пишет результат в лог.
+
+    :return: True, если бюджет соблюдён.
+    """
+    within = elapsed_ms <= budget_ms
+    log = logging.info if within else logging.warning
+    log(f"{name}: {elapsed_ms:.0f} мс (бюджет {budget_ms:.0f} мс)")
+    return within
+
+
+def run_probe(code, importtime=False):
+    """
+    Выполняет код в отдельном чистом интерпретаторе.
+
+    :param code: Код для выполнения, например "import bot".
+    :param importtime: Включить -X importtime для замера импортов.
+    :return: Результат subprocess.run.
+    """
+    command = [sys.executable] + (["-X", "importtime"] if importtime else []) + ["-c", code]
+    return subprocess.run(command, capture_output=True, text=True, check=True)
+
+
+def profile_imports(code, top=20, max_depth=1):
+    """
+    Замеряет время импортов при выполнении кода.
+
+    :param code: Код для выполнения, например "import bot".
+    :param top: Сколько самых дорогих модулей вернуть.
+    :param max_depth: Глубина дерева импортов (0 — только импорты самого кода).
+    :return: Список (суммарно мкс, собственное мкс, модуль) по убыванию суммарного времени.
+    """
+    result = run_probe(code, importtime=True)
+    imports = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth <= max_depth:
+            imports.append((int(cumulative_us), int(self_us), "  " * depth + name.strip()))
+
+    imports.sort(reverse=True)
+    return imports[:top]
@@ -0,0 +1,159 @@
+# Статистика и тренды по истории пользователя
+from datetime import timedelta
+
+import numpy as np
+
+# Периоды, за которые считается статистика, дней
+PERIODS = (7, 30, 90)
+# Окно скользящего среднего, дней
+ROLLING_WINDOW = 7
+
+
+class DailySeries:
+    """
+    Дневные ряды пользователя за непрерывный период, по дню на элемент.
+
+    Дни без записей дают нули; нормы на такие дни берутся из последнего
+    дня, где они известны. Все ряды — массивы NumPy одной длины.
+    """
+
+    def __init__(self, first_day, water, calories, burned, water_norm, calories_norm):
+        self.first_day = first_day
+        self.water = water
+        self.calories = calories
+        self.burned = burned
+        self.water_norm = water_norm
+        self.calories_norm = calories_norm
+
+    @property
+    def days(self):
+        """Даты элементов рядов."""
+        return [self.first_day + timedelta(days=offset) for offset in range(len(self.water))]
+
+    @classmethod
+    def from_rows(cls, rows, first_day, last_day, norms=None):
+        """
+        Собирает ряды из дневных итогов (HistoryLog.daily).
+
+        :param rows: Список (дата, water, calories, burned, water_norm, calories_norm).
+        :param first_day: Первый день периода.
+        :param last_day: Последний день периода (включительно).
+        :param norms: Нормы воды и калорий для дней, когда они неизвестны.
+        """
+        length = (last_day - first_day).days + 1
+        columns = np.zeros((5, length))
+        columns[3:] = np.nan
+        if rows:
+            offsets = np.fromiter(((day - first_day).days for day, *_ in rows), dtype=np.int64, count=len(rows))
+            # None (норма неизвестна) превращается в NaN
+            columns[:, offsets] = np.array([row[1:] for row in rows], dtype=float).T
+        water_norm, calories_norm = forward_fill(columns[3:])
+        if norms is not None:
+            # До первой записи в периоде действуют текущие нормы пользователя
+            water_norm[np.isnan(water_norm)] = norms[0]
+            calories_norm[np.isnan(calories_norm)] = norms[1]
+        return cls(first_day, columns[0], columns[1], columns[2], water_norm, calories_norm)
+
+
+def forward_fill(values):
+    """
+    Заполняет пропуски (NaN) последним известным значением по последней оси.
+
+    Пропуски до первого известного значения остаются NaN.
+    """
+    known = ~np.isnan(values)
+    positions = np.where(known, np.arange(values.shape[-1]), 0)
+    np.maximum.accumulate(positions, axis=-1, out=positions)
+    filled = np.take_along_axis(values, positions, axis=-1)
+    # До первого известного значения заполнять нечем
+    filled[np.cumsum(known, axis=-1) == 0] = np.nan
+    return filled
+
+
+def rolling_mean(values, window=ROLLING_WINDOW):
+    """
+    Скользящее среднее по последней оси.
+
+    В начале ряда, пока дней меньше окна, среднее берётся по имеющимся дням.
+    """
+    sums = np.cumsum(values, axis=-1)
+    sums[..., window:] = sums[..., window:] - sums[..., :-window]
+    counts = np.minimum(np.arange(1, values.shape[-1] + 1), window)
+    return sums / counts
+
+
+def current_streak(met):
+    """
+    Длина текущей серии подряд идущих True по последней оси.
+
+    Последний день (сегодня) ещё не закончился: если норма в нём пока не
+    выполнена, серия считается по вчерашний день.
+    """
+    reversed_met = met[..., ::-1]
+    # Номер первого невыполненного дня с конца; если таких нет — длина ряда
+    first_miss = np.where(reversed_met.all(axis=-1), met.shape[-1], np.argmin(reversed_met, axis=-1))
+    previous = reversed_met[..., 1:]
+    before_today = np.where(previous.all(axis=-1), previous.shape[-1], np.argmin(previous, axis=-1))
+    return np.where(met[..., -1], first_miss, before_today)
+
+
+def longest_streak(met):
+    """Длина самой длинной серии подряд идущих True по последней оси."""
+    totals = np.cumsum(met, axis=-1)
+    # Значение счётчика в последний день без выполнения — начало отсчёта новой серии
+    resets = np.maximum.accumulate(np.where(met, 0, totals), axis=-1)
+    runs = totals - resets
+    return runs.max(axis=-1) if met.shape[-1] else np.zeros(met.shape[:-1], dtype=int)
+
+
+def water_met(water, water_norm):
+    """Дни, когда выпита норма воды."""
+    with np.errstate(invalid="ignore"):
+        return (water_norm > 0) & (water >= water_norm)
+
+
+def calories_met(calories, burned, calories_norm):
+    """Дни, когда еда записана и калорий не больше нормы с учётом сожжённых."""
+    with np.errstate(invalid="ignore"):
+        return (calories > 0) & (calories <= calories_norm + burned)
+
+
+def summarize(water, calories, burned, water_norm, calories_norm, periods=PERIODS):
+    """
+    Статистика за последние дни каждого периода.
+
+    Работает как для рядов одного пользователя (одномерные массивы), так и
+    для многих пользователей сразу (массивы пользователи × дни).
+
+    :return: Словарь {период: {показатель: значение или массив по пользователям}}.
+    """
+    result = {}
+    for days in periods:
+        window = np.s_[..., -days:]
+        water_days = water_met(water[window], water_norm[window])
+        calories_days = calories_met(calories[window], burned[window], calories_norm[window])
+        net = calories[window] - burned[window]
+        result[days] = {
+            "water_avg": water[window].mean(axis=-1),
+            "calories_avg": calories[window].mean(axis=-1),
+            "burned_avg": burned[window].mean(axis=-1),
+            "net_avg": net.mean(axis=-1),
+            "net_total": net.sum(axis=-1),
+            "water_streak": current_streak(water_days),
+            "water_best_streak": longest_streak(water_days),
+            "calories_streak": current_streak(calories_days),
+            "calories_best_streak": longest_streak(calories_days),
+            "active_days": ((water[window] > 0) | (calories[window] > 0) | (burned[window] > 0)).sum(axis=-1),
+        }
+    return result
+
+
+def user_series(history, user_id, last_day, norms=None, days=max(PERIODS)):
+    """
+    Ряды пользователя за последние `days` дней, заканчивая last_day.
+
+    :param history: Журнал истории (utils.history.HistoryLog).
+    :param norms: Текущие нормы воды и калорий пользователя.
+    """
+    first_day = last_day - timedelta(days=days - 1)
+    return DailySeries.from_rows(history.daily(user_id, first_day, last_day), first_day, last_day, norms)
@@ -0,0 +1,307 @@
+# Хранилище пользовательских данных на SQLite
+import asyncio
+import json
+import logging
+import sqlite3
+from collections import OrderedDict
+from pathlib import Path
+
+from config import STORAGE_DB, STORAGE_CACHE_SIZE, STORAGE_FLUSH_INTERVAL, STORAGE_FLUSH_MAX_DIRTY
+from utils.metrics import STORAGE_LATENCY
+
+_LOAD_LATENCY = STORAGE_LATENCY.labels(op="load")
+_SAVE_LATENCY = STORAGE_LATENCY.labels(op="save")
+
+
+class UserStorage:
+    """
+    Хранилище записей пользователей.
+
+    Каждая запись лежит отдельной строкой в таблице `users` с первичным ключом
+    по user_id, поэтому чтение и запись одного пользователя не затрагивают
+    остальных. База открывается в режиме WAL.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = Path(db_path)
+        self._conn = None
+
+    @property
+    def conn(self):
+        """Соединение с базой, открывается при первом обращении."""
+        if self._conn is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(self.db_path, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS users ("
+                "user_id TEXT PRIMARY KEY, "
+                "data TEXT NOT NULL)"
+            )
+        return self._conn
+
+    def get_user(self, user_id):
+        """
+        Возвращает запись пользователя.
+
+        :param user_id: Идентификатор пользователя.
+        :return: Словарь с данными пользователя, либо None.
+        """
+        with _LOAD_LATENCY.time():
+            row = self.conn.execute(
+                "SELECT data FROM users WHERE user_id = ?", (str(user_id),)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def update_user(self, user_id, fields):
+        """
+        Обновляет указанные поля пользователя, создавая запись при необходимости.
+
+        :param user_id: Идентификатор пользователя.
+        :param fields: Словарь с обновляемыми полями.
+        :return: Обновлённая запись пользователя.
+        """
+        with self.transaction():
+            user_data = self.get_user(user_id) or {}
+            user_data.update(fields)
+            with _SAVE_LATENCY.time():
+                self._put(user_id, user_data)
+        return user_data
+
+    def save_users(self, users):
+        """
+        Записывает несколько пользователей одной транзакцией.
+
+        :param users: Словарь {user_id: данные пользователя}.
+        """
+        with _SAVE_LATENCY.time(), self.transaction():
+            for user_id, user_data in users.items():
+                self._put(user_id, user_data)
+
+    def iter_users(self):
+        """Перебирает все записи в виде пар (user_id, данные)."""
+        for user_id, data in self.conn.execute("SELECT user_id, data FROM users"):
+            yield user_id, json.loads(data)
+
+    def count(self):
+        """Количество пользователей в хранилище."""
+        return self.conn.execute("SELECT COUNT(*) FROM users").fetchone()[0]
+
+    def transaction(self):
+        """Контекст транзакции: коммит при успехе, откат при ошибке."""
+        return _Transaction(self.conn)
+
+    def close(self):
+        """Закрывает соединение с базой."""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def _put(self, user_id, user_data):
+        self.conn.execute(
+            "INSERT INTO users (user_id, data) VALUES (?, ?) "
+            "ON CONFLICT(user_id) DO UPDATE SET data = excluded.data",
+            (str(user_id), json.dumps(user_data, ensure_ascii=False)),
+        )
+
+
+class _Transaction:
+    """Вложенные транзакции SQLite через SAVEPOINT."""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        self.conn.execute("SAVEPOINT tx")
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.conn.execute("RELEASE SAVEPOINT tx")
+        else:
+            self.conn.execute("ROLLBACK TO SAVEPOINT tx")
+            self.conn.execute("RELEASE SAVEPOINT tx")
+        return False
+
+
+class CachedUserStorage:
+    """
+    Кэш записей пользователей в памяти с отложенной записью.
+
+    Чтение обслуживается из памяти, изменения помечают запись «грязной».
+    Грязные записи сбрасываются в хранилище одной транзакцией по таймеру
+    (`run_flusher`) или при превышении порога `max_dirty`, поэтому серия
+    обновлений одного пользователя стоит одной записи на диск.
+    """
+
+    def __init__(self, backend, max_size=STORAGE_CACHE_SIZE, max_dirty=STORAGE_FLUSH_MAX_DIRTY):
+        self.backend = backend
+        self.max_size = max_size
+        self.max_dirty = max_dirty
+        self._records = OrderedDict()
+        self._dirty = set()
+        self.flush_count = 0
+
+    def get_user(self, user_id):
+        """
+        Возвращает копию записи пользователя.
+
+        :param user_id: Идентификатор пользователя.
+        :return: Словарь с данными пользователя, либо None.
+        """
+        user_id = str(user_id)
+        if user_id in self._records:
+            self._records.move_to_end(user_id)
+            record = self._records[user_id]
+        else:
+            record = self.backend.get_user(user_id)
+            if record is None:
+                return None
+            self._remember(user_id, record)
+        return dict(record)
+
+    def update_user(self, user_id, fields):
+        """
+        Обновляет поля пользователя в памяти и помечает запись для сброса.
+
+        :param user_id: Идентификатор пользователя.
+        :param fields: Словарь с обновляемыми полями.
+        :return: Копия обновлённой записи пользователя.
+        """
+        user_id = str(user_id)
+        user_data = self.get_user(user_id) or {}
+        user_data.update(fields)
+        self._remember(user_id, user_data)
+        self._mark_dirty(user_id)
+        return dict(user_data)
+
+    def save_users(self, users):
+        """
+        Заменяет записи нескольких пользователей и сразу сбрасывает их на диск.
+
+        :param users: Словарь {user_id: данные пользователя}.
+        """
+        for user_id, user_data in users.items():
+            self._records[str(user_id)] = dict(user_data)
+            self._records.move_to_end(str(user_id))
+            self._dirty.add(str(user_id))
+        self.flush()
+        # Вытесняем после сброса, когда записи уже чистые
+        self._evict()
+
+    def iter_users(self):
+        """Перебирает все записи с учётом ещё не сброшенных изменений."""
+        for user_id, user_data in self.backend.iter_users():
+            if user_id in self._dirty:
+                user_data = dict(self._records[user_id])
+            yield user_id, user_data
+
+        # Новые пользователи, которых ещё нет в базе
+        for user_id in list(self._dirty):
+            if self.backend.get_user(user_id) is None:
+                yield user_id, dict(self._records[user_id])
+
+    def count(self):
+        """Количество пользователей в хранилище (после сброса изменений)."""
+        self.flush()
+        return self.backend.count()
+
+    def flush(self):
+        """
+        Сбрасывает грязные записи в хранилище одной транзакцией.
+
+        :return: Количество записанных пользователей.
+        """
+        if not self._dirty:
+            return 0
+        dirty = {user_id: self._records[user_id] for user_id in self._dirty}
+        self.backend.save_users(dirty)
+        self._dirty.clear()
+        self.flush_count += 1
+        self._evict()
+        return len(dirty)
+
+    async def run_flusher(self, interval=STORAGE_FLUSH_INTERVAL, others=()):
+        """
+        Фоновая задача: периодически сбрасывает изменения на диск.
+
+        :param others: Объекты с отложенной записью (метод flush), которые
+            сбрасываются в том же цикле, например журнал истории.
+        """
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                self.flush()
+            except Exception as err:
+                logging.error(f"Ошибка при сбросе данных пользователей: {err}")
+            for other in others:
+                try:
+                    other.flush()
+                except Exception as err:
+                    logging.error(f"Ошибка при сбросе {type(other).__name__}: {err}")
+
+    def close(self):
+        """Сбрасывает изменения и закрывает хранилище."""
+        self.flush()
+        self.backend.close()
+
+    def _remember(self, user_id, record):
+        self._records[user_id] = record
+        self._records.move_to_end(user_id)
+        self._evict()
+
+    def _mark_dirty(self, user_id):
+        self._dirty.add(user_id)
+        if len(self._dirty) >= self.max_dirty:
+            self.flush()
+
+    def _evict(self):
+        # Вытесняем только чистые записи, грязные дожидаются сброса
+        excess = len(self._records) - self.max_size
+        if excess <= 0:
+            return
+        # Идём от самых старых записей и останавливаемся, как только набрали нужное
+        # количество чистых: грязных впереди не больше max_dirty, ключи не копируются
+        victims = []
+        for user_id in self._records:
+            if user_id not in self._dirty:
+                victims.append(user_id)
+                if len(victims) == excess:
+                    break
+        for user_id in victims:
+            del self._records[user_id]
+
+
+def migrate_from_json(json_path, target):
+    """
+    Однократный перенос данных из storage.json в SQLite.
+
+    Файл переименовывается в `*.migrated`, чтобы миграция не повторялась.
+
+    :param json_path: Путь к старому файлу storage.json.
+    :param target: Хранилище пользователей.
+    :return: Количество перенесённых пользователей.
+    """
+    json_path = Path(json_path)
+    if not json_path.exists():
+        return 0
+
+    with open(json_path, "r", encoding="utf-8") as file:
+        all_users = json.load(file)
+
+    target.save_users(all_users)
+    json_path.rename(json_path.with_name(json_path.name + ".migrated"))
+    return len(all_users)
+
+
+# Общее хранилище для всех обработчиков
+storage = CachedUserStorage(UserStorage(STORAGE_DB))
+
+
+if __name__ == "__main__":
+    import sys
+
+    source = Path(sys.argv[1]) if len(sys.argv) > 1 else Path("data/storage.json")
+    print(f"Перенесено пользователей: {migrate_from_json(source, storage)}")
+    storage.close()
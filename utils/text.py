@@ -0,0 +1,19 @@
+# Нормализация пользовательского текста
+import re
+import unicodedata
+
+_SEPARATORS = re.compile(r"[\s\-_.,;:!?\"'()«»]+")
+
+
+def normalize_text(text):
+    """
+    Приводит строку к каноническому виду для сравнения и ключей кэша.
+
+    Регистр и юникод-варианты символов унифицируются, «ё» заменяется на «е»,
+    а дефисы, пунктуация и повторные пробелы сводятся к одному пробелу.
+
+    :param text: Исходная строка.
+    :return: Нормализованная строка.
+    """
+    text = unicodedata.normalize("NFKC", text).casefold().replace("ё", "е")
+    return _SEPARATORS.sub(" ", text).strip()
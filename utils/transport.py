@@ -0,0 +1,162 @@
+# Транспорт запросов к внешним API: живые запросы, запись и воспроизведение
+import asyncio
+import random
+
+from config import API_TRANSPORT, API_FIXTURES, API_LATENCY_MS, API_ERROR_RATE, API_FAULT_SEED
+from utils.helpers import load_data, save_data
+from utils.http import fetch_json
+
+# Параметры, которые не входят в ключ записи (секреты)
+SECRET_PARAMS = {"appid"}
+# Статус, которым отвечает транспорт при искусственной ошибке
+INJECTED_ERROR_STATUS = 503
+
+
+class FixtureMissing(LookupError):
+    """Для запроса нет записанного ответа."""
+
+
+class LiveTransport:
+    """Настоящие запросы к API через общий HTTP-клиент."""
+
+    async def fetch_json(self, api, url, params=None, timeout=None):
+        """
+        Выполняет запрос к API.
+
+        :param api: Короткое имя API ("weather", "food") для записи и настроек.
+        :param url: Адрес запроса.
+        :param params: Параметры строки запроса.
+        :param timeout: Таймаут запроса в секундах.
+        :return: Кортеж (HTTP-статус, разобранный JSON либо None).
+        """
+        return await fetch_json(url, params=params, timeout=timeout)
+
+
+class FixtureStore:
+    """
+    Записанные ответы API в одном JSON-файле.
+
+    Ключ — имя API и отсортированные параметры запроса без секретов,
+    значение — пара [статус, JSON-ответ].
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._responses = None
+
+    @staticmethod
+    def key(api, params):
+        """Ключ записи для запроса."""
+        query = "&".join(f"{name}={value}" for name, value in sorted((params or {}).items())
+                         if name not in SECRET_PARAMS)
+        return f"{api}?{query}"
+
+    @property
+    def responses(self):
+        if self._responses is None:
+            self._responses = load_data(self.path)
+        return self._responses
+
+    def get(self, api, params):
+        response = self.responses.get(self.key(api, params))
+        if response is None:
+            raise FixtureMissing(f"Нет записанного ответа для {self.key(api, params)}")
+        status, data = response
+        return status, data
+
+    def put(self, api, params, status, data):
+        self.responses[self.key(api, params)] = [status, data]
+        save_data(self.path, self.responses)
+
+
+class RecordingTransport:
+    """Выполняет запросы через другой транспорт и записывает ответы."""
+
+    def __init__(self, inner, store):
+        self.inner = inner
+        self.store = store
+
+    async def fetch_json(self, api, url, params=None, timeout=None):
+        status, data = await self.inner.fetch_json(api, url, params=params, timeout=timeout)
+        self.store.put(api, params, status, data)
+        return status, data
+
+
+class ReplayTransport:
+    """Отвечает записанными ответами без обращения к сети."""
+
+    def __init__(self, store):
+        self.store = store
+
+    async def fetch_json(self, api, url, params=None, timeout=None):
+        return self.store.get(api, params)
+
+
+class FaultyTransport:
+    """
+    Добавляет к другому транспорту задержку и случайные ошибки.
+
+    Задержка и доля ошибок задаются для каждого API отдельно; ошибка
+    возвращается как ответ со статусом INJECTED_ERROR_STATUS. Генератор
+    случайных чисел инициализируется `seed`, поэтому прогоны повторяемы.
+    """
+
+    def __init__(self, inner, latency_ms=None, error_rate=None, seed=0):
+        self.inner = inner
+        self.latency_ms = latency_ms or {}
+        self.error_rate = error_rate or {}
+        self._random = random.Random(seed)
+
+    async def fetch_json(self, api, url, params=None, timeout=None):
+        latency_ms = _for_api(self.latency_ms, api)
+        if latency_ms:
+            await asyncio.sleep(latency_ms / 1000)
+        if self._random.random() < _for_api(self.error_rate, api):
+            return INJECTED_ERROR_STATUS, None
+        return await self.inner.fetch_json(api, url, params=params, timeout=timeout)
+
+
+def _for_api(values, api):
+    return values.get(api, values.get("*", 0))
+
+
+def parse_per_api(value):
+    """
+    Разбирает настройку вида "2000" или "food=2000,weather=50".
+
+    :return: Словарь {имя API: число}; значение для всех API — под ключом "*".
+    """
+    result = {}
+    for part in filter(None, (part.strip() for part in value.split(","))):
+        api, _, number = part.rpartition("=")
+        result[api or "*"] = float(number)
+    return result
+
+
+def create_transport(mode=API_TRANSPORT, fixtures=API_FIXTURES, latency_ms=API_LATENCY_MS,
+                     error_rate=API_ERROR_RATE, seed=API_FAULT_SEED):
+    """
+    Собирает транспорт по настройкам.
+
+    :param mode: "live", "record" (живые запросы с записью) или "replay".
+    :param fixtures: Файл с записанными ответами.
+    :param latency_ms: Искусственная задержка, мс (см. parse_per_api).
+    :param error_rate: Доля искусственных ошибок от 0 до 1 (см. parse_per_api).
+    """
+    if mode == "replay":
+        transport = ReplayTransport(FixtureStore(fixtures))
+    elif mode == "record":
+        transport = RecordingTransport(LiveTransport(), FixtureStore(fixtures))
+    elif mode == "live":
+        transport = LiveTransport()
+    else:
+        raise ValueError(f"Неизвестный транспорт API: {mode}")
+
+    latency_ms, error_rate = parse_per_api(latency_ms), parse_per_api(error_rate)
+    if latency_ms or error_rate:
+        transport = FaultyTransport(transport, latency_ms, error_rate, seed)
+    return transport
+
+
+# Транспорт, через который utils.api обращается к внешним API
+transport = create_transport()
@@ -0,0 +1,141 @@
+# Кэш температуры по городам
+import asyncio
+import json
+import logging
+import time
+from pathlib import Path
+
+from config import WEATHER_CACHE_FILE, WEATHER_TTL, WEATHER_STALE_TTL
+from utils.api import get_temp
+from utils.helpers import save_data
+from utils.singleflight import SingleFlight
+from utils.text import normalize_text
+
+# Задержка перед записью кэша на диск, чтобы объединить серию обновлений
+SAVE_DELAY = 1.0
+
+
+class WeatherCache:
+    """
+    Кэш температуры с каноническими ключами городов.
+
+    Название города нормализуется и один раз сопоставляется с id города
+    в OpenWeather: «Москва», «москва» и «Moscow» ведут к одной записи.
+    Свежие записи (моложе `ttl`) отдаются сразу; устаревшие, но моложе
+    `ttl + stale_ttl`, тоже отдаются сразу, а в фоне запускается обновление.
+    Кэш сохраняется на диск и переживает перезапуск бота.
+    """
+
+    def __init__(self, path, ttl=WEATHER_TTL, stale_ttl=WEATHER_STALE_TTL):
+        self.path = Path(path)
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.aliases = {}  # нормализованное название -> ключ города
+        self.entries = {}  # ключ города -> {"temp", "timezone", "name", "fetched_at"}
+        self._loaded = False
+        self._inflight = SingleFlight()
+        self._save_handle = None
+
+    async def get_temp(self, city):
+        """
+        Возвращает температуру для города, по возможности из кэша.
+
+        :param city: Название города в любом написании.
+        :return: Словарь в формате utils.api.get_temp.
+        """
+        self._load()
+        key = self.aliases.get(normalize_text(city))
+        entry = self.entries.get(key)
+        if entry is None:
+            return await self._inflight.do(("name", normalize_text(city)), self._fetch, city=city)
+
+        age = time.time() - entry["fetched_at"]
+        if age < self.ttl:
+            return self._result(key, entry)
+        if age < self.ttl + self.stale_ttl:
+            if ("id", key) not in self._inflight:
+                asyncio.ensure_future(self._inflight.do(("id", key), self._fetch, city_id=key))
+            return self._result(key, entry)
+        response = await self._inflight.do(("id", key), self._fetch, city_id=key)
+        if response["status"] != 200:
+            # API недоступно: лучше устаревшая температура, чем никакой
+            return self._result(key, entry)
+        return response
+
+    def resolve(self, city):
+        """
+        Возвращает канонический ключ города, если он уже известен кэшу.
+
+        :param city: Название города в любом написании.
+        :return: Строковый id города в OpenWeather, либо None.
+        """
+        self._load()
+        return self.aliases.get(normalize_text(city))
+
+    async def _fetch(self, city=None, city_id=None):
+        response = await get_temp(city=city, city_id=city_id)
+        if response["status"] != 200:
+            return response
+
+        key = str(response["city_id"] if response.get("city_id") is not None else normalize_text(city))
+        self.entries[key] = {
+            "temp": response["temp"],
+            "timezone": response.get("timezone", 0),
+            "name": response.get("name"),
+            "fetched_at": time.time(),
+        }
+        if city is not None:
+            self.aliases[normalize_text(city)] = key
+        if response.get("name"):
+            self.aliases.setdefault(normalize_text(response["name"]), key)
+        self._schedule_save()
+        return self._result(key, self.entries[key])
+
+    @staticmethod
+    def _result(key, entry):
+        return {
+            "temp": entry["temp"],
+            "city_id": key,
+            "name": entry.get("name"),
+            "timezone": entry.get("timezone", 0),
+            "status": 200,
+        }
+
+    def _load(self):
+        if self._loaded:
+            return
+        self._loaded = True
+        if not self.path.exists():
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as file:
+                data = json.load(file)
+            self.aliases = data.get("aliases", {})
+            self.entries = data.get("entries", {})
+        except (OSError, ValueError) as err:
+            logging.warning(f"Не удалось загрузить кэш погоды {self.path}: {err}")
+
+    def _schedule_save(self):
+        if self._save_handle is not None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.save()
+            return
+        self._save_handle = loop.call_later(SAVE_DELAY, self.save)
+
+    def flush(self):
+        """Сохраняет отложенные изменения при остановке бота."""
+        if self._save_handle is not None:
+            self._save_handle.cancel()
+            self.save()
+
+    def save(self):
+        """Сохраняет кэш на диск."""
+        self._save_handle = None
+        save_data(self.path, {"aliases": self.aliases, "entries": self.entries})
+
+
+# Общий кэш погоды для всех обработчиков
+weather_cache = WeatherCache(WEATHER_CACHE_FILE)
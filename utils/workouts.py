@@ -0,0 +1,135 @@
+# Реестр тренировок и разбор сообщений о тренировках
+import json
+import re
+import unicodedata
+
+from config import WORKOUTS_FILE
+
+# Длительность после названия: «30», «30 мин», «1,5 ч», «2 часа»
+_DURATION = re.compile(
+    r" ?(?P<amount>\d+(?:[.,]\d+)?) ?(?P<unit>минуты|минута|минут|мин|м|часа|часов|час|ч)?\.?(?!\w)"
+)
+# Конец нераспознанного фрагмента
+_FRAGMENT_END = re.compile(rf"(?<!\d),|,(?!\d)|;|{_DURATION.pattern}")
+# Разделители между тренировками
+_SEPARATORS = re.compile(r"(?:[ ,;+]|\bи\b)+")
+# Минут в единице длительности
+_UNIT_MINUTES = {"ч": 60, "час": 60, "часа": 60, "часов": 60}
+# Ключ конца названия в узле префиксного дерева
+_END = ""
+
+
+def fold_name(text):
+    """
+    Приводит название тренировки к виду для сравнения.
+
+    Регистр и юникод-варианты унифицируются, «ё» заменяется на «е», дефисы
+    и повторные пробелы сводятся к одному пробелу. Запятые и точки не
+    трогаются: в сообщении они разделяют тренировки и дробную часть.
+    """
+    text = unicodedata.normalize("NFKC", text).casefold().replace("ё", "е")
+    return re.sub(r"[\s\-_]+", " ", text).strip()
+
+
+class WorkoutRegistry:
+    """
+    Виды тренировок с метаболическим эквивалентом (MET) и синонимами.
+
+    Названия и синонимы собираются в префиксное дерево по символам, поэтому
+    название в начале текста находится за один проход по нему, причём
+    выбирается самое длинное («бег трусцой», а не «бег»).
+    """
+
+    def __init__(self, workouts):
+        self.workouts = list(workouts)
+        self._trie = {}
+        for workout in self.workouts:
+            for name in (workout["name"], *workout.get("synonyms", ())):
+                self._insert(fold_name(name), workout)
+
+    @classmethod
+    def load(cls, path):
+        """Загружает реестр из JSON-файла ({"workouts": [...]})."""
+        with open(path, encoding="utf-8") as file:
+            return cls(json.load(file)["workouts"])
+
+    def _insert(self, name, workout):
+        node = self._trie
+        for char in name:
+            node = node.setdefault(char, {})
+        if _END in node and node[_END] is not workout:
+            raise ValueError(f"Название «{name}» относится к двум тренировкам: {node[_END]['name']}, {workout['name']}")
+        node[_END] = workout
+
+    def get(self, name):
+        """
+        Тренировка по полному названию или синониму.
+
+        :return: Тренировка либо None.
+        """
+        workout, end = self.match(fold_name(name))
+        return workout if end == len(fold_name(name)) else None
+
+    def match(self, text, start=0):
+        """
+        Самое длинное название тренировки, с которого начинается text[start:].
+
+        Название должно заканчиваться на границе слова.
+
+        :param text: Текст, приведённый fold_name.
+        :return: Пара (тренировка, позиция конца названия) либо (None, start).
+        """
+        node = self._trie
+        found, found_end = None, start
+        for position in range(start, len(text)):
+            node = node.get(text[position])
+            if node is None:
+                break
+            end = position + 1
+            if _END in node and (end == len(text) or not text[end].isalpha()):
+                found, found_end = node[_END], end
+        return found, found_end
+
+    def parse(self, text):
+        """
+        Разбирает одну или несколько тренировок: «бег 30, йога 20», «силовая тренировка 1 ч».
+
+        :param text: Текст сообщения.
+        :return: Пара (список (тренировка, минуты), список нераспознанных фрагментов).
+        """
+        text = fold_name(text)
+        entries = []
+        unknown = []
+        position = _skip_separators(text, 0)
+        while position < len(text):
+            workout, end = self.match(text, position)
+            duration = _DURATION.match(text, end) if workout is not None else None
+            if duration is None:
+                # Пропускаем нераспознанный фрагмент до следующего разделителя тренировок
+                end = _fragment_end(text, position)
+                unknown.append(text[position:end].strip())
+                position = _skip_separators(text, end)
+                continue
+
+            minutes = float(duration["amount"].replace(",", ".")) * _UNIT_MINUTES.get(duration["unit"], 1)
+            if minutes > 0:
+                entries.append((workout, minutes))
+            else:
+                unknown.append(text[position:duration.end()].strip())
+            position = _skip_separators(text, duration.end())
+        return entries, unknown
+
+
+def _skip_separators(text, position):
+    separators = _SEPARATORS.match(text, position)
+    return separators.end() if separators else position
+
+
+def _fragment_end(text, position):
+    # Фрагмент заканчивается запятой (не между цифрами), точкой с запятой или после длительности
+    end = _FRAGMENT_END.search(text, position)
+    return end.end() if end else len(text)
+
+
+# Общий реестр тренировок
+workouts = WorkoutRegistry.load(WORKOUTS_FILE)